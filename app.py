@@ -1,8 +1,11 @@
 from flask import Flask, jsonify, request  # Flask for web server, jsonify for JSON responses, request to handle HTTP requests
 import sqlite3  # SQLite database library
-from datetime import datetime  # For timestamp generation
-import json  # For JSON serialization and deserialization
 from flask_cors import CORS  # Import CORS for enabling Cross-Origin Resource Sharing
+from app.migrations import migrate  # Versioned schema migrations shared with the FastAPI app
+from app.core.sampling import category_sampler  # In-memory quiz id arrays for category samples
+from app.models.quiz import Quiz  # Quiz data access shared with the FastAPI app
+from app.models.question import Question  # Question data access shared with the FastAPI app
+from app.models.session import Session, SyncExecutor, on_catalog_change, run_sync  # Per-request model sessions
 
 # Initialize Flask application
 app = Flask(__name__)
@@ -20,6 +23,24 @@ def get_db_connection():
     return conn
 
 
+def get_session(conn):
+    """
+    Create a model session for one request on the given connection.
+    Model calls return coroutines; run them with run_sync().
+    """
+    return Session(SyncExecutor(conn))
+
+
+# Redraw category samples after any committed write that creates or deletes a quiz
+on_catalog_change(category_sampler.invalidate)
+
+
+# Bring the schema up to date (tables and indexes) before serving requests
+_conn = get_db_connection()
+migrate(_conn)
+_conn.close()
+
+
 # QUIZZES ---------
 @app.route('/quizzes', methods=['GET'])
 def get_quizzes():
@@ -33,25 +54,10 @@ def get_quizzes():
 
     # Establish database connection
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Execute query based on whether a category filter was provided
-    if category:
-        # Filter quizzes by the specified category
-        cursor.execute("SELECT * FROM quiz WHERE category = ?", (category,))
-    else:
-        # Get all quizzes if no category filter was provided
-        cursor.execute("SELECT * FROM quiz")
-
-    quizzes = cursor.fetchall()
-
-    # Convert the SQLite Row objects to dictionaries for JSON serialization
-    quiz_list = []
-    for quiz in quizzes:
-        quiz_dict = {}
-        for key in quiz.keys():
-            quiz_dict[key] = quiz[key]
-        quiz_list.append(quiz_dict)
+    session = get_session(conn)
+
+    # Get the quizzes, filtered by category if one was provided, as dictionaries
+    quiz_list = run_sync(Quiz.get_all(session, category=category))
 
     # Close the database connection
     conn.close()
@@ -77,41 +83,17 @@ def create_quiz():
         if field not in quiz_data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
 
-    # Generate current timestamp for created_at field
-    current_time = datetime.now().strftime('%Y-%m-%d')
-
     try:
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Insert the new quiz into the database
-        cursor.execute('''
-            INSERT INTO quiz (name, description, image, category, difficulty, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            quiz_data['name'],
-            quiz_data['description'],
-            quiz_data['image'],
-            quiz_data['category'],
-            quiz_data['difficulty'],
-            current_time
-        ))
-
-        # Commit the transaction to save changes
-        conn.commit()
-
-        # Get the ID of the newly inserted quiz
-        new_quiz_id = cursor.lastrowid
+        session = get_session(conn)
 
-        # Fetch the newly created quiz to return it in the response
-        cursor.execute("SELECT * FROM quiz WHERE id = ?", (new_quiz_id,))
-        new_quiz = cursor.fetchone()
+        # Insert the new quiz; the model returns it with its ID and created_at date
+        result = run_sync(Quiz.create(session, quiz_data))
 
-        # Convert SQLite Row to dictionary for JSON serialization
-        result = {}
-        for key in new_quiz.keys():
-            result[key] = new_quiz[key]
+        # Commit the transaction to save changes, then run the cache hooks
+        conn.commit()
+        session.publish()
 
         # Close the database connection
         conn.close()
@@ -133,14 +115,9 @@ def get_categories():
     """
     # Establish database connection
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Execute query to get all unique category names
-    cursor.execute("SELECT DISTINCT category FROM quiz ORDER BY category")
-    categories = cursor.fetchall()
 
-    # Extract category names from the result rows
-    category_list = [category['category'] for category in categories]
+    # Get all unique category names, sorted
+    category_list = run_sync(Quiz.categories(get_session(conn)))
 
     # Close the database connection
     conn.close()
@@ -172,100 +149,50 @@ def add_questions():
     conn = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Create questions table if it doesn't exist
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            quiz_id INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            choices TEXT NOT NULL,
-            correct_answer_index INTEGER NOT NULL,
-            explanation TEXT NOT NULL,
-            category TEXT NOT NULL,
-            difficulty TEXT NOT NULL,
-            image TEXT NOT NULL,
-            FOREIGN KEY (quiz_id) REFERENCES quiz (id)
-        )
-        ''')
+        session = get_session(conn)
+
+        # Validate that all required fields are present
+        required_fields = ['quiz_id', 'question_text', 'choices', 'correct_answer_index',
+                        'explanation', 'category', 'difficulty', 'image']
 
-        # Process each question in the array
+        # Check every question for missing fields before touching the database
+        complete = []
         for index, question_data in enumerate(questions_data):
-            try:
-                # Validate that all required fields are present
-                required_fields = ['quiz_id', 'question_text', 'choices', 'correct_answer_index',
-                                'explanation', 'category', 'difficulty', 'image']
-
-                # Check for missing fields
-                missing_fields = [field for field in required_fields if field not in question_data]
-                if missing_fields:
-                    errors.append({
-                        'index': index,
-                        'error': f'Missing required fields: {", ".join(missing_fields)}'
-                    })
-                    continue
-
-                # Verify that the quiz exists
-                quiz_id = question_data['quiz_id']
-                cursor.execute("SELECT id FROM quiz WHERE id = ?", (quiz_id,))
-                quiz = cursor.fetchone()
-
-                if not quiz:
-                    errors.append({
-                        'index': index,
-                        'error': f'Quiz with ID {quiz_id} not found'
-                    })
-                    continue
-
-                # Convert choices array to JSON string for storage
-                choices_json = json.dumps(question_data['choices'])
-
-                # Insert the new question into the database
-                cursor.execute('''
-                    INSERT INTO questions (
-                        quiz_id, question_text, choices, correct_answer_index,
-                        explanation, category, difficulty, image
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    quiz_id,
-                    question_data['question_text'],
-                    choices_json,
-                    question_data['correct_answer_index'],
-                    question_data['explanation'],
-                    question_data['category'],
-                    question_data['difficulty'],
-                    question_data['image']
-                ))
-
-                # Get the ID of the newly inserted question
-                new_question_id = cursor.lastrowid
-
-                # Fetch the newly created question to return it in the response
-                cursor.execute("SELECT * FROM questions WHERE id = ?", (new_question_id,))
-                new_question = cursor.fetchone()
-
-                # Convert SQLite Row to dictionary for JSON serialization
-                result = {}
-                for key in new_question.keys():
-                    result[key] = new_question[key]
-
-                # Convert the choices JSON string back to an array
-                result['choices'] = json.loads(result['choices'])
-
-                # Add to successful results
-                results.append(result)
-
-            except Exception as e:
-                # Add error for this specific question
+            if not isinstance(question_data, dict):
+                errors.append({
+                    'index': index,
+                    'error': 'Question must be an object'
+                })
+                continue
+
+            missing_fields = [field for field in required_fields if field not in question_data]
+            if missing_fields:
                 errors.append({
                     'index': index,
-                    'error': str(e)
+                    'error': f'Missing required fields: {", ".join(missing_fields)}'
                 })
+                continue
+
+            complete.append((index, question_data))
+
+        # Check the referenced quizzes with one query and insert every row in
+        # one batch; rows that fail come back as errors
+        inserted, insert_errors = run_sync(Question.create_many(session, complete))
+        errors.extend(insert_errors)
+
+        # Build the response from the submitted data instead of re-reading each row
+        for index, question_id in inserted:
+            result = {'id': question_id}
+            for field in required_fields:
+                result[field] = questions_data[index][field]
+            results.append(result)
 
-        # Commit the transaction to save all successful changes
+        # Keep errors in request order
+        errors.sort(key=lambda error: error['index'])
+
+        # Commit the transaction to save all successful changes, then run the cache hooks
         conn.commit()
+        session.publish()
 
         # Prepare the response
         response = {
@@ -307,32 +234,24 @@ def delete_question(question_id):
     try:
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
+        session = get_session(conn)
 
-        # Check if the question exists
-        cursor.execute("SELECT id FROM questions WHERE id = ?", (question_id,))
-        question = cursor.fetchone()
+        # Delete the question; the model returns None if it doesn't exist
+        quiz_id = run_sync(Question.delete(session, question_id))
 
-        if not question:
+        if quiz_id is None:
             conn.close()
             return jsonify({'error': f'Question with ID {question_id} not found'}), 404
 
-        # Delete the question
-        cursor.execute("DELETE FROM questions WHERE id = ?", (question_id,))
-
-        # Commit the transaction to save changes
+        # Commit the transaction to save changes, then run the cache hooks
         conn.commit()
+        session.publish()
 
-        # Check if any rows were affected
-        if cursor.rowcount > 0:
-            conn.close()
-            return jsonify({
-                'success': True,
-                'message': f'Question with ID {question_id} was deleted successfully'
-            }), 200
-        else:
-            conn.close()
-            return jsonify({'error': 'Failed to delete the question'}), 500
+        conn.close()
+        return jsonify({
+            'success': True,
+            'message': f'Question with ID {question_id} was deleted successfully'
+        }), 200
 
     except Exception as e:
         # Handle any errors that occur during database operations
@@ -351,40 +270,18 @@ def get_questions_by_quiz_id(quiz_id):
     try:
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
+        session = get_session(conn)
 
         # First, get the quiz details
-        cursor.execute("SELECT * FROM quiz WHERE id = ?", (quiz_id,))
-        quiz = cursor.fetchone()
+        quiz_dict = run_sync(Quiz.get(session, quiz_id))
 
-        if not quiz:
+        if not quiz_dict:
             return jsonify({'error': f'Quiz with ID {quiz_id} not found'}), 404
 
-        # Convert quiz SQLite Row to dictionary
-        quiz_dict = {}
-        for key in quiz.keys():
-            quiz_dict[key] = quiz[key]
-
-        # Get all questions for the specified quiz_id
-        cursor.execute("SELECT * FROM questions WHERE quiz_id = ?", (quiz_id,))
-        questions = cursor.fetchall()
-
-        # Convert the SQLite Row objects to dictionaries for JSON serialization
-        question_list = []
-        for question in questions:
-            question_dict = {}
-            for key in question.keys():
-                question_dict[key] = question[key]
-
-            # Convert the choices JSON string back to an array
-            if 'choices' in question_dict and question_dict['choices']:
-                try:
-                    question_dict['choices'] = json.loads(question_dict['choices'])
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, keep it as a string
-                    pass
-
-            question_list.append(question_dict)
+        # Get all questions for the specified quiz_id, converting each
+        # choices JSON string back to an array
+        questions = run_sync(Question.get_by_quiz(session, quiz_id))
+        question_list = [Question.decode(question) for question in questions]
 
         # Return both quiz details and questions as JSON
         return jsonify({
@@ -415,39 +312,24 @@ def delete_quiz(quiz_id):
     try:
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
+        session = get_session(conn)
 
-        # Check if the quiz exists
-        cursor.execute("SELECT id FROM quiz WHERE id = ?", (quiz_id,))
-        quiz = cursor.fetchone()
+        # Delete the quiz's questions and then the quiz itself in one
+        # transaction; the model returns None if the quiz doesn't exist
+        questions_deleted = run_sync(Quiz.delete(session, quiz_id))
 
-        if not quiz:
+        if questions_deleted is None:
             return jsonify({'error': f'Quiz with ID {quiz_id} not found'}), 404
 
-        # Begin a transaction
-        conn.execute("BEGIN TRANSACTION")
-
-        # First, delete all questions associated with this quiz
-        cursor.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
-        questions_deleted = cursor.rowcount
-
-        # Then delete the quiz itself
-        cursor.execute("DELETE FROM quiz WHERE id = ?", (quiz_id,))
-
-        # Commit the transaction
+        # Commit the transaction, then run the cache hooks
         conn.commit()
+        session.publish()
 
-        # Check if the quiz was deleted
-        if cursor.rowcount > 0:
-            return jsonify({
-                'success': True,
-                'message': f'Quiz with ID {quiz_id} was deleted successfully',
-                'questions_deleted': questions_deleted
-            }), 200
-        else:
-            # Rollback if the quiz wasn't deleted
-            conn.rollback()
-            return jsonify({'error': 'Failed to delete the quiz'}), 500
+        return jsonify({
+            'success': True,
+            'message': f'Quiz with ID {quiz_id} was deleted successfully',
+            'questions_deleted': questions_deleted
+        }), 200
 
     except Exception as e:
         # Rollback the transaction in case of error
@@ -507,98 +389,17 @@ def create_quiz_with_questions():
     try:
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Begin a transaction
-        conn.execute("BEGIN TRANSACTION")
-
-        # Generate current timestamp for created_at field
-        current_time = datetime.now().strftime('%Y-%m-%d')
-
-        # Insert the new quiz into the database
-        cursor.execute('''
-            INSERT INTO quiz (name, description, image, category, difficulty, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            quiz_data['name'],
-            quiz_data['description'],
-            quiz_data['image'],
-            quiz_data['category'],
-            quiz_data['difficulty'],
-            current_time
-        ))
-
-        # Get the ID of the newly inserted quiz
-        new_quiz_id = cursor.lastrowid
-
-        # Create questions table if it doesn't exist
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            quiz_id INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            choices TEXT NOT NULL,
-            correct_answer_index INTEGER NOT NULL,
-            explanation TEXT NOT NULL,
-            category TEXT NOT NULL,
-            difficulty TEXT NOT NULL,
-            image TEXT NOT NULL,
-            FOREIGN KEY (quiz_id) REFERENCES quiz (id)
+        session = get_session(conn)
+
+        # Insert the quiz and then all its questions in one transaction;
+        # the model raises on the first question that fails
+        quiz_result, inserted_questions = run_sync(
+            Quiz.create_with_questions(session, quiz_data, questions_data)
         )
-        ''')
-
-        # Insert all questions
-        inserted_questions = []
-        for question in questions_data:
-            # Convert choices array to JSON string for storage
-            choices_json = json.dumps(question['choices'])
-
-            # Insert the question
-            cursor.execute('''
-                INSERT INTO questions (
-                    quiz_id, question_text, choices, correct_answer_index,
-                    explanation, category, difficulty, image
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                new_quiz_id,
-                question['question_text'],
-                choices_json,
-                question['correct_answer_index'],
-                question['explanation'],
-                question['category'],
-                question['difficulty'],
-                question['image']
-            ))
-
-            # Get the ID of the newly inserted question
-            new_question_id = cursor.lastrowid
-
-            # Fetch the newly created question
-            cursor.execute("SELECT * FROM questions WHERE id = ?", (new_question_id,))
-            new_question = cursor.fetchone()
-
-            # Convert SQLite Row to dictionary
-            question_dict = {}
-            for key in new_question.keys():
-                question_dict[key] = new_question[key]
-
-            # Convert the choices JSON string back to an array
-            question_dict['choices'] = json.loads(question_dict['choices'])
-
-            inserted_questions.append(question_dict)
-
-        # Fetch the newly created quiz
-        cursor.execute("SELECT * FROM quiz WHERE id = ?", (new_quiz_id,))
-        new_quiz = cursor.fetchone()
-
-        # Convert SQLite Row to dictionary
-        quiz_result = {}
-        for key in new_quiz.keys():
-            quiz_result[key] = new_quiz[key]
-
-        # Commit the transaction
+
+        # Commit the transaction, then run the cache hooks
         conn.commit()
+        session.publish()
 
         # Prepare the response
         response = {
@@ -634,6 +435,7 @@ def get_category_samples():
     """
     Endpoint to retrieve random quizzes from each category.
     Query parameter 'limit' determines how many quizzes per category (default: 3)
+    Optional query parameter 'seed' makes the sample reproducible.
     Returns a JSON object with categories as keys and arrays of quizzes as values.
     """
     conn = None
@@ -643,41 +445,32 @@ def get_category_samples():
 
         # Establish database connection
         conn = get_db_connection()
-        cursor = conn.cursor()
+        session = get_session(conn)
 
-        # First, get all unique categories
-        cursor.execute("SELECT DISTINCT category FROM quiz ORDER BY category")
-        categories = cursor.fetchall()
+        # Optional seed makes the sample reproducible until the catalog changes
+        seed = request.args.get('seed', default=None, type=int)
 
-        # Prepare the result dictionary
-        result = {}
-
-        # For each category, get random quizzes up to the limit
-        for category_row in categories:
-            category = category_row['category']
-            cursor.execute("""
-                SELECT * FROM quiz
-                WHERE category = ?
-                ORDER BY RANDOM()
-                LIMIT ?
-            """, (category, limit))
+        # Load the per-category quiz id arrays if a write invalidated them
+        if category_sampler.needs_refresh:
+            version = category_sampler.version
+            category_sampler.load(run_sync(Quiz.category_index(session)), version)
 
-            quizzes = cursor.fetchall()
+        # Draw up to 'limit' random quiz ids per category without touching the database
+        sampled_ids = category_sampler.sample(limit, seed)
 
-            # Convert the SQLite Row objects to dictionaries
-            quiz_list = []
-            for quiz in quizzes:
-                quiz_dict = {}
-                for key in quiz.keys():
-                    quiz_dict[key] = quiz[key]
-                quiz_list.append(quiz_dict)
+        # Fetch every chosen quiz in a single query
+        all_ids = [quiz_id for ids in sampled_ids.values() for quiz_id in ids]
+        quizzes_by_id = run_sync(Quiz.get_many(session, all_ids))
 
-            result[category] = quiz_list
+        # Group the fetched quizzes by category, keeping the sampled order
+        result = {}
+        for category, ids in sampled_ids.items():
+            result[category] = [quizzes_by_id[quiz_id] for quiz_id in ids if quizzes_by_id[quiz_id] is not None]
 
         return jsonify({
             'success': True,
             'samples': result,
-            'total_categories': len(categories),
+            'total_categories': len(result),
             'quizzes_per_category': limit
         })
 
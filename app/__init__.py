@@ -1,10 +1,12 @@
-from flask import Flask
-from flask_cors import CORS
-from config import Config
+def create_app(config_class=None):
+    # Flask is imported here so the FastAPI app, which shares this
+    # package, doesn't load it on every import
+    from flask import Flask
+    from flask_cors import CORS
+    from config import Config
 
-def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.config.from_object(config_class or Config)
 
     # Enable CORS for all routes
     CORS(app)
@@ -16,8 +18,4 @@ def create_app(config_class=Config):
     app.register_blueprint(categories.bp)
     app.register_blueprint(users.bp)
 
-    print("Registered routes:")
-    for rule in app.url_map.iter_rules():
-        print(f"{rule.endpoint}: {rule.rule}")
-
-    return app
\ No newline at end of file
+    return app
@@ -0,0 +1,93 @@
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# (question ids, correct answer indexes), both in question id order
+AnswerKey = Tuple[array, array]
+
+class AnswerKeyIndex:
+    """Per-quiz answer keys used to score submissions without a query.
+
+    Keys are loaded lazily from ``(question_id, correct_answer_index)`` rows
+    and versioned per quiz like QuizPayloadCache: any write to a quiz's
+    questions calls ``invalidate(quiz_id)``, and a key read before that write
+    is never stored.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[int, int] = {}
+        self._keys: Dict[int, AnswerKey] = {}
+
+    def version(self, quiz_id: int) -> int:
+        return self._versions.get(quiz_id, 0)
+
+    def get(self, quiz_id: int) -> Optional[AnswerKey]:
+        """Return the quiz's answer key, or None if it has to be loaded"""
+        key = self._keys.get(quiz_id)
+        if key is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key
+
+    def load(self, quiz_id: int, rows: Iterable[Tuple[int, int]], version: int) -> AnswerKey:
+        """Build a key from rows in question id order; keep it if the quiz is unchanged"""
+        question_ids = array('q')
+        correct = array('i')
+        for question_id, correct_answer_index in rows:
+            question_ids.append(question_id)
+            correct.append(correct_answer_index)
+
+        key = (question_ids, correct)
+        if version == self.version(quiz_id):
+            self._keys[quiz_id] = key
+        return key
+
+    def invalidate(self, quiz_id: int):
+        """Bump the quiz's version and drop its key"""
+        self._versions[quiz_id] = self.version(quiz_id) + 1
+        self._keys.pop(quiz_id, None)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'quizzes': len(self._keys),
+            'questions': sum(len(question_ids) for question_ids, _ in self._keys.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+def score_answers(key: AnswerKey, answers: Mapping[int, int]) -> Tuple[int, List[Dict], List[int]]:
+    """Check chosen answer indexes against a key in one pass over its questions.
+
+    Returns ``(correct, results, unknown)``: the number of correct answers,
+    one ``{'question_id', 'selected_answer', 'correct_answer_index',
+    'is_correct'}`` dict per question (unanswered questions are wrong), and
+    the submitted question ids that are not part of the quiz.
+    """
+    question_ids, correct_indexes = key
+    correct = 0
+    answered = 0
+    results = []
+    for question_id, correct_answer_index in zip(question_ids, correct_indexes):
+        selected = answers.get(question_id)
+        if selected is not None:
+            answered += 1
+        is_correct = selected == correct_answer_index
+        correct += is_correct
+        results.append({
+            'question_id': question_id,
+            'selected_answer': selected,
+            'correct_answer_index': correct_answer_index,
+            'is_correct': is_correct
+        })
+
+    unknown = []
+    if answered != len(answers):
+        known = set(question_ids)
+        unknown = sorted(question_id for question_id in answers if question_id not in known)
+    return correct, results, unknown
+
+answer_keys = AnswerKeyIndex()
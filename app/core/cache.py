@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.core.answer_keys import answer_keys
+from app.core.compression import EncodedBody
+from app.core.config import get_settings
+from app.core.etag import EPOCH, make_etag
+from app.core.sampling import category_sampler, question_sampler
+from app.core.versions import VersionWatcher
+from app.models.session import on_catalog_change, on_quiz_change
+
+class CatalogCache:
+    """Process-local LRU cache for catalog reads (categories, quiz listings).
+
+    Every entry is tagged with the catalog version it was read at. Writes
+    call ``bump()``, which advances the version and drops all entries, so
+    readers never see a listing older than the last write in this process;
+    ``version_watcher`` bumps it for writes made by other processes.
+    """
+
+    def __init__(self, max_entries: int = 256, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int):
+        """Store value if no write happened since it was read at ``version``"""
+        if not self.enabled or version != self.version:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def bump(self):
+        """Advance the catalog version and drop every cached entry"""
+        self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'version': self.version,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+class QuizPayloadCache:
+    """LRU of serialized ``GET /quizzes/{quiz_id}/questions`` bodies, bounded by bytes.
+
+    Entries are keyed by ``(quiz_id, version)``. Any write to a quiz or its
+    questions calls ``invalidate(quiz_id)``, which bumps that quiz's version
+    and evicts its old body, so a hit can be returned without a query.
+    Bodies are stored with their compressed variants, which count towards
+    the byte bound.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._versions: Dict[int, int] = {}
+        self._entries: "OrderedDict[Tuple[int, int], EncodedBody]" = OrderedDict()
+
+    def version(self, quiz_id: int) -> int:
+        return self._versions.get(quiz_id, 0)
+
+    def get(self, quiz_id: int) -> Optional[EncodedBody]:
+        """Return the cached body for the quiz's current version, or None"""
+        key = (quiz_id, self.version(quiz_id))
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, quiz_id: int, version: int, body: EncodedBody):
+        """Store body if the quiz has not changed since it was read at ``version``"""
+        if version != self.version(quiz_id) or body.size > self.max_bytes:
+            return
+
+        key = (quiz_id, version)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous.size
+
+        self._entries[key] = body
+        self.size += body.size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, quiz_id: int):
+        """Bump the quiz's version and drop its cached body"""
+        version = self.version(quiz_id)
+        self._versions[quiz_id] = version + 1
+        body = self._entries.pop((quiz_id, version), None)
+        if body is not None:
+            self.size -= body.size
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+settings = get_settings()
+catalog_cache = CatalogCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    enabled=settings.CATALOG_CACHE_ENABLED
+)
+
+quiz_payload_cache = QuizPayloadCache(max_bytes=settings.QUIZ_PAYLOAD_CACHE_MAX_BYTES)
+
+# Runs the hooks below for writes made by other processes
+version_watcher = VersionWatcher(interval=settings.CACHE_VERSION_CHECK_MS / 1000)
+
+def catalog_etag() -> str:
+    """ETag of the catalog listings, the same in every worker for the same database"""
+    if version_watcher.token is None:
+        return make_etag(EPOCH, 'catalog', catalog_cache.version)
+    return make_etag(f'{version_watcher.token:x}', 'catalog', version_watcher.catalog)
+
+def quiz_etag(quiz_id: int) -> Optional[str]:
+    """ETag of a quiz's questions payload, or None until its shared version has been read"""
+    if version_watcher.token is None:
+        return make_etag(EPOCH, 'quiz', quiz_id, quiz_payload_cache.version(quiz_id))
+    version = version_watcher.quiz_version(quiz_id)
+    if version is None:
+        return None
+    return make_etag(f'{version_watcher.token:x}', 'quiz', quiz_id, version)
+
+@on_catalog_change
+def invalidate_catalog():
+    """Run after every committed write that creates or deletes a quiz"""
+    catalog_cache.bump()
+    category_sampler.invalidate()
+
+@on_quiz_change
+def invalidate_quiz(quiz_id: int):
+    """Run after every committed write that changes a quiz's questions"""
+    quiz_payload_cache.invalidate(quiz_id)
+    answer_keys.invalidate(quiz_id)
+    question_sampler.invalidate()
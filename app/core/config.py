@@ -1,14 +1,60 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     APP_NAME: str = "Quiz API"
     DATABASE_URL: str = "sqlite:///trivia.db"
     DEBUG: bool = False
+    DB_POOL_READERS: int = 4
+    # Per-connection SQLite tuning; readers and the writer each get these
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_CACHE_SIZE_KB: int = 32 * 1024
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MAX_ENTRIES: int = 256
+    QUIZ_PAYLOAD_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    # How often to look for catalog writes from other processes (other
+    # workers, app.py, the CLIs) and drop what they made stale; 0 only
+    # checks on startup
+    CACHE_VERSION_CHECK_MS: int = 100
+    # Validate quiz and question listings against their response models
+    # before caching them; turn off in production to encode rows directly
+    VALIDATE_RESPONSES: bool = True
+    # Compress responses of at least COMPRESSION_MIN_SIZE bytes for clients
+    # that accept gzip, or br when the brotli package is installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 500
+    # Serve /metrics and time every request and query for it
+    METRICS_ENABLED: bool = True
+    # Log statements slower than SLOW_QUERY_MS with their query plan and keep
+    # per-statement totals for /api/monitoring/queries
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_LINE_BYTES: int = 1024 * 1024
+    # "sync" writes each result in its own transaction, "commit" queues it and
+    # answers once its batch has committed, "queued" answers once it is queued
+    RESULTS_WRITE_MODE: Literal["sync", "commit", "queued"] = "commit"
+    RESULTS_QUEUE_MAX_SIZE: int = 10000
+    RESULTS_BATCH_SIZE: int = 500
+    RESULTS_FLUSH_INTERVAL_MS: int = 10
+    RESULTS_ENQUEUE_TIMEOUT: float = 1.0
 
     class Config:
         env_file = ".env"
 
+    @property
+    def database_path(self) -> str:
+        """Filesystem path of the SQLite database DATABASE_URL names"""
+        path = self.DATABASE_URL.split('?', 1)[0]
+        for prefix in ('sqlite+aiosqlite://', 'sqlite://'):
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+                break
+        # sqlite:///relative.db and sqlite:////absolute/path.db
+        return path[1:] if path.startswith('/') else path
+
 @lru_cache()
 def get_settings():
     return Settings()
\ No newline at end of file
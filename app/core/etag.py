@@ -0,0 +1,58 @@
+import secrets
+from typing import Optional
+from fastapi import Response
+
+# Process-local version counters restart with the process, so tags built
+# from them carry a per-process token to keep an older process's tags from
+# matching. Tags built from the shared database versions don't need it.
+EPOCH = secrets.token_hex(4)
+
+# Content codings whose bodies get a tag of their own
+CODINGS = ('br', 'gzip')
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from a scope token, a resource name and its version counter"""
+    return '"' + '-'.join(str(part) for part in parts) + '"'
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The strong ETag of a body sent with a Content-Encoding.
+
+    Each coding is a different representation, so it needs a different
+    strong tag: the coding is appended to it ('"…-br"'). Weak tags and
+    tags that already carry the coding are returned as they are.
+    """
+    suffix = f'-{encoding}"'
+    if etag.startswith('W/') or etag.endswith(suffix):
+        return etag
+    return etag[:-1] + suffix
+
+def _identity_etag(etag: str) -> str:
+    for coding in CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """Check an If-None-Match header against etag (weak comparison, RFC 9110).
+
+    The tags of the compressed variants of etag match too. Returns the
+    strong tag of the representation that matched, which is what a 304
+    has to carry, or None if nothing did.
+    """
+    if not if_none_match:
+        return None
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return etag
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if _identity_etag(candidate) == etag:
+            return candidate
+    return None
+
+def not_modified(etag: str) -> Response:
+    """An empty 304 carrying the tag returned by ``matching_etag()``"""
+    return Response(status_code=304, headers={'ETag': etag})
@@ -0,0 +1,231 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# Sorts before every member id, so a lookup lands on the first tied entry
+_FIRST = float('-inf')
+
+class RankedScores:
+    """Members ranked by score, highest first.
+
+    Entries are ``(-score, member)`` keys kept in sorted buckets of about
+    ``load`` keys (split when they double), with a Fenwick tree over the
+    bucket sizes. An update is a bisect plus a short list insert, and a rank
+    lookup is two bisects plus an O(log buckets) prefix sum. Tied scores
+    share a rank ("1224" ranking).
+    """
+
+    def __init__(self, load: int = 1000):
+        self._load = load
+        self._scores: Dict[int, float] = {}
+        self._buckets: List[List[Tuple[float, int]]] = []
+        self._maxes: List[Tuple[float, int]] = []
+        self._tree: List[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, member: int) -> Optional[float]:
+        return self._scores.get(member)
+
+    def load(self, scores: Dict[int, float]):
+        """Replace every entry at once; O(n log n) instead of n updates.
+
+        The board takes ownership of ``scores`` instead of copying it.
+        """
+        self._scores = scores
+        keys = sorted((-score, member) for member, score in self._scores.items())
+        self._buckets = [keys[i:i + self._load] for i in range(0, len(keys), self._load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._build_tree()
+
+    def _build_tree(self):
+        count = len(self._buckets)
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for i in range(1, count + 1):
+            parent = i + (i & -i)
+            if parent <= count:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, index: int, delta: int):
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, index: int) -> int:
+        """Number of entries in the buckets before ``index``"""
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _insert(self, key: Tuple[float, int]):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._build_tree()
+            return
+
+        index = bisect_left(self._maxes, key)
+        if index == len(self._buckets):
+            index -= 1
+            self._buckets[index].append(key)
+            self._maxes[index] = key
+        else:
+            insort(self._buckets[index], key)
+
+        bucket = self._buckets[index]
+        if len(bucket) > 2 * self._load:
+            half = len(bucket) // 2
+            self._buckets[index:index + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[index:index + 1] = [bucket[half - 1], bucket[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(index, 1)
+
+    def _remove(self, key: Tuple[float, int]):
+        index = bisect_left(self._maxes, key)
+        bucket = self._buckets[index]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[index] = bucket[-1]
+            self._tree_add(index, -1)
+        else:
+            del self._buckets[index]
+            del self._maxes[index]
+            self._build_tree()
+
+    def update(self, member: int, score: float):
+        """Set a member's score"""
+        previous = self._scores.get(member)
+        if previous == score:
+            return
+        if previous is not None:
+            self._remove((-previous, member))
+        self._scores[member] = score
+        self._insert((-score, member))
+
+    def rank(self, member: int) -> Optional[int]:
+        """1-based rank of a member, or None if it has no score"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+
+        key = (-score, _FIRST)
+        index = bisect_left(self._maxes, key)
+        return self._prefix(index) + bisect_left(self._buckets[index], key) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int, float]]:
+        """The first ``limit`` entries as (rank, member, score) tuples"""
+        entries = []
+        rank = 0
+        previous = None
+        for bucket in self._buckets:
+            for negative_score, member in bucket:
+                if len(entries) >= limit:
+                    return entries
+                if negative_score != previous:
+                    rank = len(entries) + 1
+                    previous = negative_score
+                entries.append((rank, member, -negative_score))
+        return entries
+
+class LeaderboardLoader:
+    """Collects best scores row by row for Leaderboards.load"""
+
+    def __init__(self):
+        self.quizzes: Dict[int, Dict[int, float]] = {}
+        self.categories: Dict[str, Dict[int, float]] = {}
+        self.overall: Dict[int, float] = {}
+
+    def add(self, user_id: int, quiz_id: int, category: Optional[str], best: float):
+        """Add a user's best score on one quiz"""
+        self.quizzes.setdefault(quiz_id, {})[user_id] = best
+        if category is not None:
+            totals = self.categories.setdefault(category, {})
+            totals[user_id] = totals.get(user_id, 0.0) + best
+        self.overall[user_id] = self.overall.get(user_id, 0.0) + best
+
+class Leaderboards:
+    """Per-quiz, per-category and global leaderboards of users.
+
+    A user's quiz score is their best result on that quiz; category and
+    global scores add up those best scores, so replaying a quiz only counts
+    when it beats the previous best.
+    """
+
+    def __init__(self, load: int = 1000):
+        self._load = load
+        self.quizzes: Dict[int, RankedScores] = {}
+        self.categories: Dict[str, RankedScores] = {}
+        self.overall = RankedScores(load)
+        self.loaded = False
+        # Results recorded while a load reads quiz_results
+        self._pending: Optional[List[Tuple]] = None
+
+    def begin_load(self):
+        """Buffer results recorded from now on, for ``load`` to replay"""
+        self._pending = []
+
+    def cancel_load(self):
+        """Drop the buffered results of a load that did not finish"""
+        self._pending = None
+
+    def load(self, loader: LeaderboardLoader):
+        """Replace every board with the scores collected by ``loader``.
+
+        Results buffered since ``begin_load`` are replayed afterwards. Some
+        may already be in the loader's rows; replaying them is a no-op,
+        since only a better score moves a board.
+        """
+        self.quizzes = {quiz_id: self._board(scores) for quiz_id, scores in loader.quizzes.items()}
+        self.categories = {category: self._board(scores) for category, scores in loader.categories.items()}
+        self.overall = self._board(loader.overall)
+        self.loaded = True
+
+        pending, self._pending = self._pending or [], None
+        for entry in pending:
+            self.record(*entry)
+
+    def _board(self, scores: Dict[int, float]) -> RankedScores:
+        board = RankedScores(self._load)
+        board.load(scores)
+        return board
+
+    def record(self, user_id: int, quiz_id: int, category: Optional[str], score: float):
+        """Apply one saved result; buffered during a load, ignored before one"""
+        if self._pending is not None:
+            self._pending.append((user_id, quiz_id, category, score))
+        if not self.loaded:
+            return
+
+        quiz_board = self.quizzes.get(quiz_id)
+        if quiz_board is None:
+            quiz_board = self.quizzes[quiz_id] = RankedScores(self._load)
+
+        best = quiz_board.score(user_id)
+        if best is not None and score <= best:
+            return
+        gain = score - (best or 0.0)
+        quiz_board.update(user_id, score)
+
+        if category is not None:
+            category_board = self.categories.get(category)
+            if category_board is None:
+                category_board = self.categories[category] = RankedScores(self._load)
+            category_board.update(user_id, (category_board.score(user_id) or 0.0) + gain)
+
+        self.overall.update(user_id, (self.overall.score(user_id) or 0.0) + gain)
+
+    def stats(self) -> Dict:
+        return {
+            'loaded': self.loaded,
+            'quizzes': len(self.quizzes),
+            'categories': len(self.categories),
+            'players': len(self.overall),
+            'quiz_entries': sum(len(board) for board in self.quizzes.values())
+        }
+
+leaderboards = Leaderboards()
@@ -0,0 +1,224 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.core.startup import startup_times
+from contextvars import ContextVar
+from functools import lru_cache
+import bisect
+import re
+import time
+
+# Histogram upper bounds, in seconds for latencies
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+# Queries run while handling a request are counted into this list's one item
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar('request_queries', default=None)
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([A-Za-z_][A-Za-z0-9_]*)', re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def query_name(query: str) -> str:
+    """Name a statement by its verb and first table, e.g. ``select quiz``.
+
+    Keeps the query label's cardinality bounded: IN lists of every length
+    and literal values all map to the same name.
+    """
+    words = query.split(None, 1)
+    if not words:
+        return 'empty'
+    match = _TABLE.search(query)
+    verb = words[0].lower()
+    return f'{verb} {match.group(1).lower()}' if match else verb
+
+class Histogram:
+    """Cumulative-on-export histogram; ``observe`` is one bisect and two adds"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """Process-wide request and query metrics in Prometheus text format.
+
+    Everything is updated from the event loop thread, so counters are plain
+    ints and dicts with no locks. Cache, pool and queue figures are read
+    from their own ``stats()`` by collectors when /metrics is scraped.
+    """
+
+    def __init__(self, prefix: str = 'quiz_api'):
+        self.prefix = prefix
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.query_latency: Dict[str, Histogram] = {}
+        self.collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, queries: int):
+        key = (method, route)
+        self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+
+        latency = self.request_latency.get(key)
+        if latency is None:
+            latency = self.request_latency[key] = Histogram(REQUEST_BUCKETS)
+            self.request_queries[key] = Histogram(QUERIES_PER_REQUEST_BUCKETS)
+        latency.observe(seconds)
+        self.request_queries[key].observe(queries)
+
+    def observe_query(self, query, seconds: float):
+        name = query_name(query) if isinstance(query, str) else type(query).__name__
+        histogram = self.query_latency.get(name)
+        if histogram is None:
+            histogram = self.query_latency[name] = Histogram(QUERY_BUCKETS)
+        histogram.observe(seconds)
+
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        self.collectors.append(collector)
+
+    def _histogram_lines(self, name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+            cumulative += count
+            bucket_labels = _format_labels({**labels, 'le': _format_value(bound)})
+            lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+        return lines
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)"""
+        p = self.prefix
+        lines = [
+            f'# HELP {p}_http_requests_total Requests handled, by route template and status.',
+            f'# TYPE {p}_http_requests_total counter',
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            labels = _format_labels({'method': method, 'route': route, 'status': str(status)})
+            lines.append(f'{p}_http_requests_total{labels} {count}')
+
+        lines += [
+            f'# HELP {p}_http_requests_in_flight Requests currently being handled.',
+            f'# TYPE {p}_http_requests_in_flight gauge',
+            f'{p}_http_requests_in_flight {self.in_flight}',
+            f'# HELP {p}_http_request_duration_seconds Request latency, by route template.',
+            f'# TYPE {p}_http_request_duration_seconds histogram',
+        ]
+        for (method, route), histogram in sorted(self.request_latency.items()):
+            lines += self._histogram_lines(
+                f'{p}_http_request_duration_seconds', {'method': method, 'route': route}, histogram
+            )
+
+        lines += [
+            f'# HELP {p}_http_request_db_queries Database queries issued per request, by route template.',
+            f'# TYPE {p}_http_request_db_queries histogram',
+        ]
+        for (method, route), histogram in sorted(self.request_queries.items()):
+            lines += self._histogram_lines(
+                f'{p}_http_request_db_queries', {'method': method, 'route': route}, histogram
+            )
+
+        lines += [
+            f'# HELP {p}_db_query_duration_seconds Query latency, by statement verb and table.',
+            f'# TYPE {p}_db_query_duration_seconds histogram',
+        ]
+        for name, histogram in sorted(self.query_latency.items()):
+            lines += self._histogram_lines(f'{p}_db_query_duration_seconds', {'query': name}, histogram)
+
+        for collector in self.collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f'# HELP {p}_{name} {help_text}')
+                lines.append(f'# TYPE {p}_{name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{p}_{name}{_format_labels(labels)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that handled a request, router prefix included"""
+    template = getattr(scope.get('route'), 'path_format', None)
+    if template is None:
+        return 'unmatched'
+
+    # Routers included with a prefix match the rest of the path, so the
+    # prefix is whatever comes before the part the route matched
+    try:
+        matched = template.format(**scope.get('path_params', {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope['path']
+    if matched and path.endswith(matched):
+        return path[:len(path) - len(matched)] + template
+    return template
+
+class MetricsMiddleware:
+    """Count and time every HTTP request under its route template.
+
+    The template (``/api/quizzes/{quiz_id}/questions``) comes from the route
+    Starlette matched, so path parameters never become label values;
+    requests that match no route are counted as ``unmatched``.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: 'Metrics'):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight -= 1
+            _request_queries.reset(token)
+            self.metrics.observe_request(scope['method'], route_template(scope), status, elapsed, queries[0])
+            if startup_times.first_request is None:
+                startup_times.request_served()
+
+metrics = Metrics()
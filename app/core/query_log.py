@@ -0,0 +1,142 @@
+from typing import Any, Dict, List, Optional
+from app.core.config import get_settings
+from functools import lru_cache
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# IN lists built by in_params (or with ?) vary in length per call; they
+# are folded so every length counts as the same statement
+_IN_LIST = re.compile(r'(\bIN\s*\()\s*(?:\?|:\w+)(?:\s*,\s*(?:\?|:\w+))*\s*\)', re.IGNORECASE)
+
+# Parameters shown per statement before the shape is cut short
+_SHAPE_ITEMS = 8
+
+# INSERT ... VALUES has an empty query plan, so there is nothing to capture
+_NO_PLAN = re.compile(r'^(?:INSERT|REPLACE)\b(?!.*\bSELECT\b)', re.IGNORECASE)
+
+@lru_cache(maxsize=2048)
+def normalize(query: str) -> str:
+    """One-line statement text with IN lists folded to ``IN (...)``"""
+    return _IN_LIST.sub(r'\1...)', ' '.join(query.split()))
+
+def params_shape(values: Any) -> str:
+    """Parameter names and types without their values, e.g. ``{email: str}``"""
+    if values is None:
+        return '{}'
+    if isinstance(values, dict):
+        items = [f'{name}: {type(value).__name__}' for name, value in values.items()]
+        opening, closing = '{', '}'
+    else:
+        items = [type(value).__name__ for value in values]
+        opening, closing = '(', ')'
+    if len(items) > _SHAPE_ITEMS:
+        items = items[:_SHAPE_ITEMS] + [f'... {len(items) - _SHAPE_ITEMS} more']
+    return opening + ', '.join(items) + closing
+
+class StatementStats:
+    __slots__ = ('statement', 'calls', 'total', 'max', 'slow_calls', 'params', 'plan')
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow_calls = 0
+        self.params = ''
+        self.plan: Optional[List[str]] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            'statement': self.statement,
+            'calls': self.calls,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'slow_calls': self.slow_calls,
+            'params': self.params,
+            'plan': self.plan
+        }
+
+class QueryLog:
+    """Per-statement timings, a slow-query log and captured query plans.
+
+    Statements are keyed by their normalized text. A statement slower than
+    ``threshold`` seconds is logged with the shape of its parameters (never
+    their values), and the first time that happens the caller is asked to
+    run EXPLAIN QUERY PLAN for it; the plan is kept with the statement's
+    totals. An executemany batch is slow when its time per row is over the
+    threshold. Updated from the event loop thread, like the metrics registry.
+    """
+
+    def __init__(self, threshold: float = 0.1, enabled: bool = True, max_statements: int = 1000):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.max_statements = max_statements
+        self.statements: Dict[str, StatementStats] = {}
+        self.dropped = 0
+
+    def record(self, query: str, values: Any, seconds: float, check_slow: bool = True, rows: int = 1) -> bool:
+        """Add one execution of ``rows`` parameter rows; True when it was slow and its plan is still missing"""
+        statement = normalize(query)
+        stats = self.statements.get(statement)
+        if stats is None:
+            if len(self.statements) >= self.max_statements:
+                self.dropped += 1
+                return False
+            stats = self.statements[statement] = StatementStats(statement)
+        stats.calls += 1
+        stats.total += seconds
+        if seconds > stats.max:
+            stats.max = seconds
+
+        if not check_slow or seconds < self.threshold * max(rows, 1):
+            return False
+        stats.slow_calls += 1
+        stats.params = params_shape(values)
+        if rows > 1:
+            logger.warning(
+                "Slow query (%.1f ms for %d rows): %s params=%s", seconds * 1000, rows, statement, stats.params
+            )
+        else:
+            logger.warning("Slow query (%.1f ms): %s params=%s", seconds * 1000, statement, stats.params)
+        if stats.plan is None and not _NO_PLAN.match(statement):
+            # Claimed now so concurrent slow calls don't explain it again
+            stats.plan = []
+            return True
+        return False
+
+    def add_plan(self, query: str, plan: List[str]):
+        stats = self.statements.get(normalize(query))
+        if stats is not None:
+            stats.plan = plan
+            logger.warning("Query plan for %s: %s", stats.statement, ' | '.join(plan))
+
+    def top(self, limit: int = 20, order: str = 'total') -> List[Dict]:
+        """The ``limit`` statements ranked by total time, max time, calls or slow calls"""
+        key = {
+            'total': lambda stats: stats.total,
+            'max': lambda stats: stats.max,
+            'calls': lambda stats: stats.calls,
+            'slow': lambda stats: stats.slow_calls
+        }[order]
+        ranked = sorted(self.statements.values(), key=key, reverse=True)
+        return [stats.as_dict() for stats in ranked[:limit]]
+
+    def reset(self):
+        """Forget every statement's totals and plan"""
+        self.statements = {}
+        self.dropped = 0
+
+    def stats(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'threshold_ms': self.threshold * 1000,
+            'statements': len(self.statements),
+            'max_statements': self.max_statements,
+            'dropped': self.dropped
+        }
+
+settings = get_settings()
+query_log = QueryLog(threshold=settings.SLOW_QUERY_MS / 1000, enabled=settings.SLOW_QUERY_LOG_ENABLED)
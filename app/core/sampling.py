@@ -0,0 +1,170 @@
+import random
+from array import array
+from bisect import bisect_right
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+def sample_indexes(n: int, k: int, rng: random.Random) -> List[int]:
+    """Pick k distinct indexes from range(n) in O(k) (Floyd's algorithm)"""
+    if k >= n:
+        chosen = list(range(n))
+    else:
+        picked = set()
+        chosen = []
+        for j in range(n - k, n):
+            t = rng.randrange(j + 1)
+            if t in picked:
+                t = j
+            picked.add(t)
+            chosen.append(t)
+    rng.shuffle(chosen)
+    return chosen
+
+class CategorySampler:
+    """Per-category arrays of quiz ids used to draw random category samples.
+
+    The arrays are loaded lazily from ``(id, category)`` rows and dropped by
+    ``invalidate()`` whenever a quiz is created or deleted. Sampling never
+    touches the database; callers fetch the chosen rows in one query.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, array] = {}
+        self._loaded = False
+        self.version = 0
+
+    @property
+    def needs_refresh(self) -> bool:
+        return not self._loaded
+
+    def invalidate(self):
+        """Drop the id arrays so the next sample reloads them"""
+        self._ids = {}
+        self._loaded = False
+        self.version += 1
+
+    def load(self, rows: Iterable[Tuple[int, str]], version: Optional[int] = None):
+        """Rebuild the id arrays from (id, category) rows.
+
+        ``version`` is the value of ``self.version`` read before the rows were
+        queried; if a write invalidated the sampler in the meantime the rows
+        are used once but the next sample reloads them.
+        """
+        ids: Dict[str, array] = {}
+        for quiz_id, category in rows:
+            ids.setdefault(category, array('q')).append(quiz_id)
+        self._ids = ids
+        self._loaded = version is None or version == self.version
+
+    def categories(self) -> List[str]:
+        return sorted(self._ids)
+
+    def sample(self, limit: int, seed: Optional[int] = None) -> Dict[str, List[int]]:
+        """Return up to ``limit`` random quiz ids per category.
+
+        A negative limit returns every quiz, matching ``LIMIT -1`` in SQLite.
+        The same seed gives the same sample until the catalog changes.
+        """
+        rng = random.Random(seed) if seed is not None else random.Random()
+        samples = {}
+        for category in self.categories():
+            ids = self._ids[category]
+            k = len(ids) if limit < 0 else limit
+            samples[category] = [ids[i] for i in sample_indexes(len(ids), k, rng)]
+        return samples
+
+category_sampler = CategorySampler()
+
+def permuted_indexes(n: int, rng: random.Random) -> Iterator[int]:
+    """Yield range(n) in random order, one index per step.
+
+    Fisher-Yates with the swapped slots kept in a dict, so taking the
+    first k indexes costs O(k) time and memory however large n is.
+    """
+    swaps: Dict[int, int] = {}
+    for i in range(n):
+        j = rng.randrange(i, n)
+        yield swaps.get(j, j)
+        swaps[j] = swaps.get(i, i)
+
+class QuestionSampler:
+    """Question id arrays per (category, difficulty) used to draw random question sets.
+
+    Loaded lazily and dropped by ``invalidate()`` whenever questions
+    change, like CategorySampler. Draws walk a lazy random permutation of
+    the matching ids and skip excluded ones, so a draw costs O(k) while
+    most of the matching questions are still available.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str], array] = {}
+        self._loaded = False
+        self.version = 0
+
+    @property
+    def needs_refresh(self) -> bool:
+        return not self._loaded
+
+    def invalidate(self):
+        """Drop the id arrays so the next sample reloads them"""
+        self._ids = {}
+        self._loaded = False
+        self.version += 1
+
+    def load(self, buckets: Iterable[Tuple[str, str, Sequence[int]]], version: Optional[int] = None):
+        """Replace the id arrays with (category, difficulty, ids) buckets.
+
+        ``version`` works as in ``CategorySampler.load``.
+        """
+        self._ids = {(category, difficulty): array('q', ids) for category, difficulty, ids in buckets}
+        self._loaded = version is None or version == self.version
+
+    def keys(self, category: Optional[str] = None, difficulty: Optional[str] = None) -> List[Tuple[str, str]]:
+        """The (category, difficulty) arrays matching the filters; None matches any"""
+        return sorted(
+            key for key in self._ids
+            if (category is None or key[0] == category) and (difficulty is None or key[1] == difficulty)
+        )
+
+    def sample(
+        self,
+        k: int,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        exclude: Container[int] = (),
+        seed: Optional[int] = None
+    ) -> List[int]:
+        """Return up to k distinct random question ids matching the filters, none of them in ``exclude``.
+
+        The matching arrays are sampled as one sequence, so every matching
+        question is equally likely. The same seed gives the same sample
+        until the questions change.
+        """
+        rng = random.Random(seed) if seed is not None else random.Random()
+        arrays = [self._ids[key] for key in self.keys(category, difficulty)]
+        starts = []
+        n = 0
+        for ids in arrays:
+            starts.append(n)
+            n += len(ids)
+
+        sampled = []
+        if k <= 0:
+            return sampled
+        for position in permuted_indexes(n, rng):
+            bucket = bisect_right(starts, position) - 1
+            question_id = arrays[bucket][position - starts[bucket]]
+            if question_id not in exclude:
+                sampled.append(question_id)
+                if len(sampled) == k:
+                    break
+        return sampled
+
+    def stats(self) -> Dict:
+        return {
+            'loaded': self._loaded,
+            'version': self.version,
+            'buckets': len(self._ids),
+            'questions': sum(len(ids) for ids in self._ids.values())
+        }
+
+question_sampler = QuestionSampler()
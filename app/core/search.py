@@ -0,0 +1,106 @@
+import html
+import re
+from typing import Optional
+
+_WORD = re.compile(r"\w+\*?")
+
+# Words that occur in most questions. Their posting lists cover nearly the
+# whole index, so they are dropped from queries that have other words.
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for',
+    'from', 'how', 'in', 'is', 'it', 'of', 'on', 'or', 'that', 'the', 'this',
+    'to', 'was', 'what', 'when', 'where', 'which', 'who', 'why', 'with'
+))
+
+SEARCH_TYPES = ('questions', 'quizzes')
+
+# snippet() copies stored text as it is, so it marks matches with
+# private-use characters; highlight() escapes the text and then swaps them
+# for <mark> tags
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+# BM25 has to score every matching row before ORDER BY rank can stop, so
+# a word found in most of the catalog costs seconds at 1M questions. Only
+# the newest SEARCH_CANDIDATES matches (after filters) are ranked: the
+# subquery walks the doclist backwards from the highest rowid and stops,
+# and the lowest rowid it reaches becomes a rowid bound that FTS5 applies
+# while reading the index. Queries with fewer matches rank all of them;
+# the deepest page the route allows still falls inside the candidates.
+SEARCH_CANDIDATES = 1000
+
+# ORDER BY rank uses the bm25 column weights configured in the migration;
+# FTS5 scores are negative, lower is better
+SEARCH_QUERIES = {
+    'questions': """
+        SELECT
+            q.id, q.quiz_id, q.question_text, q.category, q.difficulty,
+            snippet(questions_fts, -1, char(57344), char(57345), '…', 16) AS snippet,
+            questions_fts.rank AS rank
+        FROM questions_fts
+        JOIN questions q ON q.id = questions_fts.rowid
+        WHERE questions_fts MATCH :query {filters}
+            AND questions_fts.rowid >= (
+                SELECT MIN(rowid) FROM (
+                    SELECT questions_fts.rowid
+                    FROM questions_fts
+                    JOIN questions q ON q.id = questions_fts.rowid
+                    WHERE questions_fts MATCH :query {filters}
+                    ORDER BY questions_fts.rowid DESC
+                    LIMIT :candidates
+                )
+            )
+        ORDER BY questions_fts.rank
+        LIMIT :limit OFFSET :offset
+    """,
+    'quizzes': """
+        SELECT
+            q.id, q.name, q.description, q.category, q.difficulty,
+            snippet(quiz_fts, -1, char(57344), char(57345), '…', 16) AS snippet,
+            quiz_fts.rank AS rank
+        FROM quiz_fts
+        JOIN quiz q ON q.id = quiz_fts.rowid
+        WHERE quiz_fts MATCH :query {filters}
+            AND quiz_fts.rowid >= (
+                SELECT MIN(rowid) FROM (
+                    SELECT quiz_fts.rowid
+                    FROM quiz_fts
+                    JOIN quiz q ON q.id = quiz_fts.rowid
+                    WHERE quiz_fts MATCH :query {filters}
+                    ORDER BY quiz_fts.rowid DESC
+                    LIMIT :candidates
+                )
+            )
+        ORDER BY quiz_fts.rank
+        LIMIT :limit OFFSET :offset
+    """,
+}
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """HTML for a snippet: the stored text escaped, with matches wrapped in <mark>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+def build_match_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression, or None if it has no words.
+
+    Every word must match, apart from stopwords when there are other words.
+    Words are quoted so FTS5 operators in the input are taken literally; a
+    trailing ``*`` makes a word of two or more letters a prefix, and with
+    ``prefix`` the last word typed always is one (search as you type).
+    """
+    words = _WORD.findall(text)
+    last = len(words) - 1
+    kept = [
+        position for position, word in enumerate(words)
+        if word.rstrip('*').lower() not in STOPWORDS
+    ] or range(len(words))
+
+    terms = []
+    for position in kept:
+        word = words[position]
+        # A one-letter prefix would expand to most of the vocabulary
+        is_prefix = len(word.rstrip('*')) > 1 and (word.endswith('*') or (prefix and position == last))
+        terms.append(f'"{word.rstrip("*")}"' + ('*' if is_prefix else ''))
+    return ' '.join(terms) or None
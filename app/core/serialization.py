@@ -0,0 +1,80 @@
+from fastapi.responses import JSONResponse
+from typing import Any, Iterable, Sequence
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, encoded with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes with ``dumps`` and sends bytes as they are.
+
+    Not the app's default response class: FastAPI already serializes
+    ``response_model`` routes straight to bytes with pydantic, and a custom
+    default class would switch that off.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+def splice_member(encoded: bytes, name: str, value: bytes) -> bytes:
+    """Append ``"name": value`` to an encoded JSON object without re-encoding it"""
+    separator = b'' if encoded == b'{}' else b','
+    return encoded[:-1] + separator + dumps(name) + b':' + value + b'}'
+
+# Raw values are encoded as this placeholder and swapped in afterwards,
+# so the whole array is encoded in a single dumps call
+_PLACEHOLDER = '\x00'
+_ENCODED_PLACEHOLDER = b'"\\u0000"'
+
+def encode_records(records: Sequence, raw_columns: Iterable[str] = ()) -> bytes:
+    """Encode model row dicts as a JSON array of objects.
+
+    Columns in ``raw_columns`` already hold JSON text (like ``choices``)
+    and are copied into the output as they are instead of being decoded
+    and encoded again, so they must be valid JSON (migration 8 makes the
+    database enforce that for ``questions.choices``).
+    """
+    if not records:
+        return b'[]'
+
+    raw_columns = set(raw_columns)
+    raw = [name for name in records[0] if name in raw_columns]
+    # Copied only when raw columns are swapped out below
+    rows = [dict(record) for record in records] if raw else records
+
+    raw_values = []
+    for row in rows:
+        for name in raw:
+            value = row[name]
+            raw_values.append(value.encode() if value else b'null')
+            row[name] = _PLACEHOLDER
+
+    parts = dumps(rows).split(_ENCODED_PLACEHOLDER)
+    if len(parts) != len(raw_values) + 1:
+        # Some other value is the placeholder itself; decode the raw
+        # columns and encode everything the slow way
+        values = iter(raw_values)
+        for row in rows:
+            for name in raw:
+                row[name] = json.loads(next(values))
+        return dumps(rows)
+
+    spliced = [parts[0]]
+    for value, part in zip(raw_values, parts[1:]):
+        spliced.append(value)
+        spliced.append(part)
+    return b''.join(spliced)
+
+def encode_record(record, raw_columns: Iterable[str] = ()) -> bytes:
+    """Encode a single model row dict as a JSON object"""
+    return encode_records([record], raw_columns)[1:-1]
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import time
+
+class StartupTimes:
+    """How long this worker took to come up, for /metrics and bench_startup.py.
+
+    Times are seconds since this module was imported, which run.py does
+    before anything else, so ``imported`` is the cost of importing the app.
+    Lifecycle hooks time their steps with ``phase()``; MetricsMiddleware
+    reports the first response sent.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imported: Optional[float] = None
+        self.ready: Optional[float] = None
+        self.first_request: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark_imported(self):
+        if self.imported is None:
+            self.imported = self._elapsed()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time one startup step; a step run again on restart keeps its first time"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.setdefault(name, time.perf_counter() - started)
+
+    def mark_ready(self):
+        if self.ready is None:
+            self.ready = self._elapsed()
+
+    def request_served(self):
+        if self.first_request is None:
+            self.first_request = self._elapsed()
+
+    def stats(self) -> Dict:
+        return {
+            'imported': self.imported,
+            'ready': self.ready,
+            'first_request': self.first_request,
+            'phases': dict(self.phases)
+        }
+
+startup_times = StartupTimes()
@@ -0,0 +1,160 @@
+from typing import Dict, Iterable, Optional, Tuple
+from app.models.session import catalog_hooks, quiz_hooks
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 'catalog' and 'quiz' are bumped by the triggers from migration 9;
+# 'token' is random per database (migration 10)
+SELECT_VERSIONS = "SELECT name, version FROM cache_versions WHERE name IN ('catalog', 'quiz', 'token')"
+SELECT_CHANGED_QUIZZES = "SELECT quiz_id, version FROM quiz_versions WHERE version > ?"
+SELECT_QUIZ_VERSION = "SELECT version FROM quiz_versions WHERE quiz_id = ?"
+
+class VersionWatcher:
+    """Runs the cache hooks for catalog writes committed by other processes.
+
+    Writes made through this process run the hooks themselves once they
+    commit. Other API workers, the Flask app and the CLIs write to the same
+    file, and the triggers from migration 9 count their changes in
+    ``cache_versions`` and ``quiz_versions``. Every ``interval`` seconds
+    the watcher reads ``PRAGMA data_version`` on the pool's writer
+    connection, which only changes when another connection commits. When
+    it has changed, the version rows are read on a pooled reader and the
+    catalog hooks, and the quiz hooks of every quiz changed since the last
+    read, are run. Caches therefore lag another process's writes by at
+    most ``interval``.
+
+    The watcher also knows the latest shared version of the catalog and of
+    the quizzes it has been asked about (``quiz_version``). ETags are built
+    from those, so every worker gives the same tag for the same data. Local
+    writes report theirs with ``wrote()`` as they commit.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        # Last version rows read; kept across restarts in the same process
+        self.versions: Optional[Dict[str, int]] = None
+        # Latest known shared versions, including this process's own writes
+        self.catalog: Optional[int] = None
+        self.quizzes: Dict[int, int] = {}
+        self.checks = 0
+        self.refreshes = 0
+        self._data_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def token(self) -> Optional[int]:
+        return self.versions['token'] if self.versions else None
+
+    def quiz_version(self, quiz_id: int) -> Optional[int]:
+        """The quiz's shared version, or None if it hasn't been read yet"""
+        return self.quizzes.get(quiz_id)
+
+    def _saw_quiz(self, quiz_id: int, version: int):
+        # Versions only grow, so an older read never replaces a newer one
+        if version > self.quizzes.get(quiz_id, -1):
+            self.quizzes[quiz_id] = version
+
+    async def load_quiz(self, db, quiz_id: int) -> int:
+        """Read the quiz's shared version on a pooled connection"""
+        rows = await db.raw_connection.execute_fetchall(SELECT_QUIZ_VERSION, (quiz_id,))
+        self._saw_quiz(quiz_id, rows[0][0] if rows else 0)
+        return self.quizzes[quiz_id]
+
+    async def read_written(self, db, quiz_ids: Iterable[int]) -> Tuple[Dict[str, int], Dict[int, int]]:
+        """The version rows and the versions of ``quiz_ids``, read by a write on its own connection"""
+        versions = dict(await db.raw_connection.execute_fetchall(SELECT_VERSIONS))
+        quizzes = {}
+        for quiz_id in quiz_ids:
+            rows = await db.raw_connection.execute_fetchall(SELECT_QUIZ_VERSION, (quiz_id,))
+            quizzes[quiz_id] = rows[0][0] if rows else 0
+        return versions, quizzes
+
+    def wrote(self, versions: Dict[str, int], quizzes: Dict[int, int]):
+        """Take the versions a committed local write left behind (see ``read_written``)"""
+        if self.catalog is None or versions['catalog'] > self.catalog:
+            self.catalog = versions['catalog']
+        for quiz_id, version in quizzes.items():
+            self._saw_quiz(quiz_id, version)
+
+    async def refresh(self, pool):
+        """Read the version rows and run the hooks for whatever changed since the last read"""
+        async with pool.reader() as db:
+            versions = dict(await db.raw_connection.execute_fetchall(SELECT_VERSIONS))
+            changed_quizzes = []
+            if self.versions is not None and versions['quiz'] != self.versions['quiz']:
+                changed_quizzes = await db.raw_connection.execute_fetchall(
+                    SELECT_CHANGED_QUIZZES, (self.versions['quiz'],)
+                )
+
+        previous, self.versions = self.versions, versions
+        self.refreshes += 1
+        if previous is not None and versions['token'] != previous['token']:
+            # Another database file: nothing known about the old one holds
+            previous = None
+            self.catalog = None
+            self.quizzes = {}
+        if self.catalog is None or versions['catalog'] > self.catalog:
+            self.catalog = versions['catalog']
+        for quiz_id, version in changed_quizzes:
+            if quiz_id in self.quizzes:
+                self._saw_quiz(quiz_id, version)
+
+        if previous is None:
+            return
+        if versions['catalog'] != previous['catalog']:
+            for hook in catalog_hooks:
+                hook()
+        for quiz_id, _ in changed_quizzes:
+            for hook in quiz_hooks:
+                hook(quiz_id)
+
+    async def check(self, pool):
+        """Refresh if another connection has committed since the last check"""
+        self.checks += 1
+        data_version = await pool.data_version()
+        if data_version != self._data_version:
+            # Taken first, so a commit made during the refresh is seen next time
+            self._data_version = data_version
+            await self.refresh(pool)
+
+    async def _run(self, pool):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check(pool)
+            except Exception:
+                logger.exception("Checking the shared cache versions failed")
+
+    async def start(self, pool):
+        """Catch up with writes made while stopped, then check every ``interval`` seconds"""
+        if self.is_running:
+            return
+        self._data_version = await pool.data_version()
+        await self.refresh(pool)
+        if self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(pool))
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            'interval': self.interval,
+            'versions': self.versions,
+            'quizzes': len(self.quizzes),
+            'checks': self.checks,
+            'refreshes': self.refreshes
+        }
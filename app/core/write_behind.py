@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Marks the end of the queue when the writer is stopped
+_STOP = object()
+
+class QueueFull(Exception):
+    """Raised when an item cannot be queued before the enqueue timeout"""
+
+class WriteBehindQueue:
+    """Bounded asyncio queue that writes items in grouped transactions.
+
+    A single background task takes items off the queue and hands them to
+    ``write_batch``. An item that finds the queue empty behind it is
+    written at once; while more keep arriving they are gathered until
+    ``batch_size`` items are waiting or ``interval`` seconds have passed
+    since the first one. ``write_batch`` gets
+    the list of items and returns one result (or exception) per item; the
+    result is delivered to the caller of ``submit``. A full queue makes
+    ``submit`` wait up to ``enqueue_timeout`` seconds, then raise QueueFull.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int = 10000,
+        batch_size: int = 500,
+        interval: float = 0.01,
+        enqueue_timeout: float = 1.0
+    ):
+        self.write_batch = write_batch
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.max_depth = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self.flush_time_last = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        """Start the background writer task"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then stop the writer task"""
+        if not self.is_running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, item: Any, wait: bool = True) -> Any:
+        """Queue an item; with ``wait`` return its result once it is committed"""
+        if not self.is_running:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((item, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QueueFull(f"Write queue is full ({self.max_size} items)")
+
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        if not wait:
+            return None
+        return await future
+
+    async def _next_batch(self) -> Tuple[List[Tuple[Any, asyncio.Future]], bool]:
+        """Wait for one item, then gather more while they keep arriving, until the batch is full or due"""
+        entry = await self._queue.get()
+        if entry is _STOP:
+            return [], True
+
+        batch = [entry]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.interval
+        while len(batch) < self.batch_size:
+            try:
+                if self._queue.empty():
+                    # A lone item isn't held back waiting for company
+                    if len(batch) == 1:
+                        break
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    entry = self._queue.get_nowait()
+            except asyncio.TimeoutError:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]):
+        started = time.perf_counter()
+        try:
+            results = await self.write_batch([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(result)
+            else:
+                self.written += 1
+                if not future.done():
+                    future.set_result(result)
+
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.flush_time_total += elapsed
+        self.flush_time_max = max(self.flush_time_max, elapsed)
+        self.flush_time_last = elapsed
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+        # Drain anything that was queued behind the stop marker
+        while not self._queue.empty():
+            batch = []
+            while not self._queue.empty() and len(batch) < self.batch_size:
+                entry = self._queue.get_nowait()
+                if entry is not _STOP:
+                    batch.append(entry)
+            if batch:
+                await self._flush(batch)
+
+    def stats(self) -> Dict:
+        """Snapshot of queue depth, throughput and flush latency"""
+        return {
+            'running': self.is_running,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'max_size': self.max_size,
+            'batch_size': self.batch_size,
+            'interval': self.interval,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'flushes': self.flushes,
+            'avg_batch_size': (self.written + self.failed) / self.flushes if self.flushes else 0.0,
+            'flush_time_total': self.flush_time_total,
+            'flush_time_max': self.flush_time_max,
+            'flush_time_last': self.flush_time_last,
+            'flush_time_avg': self.flush_time_total / self.flushes if self.flushes else 0.0
+        }
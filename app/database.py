@@ -1,62 +1,482 @@
+import asyncio
+import os
 import sqlite3
+import time
+from contextlib import asynccontextmanager
 from databases import Database
-from sqlalchemy import create_engine, MetaData
-from fastapi import Depends
-from typing import AsyncGenerator
+from databases.core import Connection
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.cache import version_watcher
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.core.query_log import query_log
+from app.migrations import migrate
+from app.models.session import Session
+
+settings = get_settings()
 
 # Database URL
-DATABASE_URL = "sqlite:///trivia.db"
+DATABASE_URL = settings.DATABASE_URL
 
-# Create Database instance for async operations
+# Create Database instance for async operations; nothing connects until
+# the startup hook opens the pool
 database = Database(DATABASE_URL)
-metadata = MetaData()
 
-# Create SQLAlchemy engine for migrations/table creation
-engine = create_engine(DATABASE_URL)
-metadata.create_all(engine)
+# Queries are timed for /metrics and for the slow-query log
+INSTRUMENTED = settings.METRICS_ENABLED or settings.SLOW_QUERY_LOG_ENABLED
+
+def _observe(query, values, seconds: float, check_slow: bool = True, rows: int = 1) -> bool:
+    """Record one statement run for ``rows`` parameter rows; True when its query plan should be captured"""
+    if settings.METRICS_ENABLED:
+        metrics.observe_query(query, seconds)
+    if query_log.enabled and isinstance(query, str):
+        return query_log.record(query, values, seconds, check_slow, rows)
+    return False
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that times its statements like InstrumentedConnection"""
+
+    def _finish(self, sql: str, parameters, started: float, rows: int = 1):
+        if _observe(sql, parameters, time.perf_counter() - started, rows=rows):
+            try:
+                # A plain cursor, so the EXPLAIN itself is not recorded
+                cursor = sqlite3.Connection.cursor(self.connection)
+                plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+            except sqlite3.Error as e:
+                plan = [f"EXPLAIN QUERY PLAN failed: {e}"]
+            query_log.add_plan(sql, plan)
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._finish(sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._finish(sql, seq_of_parameters[0] if seq_of_parameters else (), started, len(seq_of_parameters))
+
+class InstrumentedSqliteConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors, and execute shortcuts, are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
 
 # Legacy synchronous connection function
 def get_db_connection():
     """Create a database connection with row factory enabled"""
-    conn = sqlite3.connect('trivia.db')
+    conn = sqlite3.connect(
+        settings.database_path, factory=InstrumentedSqliteConnection if INSTRUMENTED else sqlite3.Connection
+    )
     conn.row_factory = sqlite3.Row
     return conn
 
-# New async database functions
-async def get_database() -> AsyncGenerator[Database, None]:
-    """Dependency for getting async database session"""
-    try:
-        await database.connect()
-        yield database
-    finally:
-        await database.disconnect()
+def in_params(prefix: str, values) -> Tuple[str, Dict]:
+    """Build named placeholders for an IN list, e.g. (':id0, :id1', {'id0': 4, 'id1': 7})"""
+    params = {f"{prefix}{i}": value for i, value in enumerate(values)}
+    return ", ".join(f":{name}" for name in params), params
+
+class InstrumentedConnection(Connection):
+    """Connection that times every query for the metrics registry and the slow-query log"""
+
+    async def _finish(self, query, values, started: float, check_slow: bool = True, rows: int = 1):
+        if _observe(query, values, time.perf_counter() - started, check_slow, rows):
+            try:
+                # Connection's own fetch_all, so the EXPLAIN itself is not recorded
+                rows = await Connection.fetch_all(self, f"EXPLAIN QUERY PLAN {query}", values)
+                plan = [row[3] for row in rows]
+            except Exception as e:
+                plan = [f"EXPLAIN QUERY PLAN failed: {e}"]
+            query_log.add_plan(query, plan)
+
+    async def fetch_all(self, query, values=None):
+        started = time.perf_counter()
+        try:
+            return await super().fetch_all(query, values)
+        finally:
+            await self._finish(query, values, started)
+
+    async def fetch_one(self, query, values=None):
+        started = time.perf_counter()
+        try:
+            return await super().fetch_one(query, values)
+        finally:
+            await self._finish(query, values, started)
+
+    async def fetch_val(self, query, values=None, column=0):
+        started = time.perf_counter()
+        try:
+            return await super().fetch_val(query, values, column)
+        finally:
+            await self._finish(query, values, started)
+
+    async def execute(self, query, values=None):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, values)
+        finally:
+            await self._finish(query, values, started)
+
+    async def execute_many(self, query, values):
+        started = time.perf_counter()
+        try:
+            return await super().execute_many(query, values)
+        finally:
+            await self._finish(query, values[0] if values else None, started, rows=len(values))
+
+    async def iterate(self, query, values=None):
+        # Measures the whole iteration, including time spent by the consumer,
+        # so it is kept out of the slow-query log
+        started = time.perf_counter()
+        try:
+            async for record in super().iterate(query, values):
+                yield record
+        finally:
+            await self._finish(query, values, started, check_slow=False)
+
+class AsyncExecutor:
+    """Runs model statements straight on a pooled connection's aiosqlite connection.
+
+    Skips the SQLAlchemy compile ``databases`` does on every call, and a
+    fetch is a single hop to the connection's thread. Statements are still
+    timed for /metrics and the slow-query log.
+    """
+
+    def __init__(self, connection: Connection):
+        self.raw = connection.raw_connection
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.raw.in_transaction
+
+    async def _finish(self, query: str, values, started: float, rows: int = 1):
+        if _observe(query, values, time.perf_counter() - started, rows=rows):
+            try:
+                plan = [row[3] for row in await self.raw.execute_fetchall(f"EXPLAIN QUERY PLAN {query}", values)]
+            except Exception as e:
+                plan = [f"EXPLAIN QUERY PLAN failed: {e}"]
+            query_log.add_plan(query, plan)
+
+    async def fetch_all(self, query: str, values=()) -> List[Tuple]:
+        started = time.perf_counter()
+        try:
+            return await self.raw.execute_fetchall(query, values)
+        finally:
+            await self._finish(query, values, started)
+
+    async def execute(self, query: str, values=()) -> Tuple[int, int]:
+        """Run one statement; returns ``(lastrowid, rowcount)``"""
+        started = time.perf_counter()
+        try:
+            async with self.raw.execute(query, values) as cursor:
+                return cursor.lastrowid, cursor.rowcount
+        finally:
+            await self._finish(query, values, started)
+
+    async def executemany(self, query: str, rows):
+        started = time.perf_counter()
+        try:
+            async with self.raw.executemany(query, rows):
+                pass
+        finally:
+            await self._finish(query, rows[0] if rows else (), started, len(rows))
+
+# A write unit gets the writer connection and returns the write's result
+WriteUnit = Callable[[Connection], Awaitable[Any]]
+
+def _connection_pragmas() -> List[str]:
+    return [
+        f"PRAGMA busy_timeout = {settings.DB_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size = {settings.DB_MMAP_SIZE}",
+        # Negative sizes are in KiB
+        f"PRAGMA cache_size = -{settings.DB_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+
+# WAL lets readers run while the writer commits; NORMAL sync is durable
+# across application crashes in WAL mode and skips an fsync per commit
+WRITER_PRAGMAS = ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+READER_PRAGMAS = ["PRAGMA query_only = ON"]
+
+class ConnectionPool:
+    """Application-lifetime pool of open SQLite connections.
+
+    The pool keeps ``readers`` query-only connections plus a single writer
+    connection, all opened once in WAL mode. Requests check a reader out
+    for their lifetime and hand it back afterwards, so no request pays for
+    opening or closing SQLite.
+
+    The writer connection belongs to one writer task. Writes are submitted
+    to it as units (``write``) and run one at a time, in the order they
+    were submitted, each in its own transaction; SQLite itself never sees
+    two writers, so "database is locked" cannot happen inside the app.
+    Every statement runs on aiosqlite's connection threads, so neither
+    reads nor writes block the event loop.
+    """
+
+    def __init__(self, db: Database, readers: int = 4, instrumented: bool = False):
+        self.database = db
+        self.readers = readers
+        self.connection_class = InstrumentedConnection if instrumented else Connection
+        self._idle: Optional[asyncio.Queue] = None
+        self._connections = []
+        self._writer: Optional[Connection] = None
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+        self.checkouts = 0
+        self.in_flight = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.writes = 0
+        self.write_time_total = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, pragmas: List[str]) -> Connection:
+        connection = self.connection_class(self.database, self.database._backend)
+        await connection.__aenter__()
+        # Straight on the aiosqlite connection, so setup isn't timed as queries
+        for pragma in pragmas:
+            async with connection.raw_connection.execute(pragma):
+                pass
+        return connection
+
+    async def _open_connection(self, pragmas: List[str]) -> Connection:
+        connection = await self._connect(pragmas)
+        self._connections.append(connection)
+        return connection
+
+    async def open(self):
+        """Connect the database, open every pooled connection and start the writer task"""
+        if self.is_open:
+            return
+
+        await self.database.connect()
+        # The writer goes first: switching to WAL needs no other connection open
+        writer = await self._open_connection(_connection_pragmas() + WRITER_PRAGMAS)
+        self._idle = asyncio.Queue()
+        for _ in range(self.readers):
+            self._idle.put_nowait(await self._open_connection(_connection_pragmas() + READER_PRAGMAS))
+        self._writes = asyncio.Queue()
+        self._writer = writer
+        self._writer_task = asyncio.create_task(self._run_writes())
+
+    async def close(self):
+        """Finish queued writes, then close every pooled connection and disconnect"""
+        if not self.is_open:
+            return
+
+        self._writes.put_nowait(None)
+        await self._writer_task
+        for connection in self._connections:
+            await connection.__aexit__()
+        self._connections = []
+        self._idle = None
+        self._writer = None
+        self._writes = None
+        self._writer_task = None
+        await self.database.disconnect()
+
+    def _record_wait(self, started: float):
+        waited = time.perf_counter() - started
+        self.checkouts += 1
+        self.in_flight += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    async def _run_writes(self):
+        """The writer task: run submitted units one at a time until close()"""
+        while True:
+            item = await self._writes.get()
+            if item is None:
+                return
+            unit, transaction, future, submitted = item
+            if future.cancelled():
+                # The caller gave up before its turn came
+                continue
+
+            self._record_wait(submitted)
+            started = time.perf_counter()
+            try:
+                if transaction:
+                    async with self._writer.transaction():
+                        result = await unit(self._writer)
+                else:
+                    result = await unit(self._writer)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.in_flight -= 1
+                self.writes += 1
+                self.write_time_total += time.perf_counter() - started
+
+    def _submit(self, unit: WriteUnit, transaction: bool) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((unit, transaction, future, time.perf_counter()))
+        return future
+
+    async def write(self, unit: WriteUnit, transaction: bool = True) -> Any:
+        """Run ``unit(connection)`` on the writer task and return its result.
+
+        Units run after every unit submitted before them. With
+        ``transaction`` the unit is one transaction that rolls back if it
+        raises; pass False for units that manage their own transactions.
+        A unit that has started runs to the end even if the caller is
+        cancelled. Units must not submit writes themselves.
+        """
+        if not self.is_open:
+            await self.open()
+        return await self._submit(unit, transaction)
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[Connection]:
+        """Check out a reader connection for the duration of the block"""
+        if not self.is_open:
+            await self.open()
+
+        started = time.perf_counter()
+        connection = await self._idle.get()
+        self._record_wait(started)
+        try:
+            yield connection
+        finally:
+            self.in_flight -= 1
+            self._idle.put_nowait(connection)
+
+    @asynccontextmanager
+    async def dedicated_reader(self) -> AsyncIterator[Connection]:
+        """Open a query-only connection of its own for the duration of the block.
+
+        For long reads such as exports and cache warming: they would hold
+        a pooled reader (or the writer) for as long as they run. The
+        connection sees one WAL snapshot per statement and is closed after
+        the block; it is not counted in ``stats``.
+        """
+        if not self.is_open:
+            await self.open()
+
+        connection = await self._connect(_connection_pragmas() + READER_PRAGMAS)
+        try:
+            yield connection
+        finally:
+            await connection.__aexit__()
+
+    async def data_version(self) -> int:
+        """The writer connection's ``PRAGMA data_version``.
+
+        It changes only when another connection, in this process or not,
+        commits; the app's own writes all go through the writer, so they
+        leave it alone. Read outside the write queue: it is one pragma.
+        """
+        if not self.is_open:
+            await self.open()
+        async with self._writer.raw_connection.execute("PRAGMA data_version") as cursor:
+            return (await cursor.fetchone())[0]
+
+    def stats(self) -> Dict:
+        """Snapshot of pool size, checkouts, wait times and the write queue"""
+        return {
+            'size': self.readers + 1,
+            'readers': self.readers,
+            'writers': 1,
+            'idle_readers': self._idle.qsize() if self._idle else 0,
+            'checkouts': self.checkouts,
+            'in_flight': self.in_flight,
+            'wait_time_total': self.wait_time_total,
+            'wait_time_max': self.wait_time_max,
+            'wait_time_avg': self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+            'write_queue_depth': self._writes.qsize() if self._writes else 0,
+            'writes': self.writes,
+            'write_time_total': self.write_time_total
+        }
+
+pool = ConnectionPool(database, readers=settings.DB_POOL_READERS, instrumented=INSTRUMENTED)
+
+# FastAPI dependencies
+async def get_db() -> AsyncGenerator[Connection, None]:
+    """Check out a pooled reader connection for the request"""
+    async with pool.reader() as connection:
+        yield connection
+
+def session_for(connection: Connection, session: Optional[Session] = None) -> Session:
+    """A model Session running on a pooled connection"""
+    return (session or Session()).bind(AsyncExecutor(connection))
+
+async def get_session() -> AsyncGenerator[Session, None]:
+    """Model Session over a pooled reader connection for the request"""
+    async with pool.reader() as connection:
+        yield session_for(connection)
+
+async def session_write(unit: Callable[[Session], Awaitable[Any]], transaction: bool = True, session: Optional[Session] = None) -> Any:
+    """Run ``unit(session)`` as a pool write, then publish the session's cache invalidations.
+
+    Pass ``session`` to keep one identity map across several writes. A
+    write that changed the catalog or a quiz also reads the shared versions
+    it left behind, so the ETags served next match other workers'.
+    """
+    session = session or Session()
+    written = None
+
+    async def run(connection: Connection) -> Any:
+        nonlocal written
+        result = await unit(session_for(connection, session))
+        catalog_changed, changed_quizzes = session.pending()
+        if catalog_changed or changed_quizzes:
+            written = await version_watcher.read_written(connection, changed_quizzes)
+        return result
 
-# FastAPI dependency
-async def get_db() -> AsyncGenerator[Database, None]:
-    """Async database connection dependency"""
     try:
-        await database.connect()
-        yield database
+        result = await pool.write(run, transaction)
+    except Exception:
+        # A unit that manages its own transactions may have committed part
+        # of its work; read back what the database holds now
+        if any(session.pending()):
+            await version_watcher.refresh(pool)
+        raise
+    else:
+        if written is not None:
+            version_watcher.wrote(*written)
+        return result
     finally:
-        await database.disconnect()
+        session.publish()
+
+# Kept for callers that still use the old dependency name
+get_database = get_db
+
+# Databases already initialized by this process, by absolute path
+_initialized = set()
 
 def init_db():
-    """Initialize the database with required tables and sample data"""
-    conn = sqlite3.connect('trivia.db')
-    cursor = conn.cursor()
+    """Migrate the database and add sample data if it is empty.
 
-    # Create quiz table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS quiz (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        description TEXT NOT NULL,
-        image TEXT NOT NULL,
-        category TEXT NOT NULL,
-        difficulty TEXT NOT NULL,
-        created_at TEXT NOT NULL
-    )
-    ''')
+    Called by the startup hook rather than at import. Runs once per
+    database file per process, so restarting the app in-process is cheap.
+    """
+    path = os.path.abspath(settings.database_path)
+    if path in _initialized:
+        return
+
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    cursor = conn.cursor()
 
     # Add sample data if the table is empty
     cursor.execute("SELECT COUNT(*) FROM quiz")
@@ -74,6 +494,4 @@ def init_db():
 
     conn.commit()
     conn.close()
-
-# Initialize the database
-init_db()
\ No newline at end of file
+    _initialized.add(path)
@@ -0,0 +1,216 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import sqlite3
+import sys
+import zlib
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# One ordered pass over quizzes and their questions. Questions are read
+# through idx_questions_quiz_id, which already yields them in id order, so
+# SQLite streams the join without a sort.
+EXPORT_QUERY = """
+    SELECT
+        q.id AS quiz_id,
+        q.name AS quiz_name,
+        q.description AS quiz_description,
+        q.image AS quiz_image,
+        q.category AS quiz_category,
+        q.difficulty AS quiz_difficulty,
+        q.created_at AS quiz_created_at,
+        qs.id AS question_id,
+        qs.question_text,
+        qs.choices,
+        qs.correct_answer_index,
+        qs.explanation,
+        qs.category AS question_category,
+        qs.difficulty AS question_difficulty,
+        qs.image AS question_image
+    FROM quiz q
+    LEFT JOIN questions qs ON qs.quiz_id = q.id
+    ORDER BY q.id, qs.id
+"""
+
+EXPORT_COLUMNS = (
+    'quiz_id', 'quiz_name', 'quiz_description', 'quiz_image', 'quiz_category',
+    'quiz_difficulty', 'quiz_created_at', 'question_id', 'question_text', 'choices',
+    'correct_answer_index', 'explanation', 'question_category', 'question_difficulty',
+    'question_image'
+)
+
+FORMATS = ('ndjson', 'csv')
+
+# Encoded text is buffered up to this size before it is written or sent
+CHUNK_SIZE = 64 * 1024
+
+def _raw_choices(row: Mapping) -> str:
+    """The stored ``choices`` JSON text, or a JSON string of it when it doesn't parse"""
+    value = row['choices']
+    if not value:
+        return 'null'
+    try:
+        json.loads(value)
+    except ValueError:
+        # One bad row shouldn't abort the whole export
+        logger.warning("Question %s has malformed choices; exported as a string", row['question_id'])
+        return json.dumps(value)
+    return value
+
+class NDJSONEncoder:
+    """Encode export rows as NDJSON: a quiz record followed by its question records"""
+
+    def __init__(self):
+        self._quiz_id = None
+
+    def header(self) -> str:
+        return ''
+
+    def encode(self, row: Mapping) -> str:
+        text = ''
+        if row['quiz_id'] != self._quiz_id:
+            self._quiz_id = row['quiz_id']
+            text += json.dumps({
+                'type': 'quiz',
+                'id': row['quiz_id'],
+                'name': row['quiz_name'],
+                'description': row['quiz_description'],
+                'image': row['quiz_image'],
+                'category': row['quiz_category'],
+                'difficulty': row['quiz_difficulty'],
+                'created_at': row['quiz_created_at']
+            }) + '\n'
+
+        if row['question_id'] is not None:
+            question = json.dumps({
+                'type': 'question',
+                'id': row['question_id'],
+                'quiz_id': row['quiz_id'],
+                'question_text': row['question_text'],
+                'correct_answer_index': row['correct_answer_index'],
+                'explanation': row['explanation'],
+                'category': row['question_category'],
+                'difficulty': row['question_difficulty'],
+                'image': row['question_image']
+            })
+            # choices is already stored as JSON text; splice it in as-is
+            text += question[:-1] + ', "choices": ' + _raw_choices(row) + '}\n'
+
+        return text
+
+class CSVEncoder:
+    """Encode export rows as CSV, one row per question (or per empty quiz)"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _take(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self._writer.writerow(EXPORT_COLUMNS)
+        return self._take()
+
+    def encode(self, row: Mapping) -> str:
+        self._writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        return self._take()
+
+def make_encoder(export_format: str):
+    if export_format == 'csv':
+        return CSVEncoder()
+    return NDJSONEncoder()
+
+class Gzipper:
+    """Incremental gzip compressor for streamed output"""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(wbits=31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+class ExportStream:
+    """Turns export rows into byte chunks of roughly CHUNK_SIZE.
+
+    Rows are fed one at a time, so the caller decides how they are read
+    (a sqlite3 cursor, an async iterator) and memory holds at most one
+    chunk of encoded text.
+    """
+
+    def __init__(self, export_format: str = 'ndjson', gzip: bool = False):
+        self._encoder = make_encoder(export_format)
+        self._gzipper = Gzipper() if gzip else None
+        header = self._encoder.header()
+        self._pending = [header]
+        self._size = len(header)
+
+    def _drain(self) -> bytes:
+        data = ''.join(self._pending).encode()
+        self._pending = []
+        self._size = 0
+        return self._gzipper.compress(data) if self._gzipper else data
+
+    def feed(self, row: Mapping) -> bytes:
+        """Encode one row; returns a chunk once enough output has built up"""
+        text = self._encoder.encode(row)
+        self._pending.append(text)
+        self._size += len(text)
+        return self._drain() if self._size >= CHUNK_SIZE else b''
+
+    def close(self) -> bytes:
+        """Return whatever output is left, including the gzip trailer"""
+        data = self._drain()
+        if self._gzipper:
+            data += self._gzipper.flush()
+        return data
+
+def export_database(database: str, output, export_format: str = 'ndjson', gzip: bool = False) -> int:
+    """Write the full catalog from a SQLite file to a binary stream; returns bytes written"""
+    conn = sqlite3.connect(database)
+    conn.row_factory = sqlite3.Row
+    written = 0
+    try:
+        stream = ExportStream(export_format, gzip)
+        # Iterating the cursor steps the statement, so only one row is in memory
+        for row in conn.execute(EXPORT_QUERY):
+            chunk = stream.feed(row)
+            if chunk:
+                output.write(chunk)
+                written += len(chunk)
+        chunk = stream.close()
+        output.write(chunk)
+        written += len(chunk)
+    finally:
+        conn.close()
+    return written
+
+def main(argv: Optional[list] = None) -> int:
+    from app.core.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Export all quizzes and questions")
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--gzip', action='store_true', help="gzip the output")
+    parser.add_argument('--output', '-o', help="output file (default: stdout)")
+    parser.add_argument('--database', default=get_settings().database_path, help="default: DATABASE_URL's file")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, 'wb') as output:
+            export_database(args.database, output, args.format, args.gzip)
+    else:
+        export_database(args.database, sys.stdout.buffer, args.format, args.gzip)
+        sys.stdout.buffer.flush()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from app.migrations import migrate
+from app.stats import rebuild_user_stats
+
+# Categories in popularity order; picks follow a Zipf curve over this list
+CATEGORIES = [
+    'nutrition', 'history', 'science', 'sustainability', 'ethics', 'culture',
+    'cooking', 'geography', 'health', 'sports', 'music', 'technology'
+]
+DIFFICULTIES = ['easy', 'medium', 'hard']
+DIFFICULTY_WEIGHTS = [45, 40, 15]
+
+# Common words first; question text draws from them with Zipf weights, and
+# generated words make up the long tail so search sees rare terms too
+WORDS = (
+    'which food contains most protein vitamin fiber water sugar salt fat '
+    'energy calories diet plant meat fish fruit vegetable grain bean nut seed '
+    'oil acid iron calcium mineral health heart brain body muscle bone blood '
+    'climate farm soil crop harvest season history empire king war ancient '
+    'city river country island ocean mountain culture festival tradition dish '
+    'spice bread rice tea coffee milk cheese egg honey cocoa wheat corn potato'
+).split()
+TAIL_WORDS = 20000
+
+# Answer sets generated per quiz; results reuse them so 10M results don't
+# need 10M json.dumps calls
+ANSWER_VARIANTS = 16
+
+BATCH_SIZE = 50000
+START = datetime(2023, 1, 1)
+SPAN = timedelta(days=730)
+
+def zipf_cum_weights(count: int, exponent: float = 1.0) -> List[float]:
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+def tail_word(rank: int) -> str:
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    word = ''
+    rank += 1
+    while rank:
+        rank, digit = divmod(rank, 26)
+        word += letters[digit]
+    return word + 'ite'
+
+class Timestamps:
+    """Format 'YYYY-MM-DD HH:MM:SS' for seconds since START.
+
+    Rows are generated in time order, so remembering the last minute means
+    one strftime per minute instead of one per row.
+    """
+
+    def __init__(self):
+        self.minute = -1
+        self.prefix = ''
+        self.seconds = [f':{second:02d}' for second in range(60)]
+
+    def format(self, offset: int) -> str:
+        minute, second = divmod(offset, 60)
+        if minute != self.minute:
+            self.minute = minute
+            self.prefix = (START + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M')
+        return self.prefix + self.seconds[second]
+
+class Generator:
+    """Seeded synthetic catalog, users and results for a fresh database"""
+
+    def __init__(self, conn: sqlite3.Connection, seed: int = 42, batch_size: int = BATCH_SIZE):
+        self.conn = conn
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.timestamps = Timestamps()
+        self.words = WORDS + [tail_word(rank) for rank in range(TAIL_WORDS)]
+        self.word_weights = zipf_cum_weights(len(self.words), 1.1)
+
+        # Filled in as tables are generated
+        self.quiz_categories: List[str] = []
+        self.quiz_difficulties: List[str] = []
+        self.quiz_weights: List[float] = []
+        self.questions: Dict[int, List[Tuple[int, int, int]]] = {}
+        self.answer_variants: Dict[int, List[Tuple[str, float]]] = {}
+
+    def text(self, words: int) -> str:
+        return ' '.join(self.rng.choices(self.words, cum_weights=self.word_weights, k=words))
+
+    def _insert(self, query: str, rows: List[tuple]):
+        self.conn.executemany(query, rows)
+        rows.clear()
+
+    def quizzes(self, count: int):
+        """Quizzes spread over two years; categories follow a Zipf curve"""
+        rng = self.rng
+        category_weights = zipf_cum_weights(len(CATEGORIES), 1.2)
+        query = (
+            "INSERT INTO quiz (id, name, description, image, category, difficulty, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = []
+        for quiz_id in range(1, count + 1):
+            category = rng.choices(CATEGORIES, cum_weights=category_weights)[0]
+            difficulty = rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS)[0]
+            created = START + SPAN * (quiz_id / count)
+            rows.append((
+                quiz_id,
+                f"{category.title()} {self.text(2).title()} Quiz",
+                f"Test your knowledge of {category}: {self.text(8)}!",
+                f"https://example.com/quizzes/{quiz_id}.jpg",
+                category,
+                difficulty,
+                created.strftime('%Y-%m-%d')
+            ))
+            self.quiz_categories.append(category)
+            self.quiz_difficulties.append(difficulty)
+            if len(rows) >= self.batch_size:
+                self._insert(query, rows)
+        if rows:
+            self._insert(query, rows)
+
+        # A quiz is played in proportion to its category's popularity, and
+        # within a category a few quizzes are far more popular than the rest
+        popularity = {category: 1 / (rank + 1) ** 1.2 for rank, category in enumerate(CATEGORIES)}
+        rank_in_category: Dict[str, int] = {}
+        weights = []
+        for category in self.quiz_categories:
+            rank = rank_in_category.get(category, 0)
+            rank_in_category[category] = rank + 1
+            weights.append(popularity[category] / (rank + 1) ** 0.8)
+        self.quiz_weights = list(itertools.accumulate(weights))
+
+    def questions_for_quizzes(self, count: int):
+        """Questions split unevenly over the quizzes, mostly four choices"""
+        rng = self.rng
+        quizzes = len(self.quiz_categories)
+        # Every quiz gets at least one question, the rest land at random
+        quiz_of = list(range(1, quizzes + 1)) + rng.choices(range(1, quizzes + 1), k=max(0, count - quizzes))
+        quiz_of.sort()
+
+        query = (
+            "INSERT INTO questions (id, quiz_id, question_text, choices, correct_answer_index, "
+            "explanation, category, difficulty, image) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = []
+        for question_id, quiz_id in enumerate(quiz_of, start=1):
+            choice_count = 2 if rng.random() < 0.1 else 4
+            choices = [self.text(rng.randint(1, 3)).capitalize() for _ in range(choice_count)]
+            correct = rng.randrange(choice_count)
+            rows.append((
+                question_id,
+                quiz_id,
+                self.text(rng.randint(6, 14)).capitalize() + '?',
+                json.dumps(choices),
+                correct,
+                self.text(rng.randint(12, 30)).capitalize() + '.',
+                self.quiz_categories[quiz_id - 1],
+                self.quiz_difficulties[quiz_id - 1],
+                f"https://example.com/questions/{question_id}.jpg"
+            ))
+            self.questions.setdefault(quiz_id, []).append((question_id, choice_count, correct))
+            if len(rows) >= self.batch_size:
+                self._insert(query, rows)
+        if rows:
+            self._insert(query, rows)
+
+    def users(self, count: int):
+        query = "INSERT INTO users (id, email, created_at) VALUES (?, ?, ?)"
+        rows = []
+        span = int(SPAN.total_seconds())
+        for user_id in range(1, count + 1):
+            rows.append((user_id, f"user{user_id}@example.com", self.timestamps.format(span * user_id // (count + 1))))
+            if len(rows) >= self.batch_size:
+                self._insert(query, rows)
+        if rows:
+            self._insert(query, rows)
+
+    def _answers(self, quiz_id: int) -> Tuple[str, float]:
+        """One of the quiz's answer sets: {question_id: choice} JSON and its score"""
+        variants = self.answer_variants.get(quiz_id)
+        if variants is None:
+            variants = self.answer_variants[quiz_id] = []
+            for _ in range(ANSWER_VARIANTS):
+                skill = self.rng.betavariate(5, 3)
+                answers = {}
+                correct = 0
+                for question_id, choice_count, correct_index in self.questions[quiz_id]:
+                    if self.rng.random() < skill:
+                        answers[str(question_id)] = correct_index
+                        correct += 1
+                    else:
+                        answers[str(question_id)] = self.rng.randrange(choice_count)
+                        correct += answers[str(question_id)] == correct_index
+                total = len(self.questions[quiz_id])
+                variants.append((json.dumps(answers), round(100 * correct / total, 2)))
+        return variants[self.rng.randrange(ANSWER_VARIANTS)]
+
+    def results(self, count: int, users: int):
+        """Results in completed_at order; a few users and quizzes get most of them"""
+        rng = self.rng
+        user_weights = zipf_cum_weights(users, 1.0)
+        quiz_ids = range(1, len(self.quiz_categories) + 1)
+        # Users are numbered in signup order; shuffle which ones are heavy players
+        user_ids = list(range(1, users + 1))
+        rng.shuffle(user_ids)
+
+        query = (
+            "INSERT INTO quiz_results (user_id, quiz_id, score, answers, completed_at) "
+            "VALUES (?, ?, ?, ?, ?)"
+        )
+        span = int(SPAN.total_seconds())
+        answers = self._answers
+        timestamp = self.timestamps.format
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            picked_users = rng.choices(user_ids, cum_weights=user_weights, k=size)
+            picked_quizzes = rng.choices(quiz_ids, cum_weights=self.quiz_weights, k=size)
+            rows = []
+            for offset, (user_id, quiz_id) in enumerate(zip(picked_users, picked_quizzes)):
+                answer_json, score = answers(quiz_id)
+                rows.append((user_id, quiz_id, score, answer_json, timestamp(span * (start + offset) // count)))
+            self._insert(query, rows)
+
+def _deferred_schema(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """Secondary indexes and FTS triggers, which are much cheaper to build after a bulk load"""
+    return conn.execute(
+        """
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+          AND tbl_name IN ('quiz', 'questions', 'quiz_results')
+        ORDER BY type, name
+        """
+    ).fetchall()
+
+def generate(database: str, quizzes: int, questions: int, users: int, results: int,
+             seed: int = 42, batch_size: int = BATCH_SIZE, log=print) -> Dict[str, int]:
+    """Build a new database at ``database`` filled with synthetic data"""
+    if quizzes < 1 or questions < quizzes:
+        raise ValueError("Need at least one quiz and one question per quiz")
+    if results and users < 1:
+        raise ValueError("Results need at least one user")
+
+    conn = sqlite3.connect(database, isolation_level=None)
+    try:
+        migrate(conn)
+        deferred = _deferred_schema(conn)
+        for kind, name, _ in deferred:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        # Nothing is live yet, so durability is traded for load speed
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")
+
+        generator = Generator(conn, seed, batch_size)
+        steps = [
+            ('quizzes', lambda: generator.quizzes(quizzes)),
+            ('questions', lambda: generator.questions_for_quizzes(questions)),
+            ('users', lambda: generator.users(users)),
+            ('results', lambda: generator.results(results, users)),
+        ]
+        for label, step in steps:
+            started = time.perf_counter()
+            conn.execute("BEGIN")
+            step()
+            conn.execute("COMMIT")
+            log(f"{label:<10} {time.perf_counter() - started:8.1f}s")
+
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO quiz_fts (quiz_fts) VALUES ('rebuild')")
+        conn.execute("COMMIT")
+        log(f"{'indexes':<10} {time.perf_counter() - started:8.1f}s")
+
+        started = time.perf_counter()
+        rebuild_user_stats(conn)
+        conn.execute("ANALYZE")
+        log(f"{'stats':<10} {time.perf_counter() - started:8.1f}s")
+    finally:
+        conn.close()
+
+    return {'quizzes': quizzes, 'questions': questions, 'users': users, 'results': results}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a SQLite database of synthetic quizzes, users and results")
+    parser.add_argument('--output', '-o', default='synthetic.db')
+    parser.add_argument('--quizzes', type=int, default=100_000)
+    parser.add_argument('--questions', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=500_000)
+    parser.add_argument('--results', type=int, default=10_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--force', action='store_true', help="replace the output file if it exists")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.output):
+        if not args.force:
+            print(f"{args.output} already exists; pass --force to replace it")
+            return 2
+        os.remove(args.output)
+
+    started = time.perf_counter()
+    try:
+        counts = generate(args.output, args.quizzes, args.questions, args.users, args.results,
+                          args.seed, args.batch_size)
+    except ValueError as e:
+        print(e)
+        return 2
+    print(f"Wrote {', '.join(f'{count:,} {name}' for name, count in counts.items())} "
+          f"to {args.output} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
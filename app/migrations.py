@@ -0,0 +1,512 @@
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# Ordered list of (version, name, statements). Append new migrations at the
+# end; never edit one that has already shipped.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "create core tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS quiz (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            image TEXT NOT NULL,
+            category TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            quiz_id INTEGER NOT NULL,
+            question_text TEXT NOT NULL,
+            choices TEXT NOT NULL,
+            correct_answer_index INTEGER NOT NULL,
+            explanation TEXT NOT NULL,
+            category TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            image TEXT NOT NULL,
+            FOREIGN KEY (quiz_id) REFERENCES quiz (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            email TEXT,
+            created_at TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS quiz_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            quiz_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            answers TEXT NOT NULL,
+            completed_at TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (quiz_id) REFERENCES quiz (id)
+        )
+        ''',
+    ]),
+    (2, "add hot query indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_questions_quiz_id ON questions (quiz_id)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_category ON quiz (category)",
+        # Covers the stats aggregates and the per-category join
+        "CREATE INDEX IF NOT EXISTS idx_quiz_results_user_quiz_score ON quiz_results (user_id, quiz_id, score)",
+        # Serves the results listing in completed_at order without a sort
+        "CREATE INDEX IF NOT EXISTS idx_quiz_results_user_completed ON quiz_results (user_id, completed_at)",
+    ]),
+    (3, "make users.email unique", [
+        # Point results of duplicate users at the oldest account with that email
+        '''
+        UPDATE quiz_results
+        SET user_id = (
+            SELECT MIN(dup.id) FROM users u
+            JOIN users dup ON dup.email = u.email
+            WHERE u.id = quiz_results.user_id
+        )
+        WHERE user_id IN (
+            SELECT id FROM users
+            WHERE email IN (SELECT email FROM users GROUP BY email HAVING COUNT(*) > 1)
+        )
+        ''',
+        '''
+        DELETE FROM users
+        WHERE email IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM users WHERE email IS NOT NULL GROUP BY email)
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email)",
+    ]),
+    (4, "add quiz keyset pagination indexes", [
+        # One index per filter combination, each ending in created_at so a
+        # page is a range seek on (created_at, rowid) in index order
+        "CREATE INDEX IF NOT EXISTS idx_quiz_created ON quiz (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_category_created ON quiz (category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_difficulty_created ON quiz (difficulty, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_category_difficulty_created ON quiz (category, difficulty, created_at)",
+    ]),
+    (5, "add materialized user stats", [
+        '''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            total_quizzes INTEGER NOT NULL,
+            score_sum REAL NOT NULL,
+            highest_score REAL NOT NULL,
+            lowest_score REAL NOT NULL,
+            unique_quizzes INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_category_stats (
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            quizzes_taken INTEGER NOT NULL,
+            score_sum REAL NOT NULL,
+            PRIMARY KEY (user_id, category),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+        ''',
+        # Backfill from the results saved so far
+        '''
+        INSERT INTO user_stats (user_id, total_quizzes, score_sum, highest_score, lowest_score, unique_quizzes)
+        SELECT user_id, COUNT(*), SUM(score), MAX(score), MIN(score), COUNT(DISTINCT quiz_id)
+        FROM quiz_results
+        GROUP BY user_id
+        ''',
+        '''
+        INSERT INTO user_category_stats (user_id, category, quizzes_taken, score_sum)
+        SELECT qr.user_id, q.category, COUNT(*), SUM(qr.score)
+        FROM quiz_results qr
+        JOIN quiz q ON qr.quiz_id = q.id
+        GROUP BY qr.user_id, q.category
+        ''',
+    ]),
+    (6, "add full-text search", [
+        # External-content indexes: the text lives only in questions/quiz,
+        # FTS5 stores the inverted index plus 2-4 character prefix indexes
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+            question_text, explanation,
+            content='questions', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2',
+            prefix='2 3 4'
+        )
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS quiz_fts USING fts5(
+            name, description,
+            content='quiz', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2',
+            prefix='2 3 4'
+        )
+        ''',
+        # ORDER BY rank weighs a match in the question text or quiz name
+        # above one in the explanation or description
+        "INSERT INTO questions_fts (questions_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+        "INSERT INTO quiz_fts (quiz_fts, rank) VALUES ('rank', 'bm25(3.0, 1.0)')",
+        # Triggers keep the indexes in step with every writer, including app.py
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts (rowid, question_text, explanation)
+            VALUES (new.id, new.question_text, new.explanation);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, explanation)
+            VALUES ('delete', old.id, old.question_text, old.explanation);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE OF question_text, explanation ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, explanation)
+            VALUES ('delete', old.id, old.question_text, old.explanation);
+            INSERT INTO questions_fts (rowid, question_text, explanation)
+            VALUES (new.id, new.question_text, new.explanation);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_fts_insert AFTER INSERT ON quiz BEGIN
+            INSERT INTO quiz_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_fts_delete AFTER DELETE ON quiz BEGIN
+            INSERT INTO quiz_fts (quiz_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_fts_update AFTER UPDATE OF name, description ON quiz BEGIN
+            INSERT INTO quiz_fts (quiz_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO quiz_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+        ''',
+        # Index what is already there
+        "INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')",
+        "INSERT INTO quiz_fts (quiz_fts) VALUES ('rebuild')",
+    ]),
+    (7, "add question sampler index", [
+        # Covers the random question id arrays, grouped without a sort
+        "CREATE INDEX IF NOT EXISTS idx_questions_category_difficulty ON questions (category, difficulty)",
+    ]),
+    (8, "require valid JSON choices", [
+        # The listing routes and the export splice the stored text into their
+        # output without decoding it, so every writer has to store valid JSON.
+        # Rows that aren't are kept as a JSON string of their text.
+        "UPDATE questions SET choices = json_quote(choices) WHERE NOT json_valid(choices)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_choices_insert BEFORE INSERT ON questions
+        WHEN NOT json_valid(new.choices) BEGIN
+            SELECT RAISE(ABORT, 'questions.choices must be valid JSON');
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_choices_update BEFORE UPDATE OF choices ON questions
+        WHEN NOT json_valid(new.choices) BEGIN
+            SELECT RAISE(ABORT, 'questions.choices must be valid JSON');
+        END
+        ''',
+    ]),
+    (9, "add shared cache versions", [
+        # Bumped by triggers on every write to quiz and questions, from any
+        # process, so each API worker can tell when its caches went stale.
+        # 'catalog' counts quiz inserts, updates and deletes; 'quiz' counts
+        # question changes, and quiz_versions stamps each changed quiz with
+        # the 'quiz' count of its last change.
+        '''
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('catalog', 0), ('quiz', 0)",
+        '''
+        CREATE TABLE IF NOT EXISTS quiz_versions (
+            quiz_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_quiz_versions_version ON quiz_versions (version)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_version_insert AFTER INSERT ON quiz BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'catalog';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_version_update AFTER UPDATE ON quiz BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name IN ('catalog', 'quiz');
+            INSERT INTO quiz_versions (quiz_id, version)
+            SELECT new.id, version FROM cache_versions WHERE name = 'quiz'
+            ON CONFLICT (quiz_id) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS quiz_version_delete AFTER DELETE ON quiz BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name IN ('catalog', 'quiz');
+            INSERT INTO quiz_versions (quiz_id, version)
+            SELECT old.id, version FROM cache_versions WHERE name = 'quiz'
+            ON CONFLICT (quiz_id) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_version_insert AFTER INSERT ON questions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'quiz';
+            INSERT INTO quiz_versions (quiz_id, version)
+            SELECT new.quiz_id, version FROM cache_versions WHERE name = 'quiz'
+            ON CONFLICT (quiz_id) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_version_update AFTER UPDATE ON questions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'quiz';
+            INSERT INTO quiz_versions (quiz_id, version)
+            SELECT quiz_id, version FROM (SELECT new.quiz_id AS quiz_id UNION SELECT old.quiz_id), cache_versions
+            WHERE name = 'quiz'
+            ON CONFLICT (quiz_id) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS questions_version_delete AFTER DELETE ON questions BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = 'quiz';
+            INSERT INTO quiz_versions (quiz_id, version)
+            SELECT old.quiz_id, version FROM cache_versions WHERE name = 'quiz'
+            ON CONFLICT (quiz_id) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+    ]),
+    (10, "add a database token for ETags", [
+        # ETags are built from the cache versions, which start again at 0 in
+        # a new database; a random token per database keeps its tags apart
+        "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('token', abs(random() % 4294967296))",
+    ]),
+]
+
+# Queries issued by the hot routes, with representative parameters
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "get_quizzes by category": (
+        "SELECT * FROM quiz WHERE category = ?", ("science",)
+    ),
+    "get_quizzes page": (
+        "SELECT * FROM quiz ORDER BY created_at DESC, id DESC LIMIT ?", (51,)
+    ),
+    "get_quizzes page after cursor": (
+        '''
+        SELECT * FROM quiz WHERE (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+        ''', ("2025-01-01", 100, 51)
+    ),
+    "get_quizzes page by category and difficulty": (
+        '''
+        SELECT * FROM quiz
+        WHERE category = ? AND difficulty = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+        ''', ("science", "easy", "2025-01-01", 100, 51)
+    ),
+    "get_quizzes page by difficulty": (
+        '''
+        SELECT * FROM quiz WHERE difficulty = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+        ''', ("easy", "2025-01-01", 100, 51)
+    ),
+    "get_categories": (
+        "SELECT DISTINCT category FROM quiz ORDER BY category", ()
+    ),
+    "get_category_samples ids": (
+        "SELECT id, category FROM quiz ORDER BY category, id", ()
+    ),
+    "get_category_samples rows": (
+        "SELECT * FROM quiz WHERE id IN (?, ?, ?)", (1, 2, 3)
+    ),
+    "get_questions_by_quiz_id": (
+        "SELECT * FROM questions WHERE quiz_id = ? ORDER BY id", (1,)
+    ),
+    "score_quiz answer key": (
+        "SELECT id, correct_answer_index FROM questions WHERE quiz_id = ? ORDER BY id", (1,)
+    ),
+    "random questions id arrays": (
+        "SELECT category, difficulty, group_concat(id) FROM questions GROUP BY category, difficulty", ()
+    ),
+    "random questions answered by user": (
+        "SELECT quiz_id, answers FROM quiz_results WHERE user_id = ?", (1,)
+    ),
+    "random questions rows": (
+        "SELECT * FROM questions WHERE id IN (?, ?, ?, ?)", (1, 2, 3, 4)
+    ),
+    "warm_leaderboards": (
+        '''
+        SELECT qr.user_id, qr.quiz_id, q.category, MAX(qr.score)
+        FROM quiz_results qr
+        LEFT JOIN quiz q ON q.id = qr.quiz_id
+        GROUP BY qr.user_id, qr.quiz_id
+        ''', ()
+    ),
+    "search questions": (
+        '''
+        SELECT q.id, questions_fts.rank
+        FROM questions_fts
+        JOIN questions q ON q.id = questions_fts.rowid
+        WHERE questions_fts MATCH ?1 AND q.category = ?2
+            AND questions_fts.rowid >= (
+                SELECT MIN(rowid) FROM (
+                    SELECT questions_fts.rowid
+                    FROM questions_fts
+                    JOIN questions q ON q.id = questions_fts.rowid
+                    WHERE questions_fts MATCH ?1 AND q.category = ?2
+                    ORDER BY questions_fts.rowid DESC
+                    LIMIT ?3
+                )
+            )
+        ORDER BY questions_fts.rank
+        LIMIT ?4
+        ''', ('"vitamin"', "nutrition", 1000, 21)
+    ),
+    "cache versions": (
+        "SELECT name, version FROM cache_versions WHERE name IN ('catalog', 'quiz', 'token')", ()
+    ),
+    "cache version changed quizzes": (
+        "SELECT quiz_id, version FROM quiz_versions WHERE version > ?", (100,)
+    ),
+    "cache version of a quiz": (
+        "SELECT version FROM quiz_versions WHERE quiz_id = ?", (1,)
+    ),
+    "user lookup by email": (
+        "SELECT id FROM users WHERE email = ?", ("user@example.com",)
+    ),
+    "get_user_results": (
+        '''
+        SELECT qr.id, qr.score, qr.answers, qr.completed_at, q.id, q.name, q.category, q.difficulty
+        FROM quiz_results qr
+        JOIN quiz q ON qr.quiz_id = q.id
+        WHERE qr.user_id = ?
+        ORDER BY qr.completed_at DESC
+        ''', (1,)
+    ),
+    "get_user_stats overall": (
+        '''
+        SELECT u.id, s.total_quizzes, s.score_sum, s.highest_score, s.lowest_score, s.unique_quizzes
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE u.email = ?
+        ''', ("user@example.com",)
+    ),
+    "get_user_stats categories": (
+        '''
+        SELECT category, quizzes_taken, score_sum
+        FROM user_category_stats
+        WHERE user_id = ?
+        ORDER BY category
+        ''', (1,)
+    ),
+    "save_quiz_result seen quizzes": (
+        '''
+        SELECT DISTINCT user_id, quiz_id FROM quiz_results
+        WHERE user_id IN (?, ?) AND quiz_id IN (?, ?)
+        ''', (1, 2, 1, 2)
+    ),
+}
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    """Apply every pending migration, each in its own transaction"""
+    applied = []
+    version = current_version(conn)
+    conn.commit()
+
+    for number, name, statements in MIGRATIONS:
+        if number <= version:
+            continue
+
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (number, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(number)
+
+    return applied
+
+def explain_hot_queries(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Return the EXPLAIN QUERY PLAN detail lines for every hot query"""
+    plans = {}
+    for name, (query, params) in HOT_QUERIES.items():
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        plans[name] = [row[3] for row in rows]
+    return plans
+
+def find_table_scans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Return the hot queries whose plan scans a table without an index"""
+    scans = {}
+    for name, plan in explain_hot_queries(conn).items():
+        bad = [
+            step for step in plan
+            if step.startswith("SCAN ") and "INDEX" not in step
+        ]
+        if bad:
+            scans[name] = bad
+    return scans
+
+def main(argv: List[str]) -> int:
+    from app.core.config import get_settings
+
+    command = argv[1] if len(argv) > 1 else "migrate"
+    database = argv[2] if len(argv) > 2 else get_settings().database_path
+
+    conn = sqlite3.connect(database)
+    try:
+        if command == "migrate":
+            applied = migrate(conn)
+            print(f"Applied migrations: {applied or 'none'}")
+            print(f"Schema version: {current_version(conn)}")
+        elif command == "status":
+            print(f"Schema version: {current_version(conn)} of {MIGRATIONS[-1][0]}")
+        elif command == "check":
+            for name, plan in explain_hot_queries(conn).items():
+                print(f"{name}:")
+                for step in plan:
+                    print(f"    {step}")
+            scans = find_table_scans(conn)
+            if scans:
+                print(f"Table scans found in: {', '.join(scans)}")
+                return 1
+            print("No hot query does a table scan")
+        else:
+            print("Usage: python -m app.migrations [migrate|status|check] [database]")
+            return 2
+    finally:
+        conn.close()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,18 +1,172 @@
-from app.database import get_db_connection
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.models.quiz import Quiz
+from app.models.session import Session, id_chunks, in_list, insert_rows
+from array import array
 import json
 
+COLUMNS = (
+    'id', 'quiz_id', 'question_text', 'choices', 'correct_answer_index',
+    'explanation', 'category', 'difficulty', 'image'
+)
+INSERT_COLUMNS = COLUMNS[1:]
+
+# Statement texts are fixed so they stay in SQLite's prepared statement cache
+SELECT_QUESTION = f"SELECT {', '.join(COLUMNS)} FROM questions"
+SELECT_BY_QUIZ = f"{SELECT_QUESTION} WHERE quiz_id = ? ORDER BY id"
+SELECT_ANSWER_KEY = "SELECT id, correct_answer_index FROM questions WHERE quiz_id = ? ORDER BY id"
+# Served from the covering (category, difficulty) index, one row per pair
+SELECT_SAMPLER_INDEX = "SELECT category, difficulty, group_concat(id) FROM questions GROUP BY category, difficulty"
+SELECT_USER_ANSWERS = "SELECT quiz_id, answers FROM quiz_results WHERE user_id = ?"
+INSERT_QUESTION = f"INSERT INTO questions ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+
 class Question:
+    """Data access for the questions table.
+
+    Rows are dicts keyed by COLUMNS with ``choices`` as the stored JSON
+    text; ``decode`` gives the API form. Like Quiz, every method takes the
+    caller's Session, and writes mark the quiz for its cache hooks.
+    """
+
+    @staticmethod
+    def decode(question: Dict) -> Dict:
+        """Copy of a row with ``choices`` parsed into a list"""
+        question = dict(question)
+        if question.get('choices'):
+            try:
+                question['choices'] = json.loads(question['choices'])
+            except json.JSONDecodeError:
+                pass
+        return question
+
+    @staticmethod
+    def _remember(session: Session, rows: Iterable[Tuple]) -> List[Dict]:
+        known = session.rows('questions')
+        questions = []
+        for row in rows:
+            question = dict(zip(COLUMNS, row))
+            known[question['id']] = question
+            questions.append(question)
+        return questions
+
+    @staticmethod
+    async def get_many(session: Session, ids: Iterable[int]) -> Dict[int, Optional[Dict]]:
+        """Questions by id (None for missing ones), querying only ids the session hasn't seen"""
+        ids = list(dict.fromkeys(ids))
+        known = session.rows('questions')
+        missing = [question_id for question_id in ids if question_id not in known]
+        for chunk in id_chunks(missing):
+            placeholders, values = in_list(chunk)
+            Question._remember(session, await session.db.fetch_all(f"{SELECT_QUESTION} WHERE id IN ({placeholders})", values))
+            for question_id in chunk:
+                known.setdefault(question_id, None)
+        return {question_id: known[question_id] for question_id in ids}
+
+    @staticmethod
+    async def get(session: Session, question_id: int) -> Optional[Dict]:
+        return (await Question.get_many(session, [question_id]))[question_id]
+
+    @staticmethod
+    async def get_by_quiz(session: Session, quiz_id: int) -> List[Dict]:
+        """Every question of a quiz, in id order"""
+        return Question._remember(session, await session.db.fetch_all(SELECT_BY_QUIZ, (quiz_id,)))
+
     @staticmethod
-    def create(question_data):
-        # Question creation logic
-        pass
+    async def answer_key(session: Session, quiz_id: int) -> List[Tuple[int, int]]:
+        """(id, correct_answer_index) of every question of a quiz, in id order"""
+        return [tuple(row) for row in await session.db.fetch_all(SELECT_ANSWER_KEY, (quiz_id,))]
 
     @staticmethod
-    def get_by_quiz(quiz_id):
-        # Get questions by quiz logic
-        pass
+    async def sampler_index(session: Session) -> List[Tuple[str, str, array]]:
+        """(category, difficulty, ids) for every pair, for the question sampler"""
+        # One concatenated string per pair is far cheaper to fetch than a row per question
+        return [
+            (category, difficulty, array('q', map(int, ids.split(','))))
+            for category, difficulty, ids in await session.db.fetch_all(SELECT_SAMPLER_INDEX)
+        ]
 
     @staticmethod
-    def delete(question_id):
-        # Delete question logic
-        pass
\ No newline at end of file
+    async def answered_by(session: Session, user_id: int) -> Set[int]:
+        """Ids of the questions a user has answered in their saved results.
+
+        Results scored through the API store answers keyed by question id;
+        older results store a plain list by position, so every question of
+        those quizzes counts as answered.
+        """
+        answered = set()
+        whole_quizzes = set()
+        for quiz_id, answers in await session.db.fetch_all(SELECT_USER_ANSWERS, (user_id,)):
+            try:
+                answers = json.loads(answers) if answers else None
+            except json.JSONDecodeError:
+                answers = None
+            if isinstance(answers, dict):
+                answered.update(int(question_id) for question_id in answers if str(question_id).isdigit())
+            else:
+                whole_quizzes.add(quiz_id)
+
+        for chunk in id_chunks(sorted(whole_quizzes)):
+            placeholders, values = in_list(chunk)
+            rows = await session.db.fetch_all(f"SELECT id FROM questions WHERE quiz_id IN ({placeholders})", values)
+            answered.update(row[0] for row in rows)
+        return answered
+
+    @staticmethod
+    async def create_many(
+        session: Session,
+        questions: List[Tuple[int, Dict]]
+    ) -> Tuple[List[Tuple[int, int]], List[Dict]]:
+        """Insert (index, question) pairs as one bulk write.
+
+        Questions are dicts with the INSERT_COLUMNS keys and ``choices`` as
+        a list. Returns ``(inserted, errors)``: ``inserted`` holds
+        ``(index, id)`` pairs and ``errors`` holds ``{'index', 'error'}``
+        dicts, both in index order. Every referenced quiz is checked with
+        one query, or none for quizzes the session has already seen.
+        """
+        quizzes = await Quiz.get_many(session, {question['quiz_id'] for _, question in questions})
+
+        errors = []
+        pending = []
+        for index, question in questions:
+            if quizzes[question['quiz_id']] is None:
+                errors.append({
+                    'index': index,
+                    'error': f"Quiz with ID {question['quiz_id']} not found"
+                })
+                continue
+
+            row = tuple(
+                json.dumps(question['choices']) if column == 'choices' else question[column]
+                for column in INSERT_COLUMNS
+            )
+            pending.append((index, row))
+
+        ids = await insert_rows(session, 'questions', INSERT_QUESTION, [row for _, row in pending])
+
+        inserted = []
+        known = session.rows('questions')
+        for question_id, (index, row) in zip(ids, pending):
+            if isinstance(question_id, Exception):
+                errors.append({
+                    'index': index,
+                    'error': str(question_id)
+                })
+                continue
+            known[question_id] = dict(zip(COLUMNS, (question_id,) + row))
+            inserted.append((index, question_id))
+            session.quiz_changed(row[0])
+
+        errors.sort(key=lambda error: error['index'])
+        return inserted, errors
+
+    @staticmethod
+    async def delete(session: Session, question_id: int) -> Optional[int]:
+        """Delete a question; returns its quiz ID, or None if there is no such question"""
+        question = await Question.get(session, question_id)
+        if question is None:
+            return None
+
+        await session.db.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+        session.rows('questions')[question_id] = None
+        session.quiz_changed(question['quiz_id'])
+        return question['quiz_id']
@@ -1,18 +1,173 @@
-from app.database import get_db_connection
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from app.models.session import Session, id_chunks, in_list, insert_rows
+from app.stats import REMOVE_QUIZ_CATEGORY_STATS_STATEMENTS
 from datetime import datetime
 
+COLUMNS = ('id', 'name', 'description', 'image', 'category', 'difficulty', 'created_at')
+INSERT_COLUMNS = COLUMNS[1:]
+
+# Statement texts are fixed so they stay in SQLite's prepared statement cache
+SELECT_QUIZ = f"SELECT {', '.join(COLUMNS)} FROM quiz"
+INSERT_QUIZ = f"INSERT INTO quiz ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(INSERT_COLUMNS))})"
+SELECT_CATEGORIES = "SELECT DISTINCT category FROM quiz ORDER BY category"
+SELECT_CATEGORY_INDEX = "SELECT id, category FROM quiz ORDER BY category, id"
+
 class Quiz:
+    """Data access for the quiz table.
+
+    Every method takes the caller's Session and returns rows as dicts
+    keyed by COLUMNS. Rows read or written are added to the session's
+    identity map; writes mark the catalog for the session's cache hooks.
+    """
+
     @staticmethod
-    def create(quiz_data):
-        # Quiz creation logic
-        pass
+    def _remember(session: Session, rows: Iterable[Tuple]) -> List[Dict]:
+        known = session.rows('quiz')
+        quizzes = []
+        for row in rows:
+            quiz = dict(zip(COLUMNS, row))
+            known[quiz['id']] = quiz
+            quizzes.append(quiz)
+        return quizzes
 
     @staticmethod
-    def get_all(category=None):
-        # Get all quizzes logic
-        pass
+    async def get_many(session: Session, ids: Iterable[int]) -> Dict[int, Optional[Dict]]:
+        """Quizzes by id (None for missing ones), querying only ids the session hasn't seen"""
+        ids = list(dict.fromkeys(ids))
+        known = session.rows('quiz')
+        missing = [quiz_id for quiz_id in ids if quiz_id not in known]
+        for chunk in id_chunks(missing):
+            placeholders, values = in_list(chunk)
+            Quiz._remember(session, await session.db.fetch_all(f"{SELECT_QUIZ} WHERE id IN ({placeholders})", values))
+            for quiz_id in chunk:
+                known.setdefault(quiz_id, None)
+        return {quiz_id: known[quiz_id] for quiz_id in ids}
 
     @staticmethod
-    def delete(quiz_id):
-        # Delete quiz logic
-        pass
\ No newline at end of file
+    async def get(session: Session, quiz_id: int) -> Optional[Dict]:
+        return (await Quiz.get_many(session, [quiz_id]))[quiz_id]
+
+    @staticmethod
+    async def get_all(
+        session: Session,
+        category: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        after: Optional[Tuple[str, int]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Quizzes, optionally filtered; with ``limit`` newest first from the ``after`` cursor"""
+        conditions = []
+        values = []
+        if category:
+            conditions.append("category = ?")
+            values.append(category)
+        if difficulty:
+            conditions.append("difficulty = ?")
+            values.append(difficulty)
+        if after is not None:
+            # Row-value comparison seeks straight to the cursor in the
+            # (category, difficulty, created_at) indexes; no OFFSET scan
+            conditions.append("(created_at, id) < (?, ?)")
+            values.extend(after)
+
+        query = SELECT_QUIZ
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if limit is not None:
+            query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+            values.append(limit)
+
+        return Quiz._remember(session, await session.db.fetch_all(query, values))
+
+    @staticmethod
+    async def categories(session: Session) -> List[str]:
+        """Every distinct category name, sorted"""
+        return [row[0] for row in await session.db.fetch_all(SELECT_CATEGORIES)]
+
+    @staticmethod
+    async def category_index(session: Session) -> List[Tuple[int, str]]:
+        """(id, category) of every quiz in category order, for the category sampler"""
+        return [tuple(row) for row in await session.db.fetch_all(SELECT_CATEGORY_INDEX)]
+
+    @staticmethod
+    def _row(quiz_data: Dict, created_at: str) -> Tuple:
+        return tuple(created_at if column == 'created_at' else quiz_data[column] for column in INSERT_COLUMNS)
+
+    @staticmethod
+    async def create_many(session: Session, quizzes: List[Dict]) -> List[Union[Dict, Exception]]:
+        """Insert quizzes in one batch; each entry is the new quiz or the error that stopped it"""
+        created_at = datetime.now().date().isoformat()  # Format as YYYY-MM-DD
+        rows = [Quiz._row(quiz_data, created_at) for quiz_data in quizzes]
+        ids = await insert_rows(session, 'quiz', INSERT_QUIZ, rows)
+
+        results = []
+        known = session.rows('quiz')
+        for quiz_id, row in zip(ids, rows):
+            if isinstance(quiz_id, Exception):
+                results.append(quiz_id)
+                continue
+            quiz = dict(zip(COLUMNS, (quiz_id,) + row))
+            known[quiz_id] = quiz
+            results.append(quiz)
+        session.catalog_changed()
+        return results
+
+    @staticmethod
+    async def create(session: Session, quiz_data: Dict) -> Dict:
+        """Insert one quiz and return it"""
+        created_at = datetime.now().date().isoformat()
+        row = Quiz._row(quiz_data, created_at)
+        quiz_id, _ = await session.db.execute(INSERT_QUIZ, row)
+        quiz = dict(zip(COLUMNS, (quiz_id,) + row))
+        session.rows('quiz')[quiz_id] = quiz
+        session.catalog_changed()
+        return quiz
+
+    @staticmethod
+    async def create_with_questions(session: Session, quiz_data: Dict, questions_data: List[Dict]) -> Tuple[Dict, List[Dict]]:
+        """Insert a quiz and its questions; returns the quiz and the questions in API form.
+
+        Raises on the first question that fails, so run it in a transaction
+        to have the quiz and its questions commit together or not at all.
+        """
+        # question.py imports this module
+        from app.models.question import COLUMNS as QUESTION_COLUMNS, Question
+
+        quiz = await Quiz.create(session, quiz_data)
+        inserted, errors = await Question.create_many(
+            session,
+            [(index, {**question, 'quiz_id': quiz['id']}) for index, question in enumerate(questions_data)]
+        )
+        if errors:
+            raise ValueError(errors[0]['error'])
+
+        # Built from the submitted data instead of re-reading every row
+        questions = []
+        for index, question_id in inserted:
+            question = {**questions_data[index], 'id': question_id, 'quiz_id': quiz['id']}
+            questions.append({column: question[column] for column in QUESTION_COLUMNS})
+        return quiz, questions
+
+    @staticmethod
+    async def delete(session: Session, quiz_id: int) -> Optional[int]:
+        """Delete a quiz and its questions; returns how many questions went, or None if there is no such quiz.
+
+        The quiz's results stay, but leave its category's user stats.
+        """
+        quiz = await Quiz.get(session, quiz_id)
+        if quiz is None:
+            return None
+
+        for statement in REMOVE_QUIZ_CATEGORY_STATS_STATEMENTS:
+            await session.db.execute(statement, {'quiz_id': quiz_id, 'category': quiz['category']})
+        _, questions_deleted = await session.db.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
+        await session.db.execute("DELETE FROM quiz WHERE id = ?", (quiz_id,))
+
+        session.rows('quiz')[quiz_id] = None
+        questions = session.rows('questions')
+        for question_id, question in questions.items():
+            if question is not None and question['quiz_id'] == quiz_id:
+                questions[question_id] = None
+        session.catalog_changed()
+        session.quiz_changed(quiz_id)
+        return questions_deleted
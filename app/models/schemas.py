@@ -114,6 +114,31 @@ class QuizResult(BaseModel):
     score: float
     answers: dict
 
+class AnswerSubmission(BaseModel):
+    answers: Dict[int, int] = Field(
+        ...,
+        description="Chosen answer index (0-based) for each question ID",
+        example={"1": 0, "2": 3}
+    )
+    email: Optional[str] = Field(
+        None,
+        description="Save the scored result for this user"
+    )
+
+class QuestionScore(BaseModel):
+    question_id: int
+    selected_answer: Optional[int]
+    correct_answer_index: int
+    is_correct: bool
+
+class ScoreResponse(BaseModel):
+    quiz_id: int
+    score: float
+    correct: int
+    total: int
+    results: List[QuestionScore]
+    result_id: Optional[int] = None
+
 class QuizResultResponse(QuizResult):
     id: int
     completed_at: datetime
@@ -0,0 +1,184 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, List, Optional, Sequence, Set, Tuple, Union
+from functools import lru_cache
+import sqlite3
+
+# Ids bound per IN list; longer lists are split across statements
+MAX_IN_IDS = 512
+
+# Run by Session.publish() once a write has committed: catalog hooks with
+# no arguments, quiz hooks with the id of a quiz whose questions changed
+catalog_hooks: List[Callable[[], None]] = []
+quiz_hooks: List[Callable[[int], None]] = []
+
+def on_catalog_change(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register a hook to run after a quiz is created or deleted"""
+    catalog_hooks.append(hook)
+    return hook
+
+def on_quiz_change(hook: Callable[[int], None]) -> Callable[[int], None]:
+    """Register a hook to run after a quiz's questions change"""
+    quiz_hooks.append(hook)
+    return hook
+
+@lru_cache(maxsize=None)
+def _placeholders(size: int) -> str:
+    return ', '.join('?' * size)
+
+def in_list(ids: Sequence) -> Tuple[str, List]:
+    """Placeholders and values for an IN list, padded to a power-of-two length.
+
+    SQLite keeps prepared statements per connection keyed by their text,
+    so padding (by repeating the last id) keeps an IN query to a handful of
+    texts that stay prepared instead of one new text per list length.
+    """
+    size = 1
+    while size < len(ids):
+        size *= 2
+    values = list(ids)
+    values.extend(values[-1:] * (size - len(values)))
+    return _placeholders(size), values
+
+def id_chunks(ids: Sequence) -> List[Sequence]:
+    return [ids[start:start + MAX_IN_IDS] for start in range(0, len(ids), MAX_IN_IDS)]
+
+def run_sync(coroutine: Coroutine) -> Any:
+    """Run a model call on a SyncExecutor session to its result.
+
+    A SyncExecutor never suspends, so the coroutine finishes on its first
+    step and no event loop is needed.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("Model call suspended; sync sessions need a SyncExecutor")
+
+class SyncExecutor:
+    """Runs model statements on a sqlite3 connection, for the Flask app and CLIs"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.connection.in_transaction
+
+    async def fetch_all(self, query: str, values: Sequence = ()) -> List[Tuple]:
+        return self.connection.execute(query, values).fetchall()
+
+    async def execute(self, query: str, values: Sequence = ()) -> Tuple[int, int]:
+        """Run one statement; returns ``(lastrowid, rowcount)``"""
+        cursor = self.connection.execute(query, values)
+        return cursor.lastrowid, cursor.rowcount
+
+    async def executemany(self, query: str, rows: List[Sequence]):
+        self.connection.executemany(query, rows)
+
+class Session:
+    """One request's (or one write's) view of the catalog tables.
+
+    Models run their statements on ``db``, an executor for either a pooled
+    async connection or a sqlite3 connection. Rows are kept in an identity
+    map per table (id -> row dict, or None for an id known not to exist),
+    so a request that asks for the same quiz twice queries it once. Writes
+    note which caches they make stale; ``publish()`` runs the registered
+    hooks for them and is called once the write has committed.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.identity: Dict[str, Dict[int, Optional[Dict]]] = {}
+        self._savepoints = 0
+        self._catalog_changed = False
+        self._changed_quizzes = set()
+
+    def bind(self, db) -> 'Session':
+        """Run later statements on another executor, keeping the identity map"""
+        self.db = db
+        return self
+
+    def rows(self, table: str) -> Dict[int, Optional[Dict]]:
+        return self.identity.setdefault(table, {})
+
+    def catalog_changed(self):
+        self._catalog_changed = True
+
+    def quiz_changed(self, quiz_id: int):
+        self._changed_quizzes.add(quiz_id)
+
+    def pending(self) -> Tuple[bool, Set[int]]:
+        """Whether the catalog changed, and which quizzes did, since the last publish()"""
+        return self._catalog_changed, set(self._changed_quizzes)
+
+    def publish(self):
+        """Run the cache hooks owed by this session's writes"""
+        catalog_changed, self._catalog_changed = self._catalog_changed, False
+        changed_quizzes, self._changed_quizzes = self._changed_quizzes, set()
+        if catalog_changed:
+            for hook in catalog_hooks:
+                hook()
+        for quiz_id in changed_quizzes:
+            for hook in quiz_hooks:
+                hook(quiz_id)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """A transaction, or a savepoint when one is already open"""
+        if self.db.in_transaction:
+            self._savepoints += 1
+            name = f"model_{self._savepoints}"
+            await self.db.execute(f"SAVEPOINT {name}")
+            try:
+                yield
+            except BaseException:
+                await self.db.execute(f"ROLLBACK TO {name}")
+                await self.db.execute(f"RELEASE {name}")
+                raise
+            else:
+                await self.db.execute(f"RELEASE {name}")
+            finally:
+                self._savepoints -= 1
+        else:
+            await self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                await self.db.execute("ROLLBACK")
+                raise
+            else:
+                await self.db.execute("COMMIT")
+
+async def _sequence(session: Session, table: str) -> int:
+    """Current AUTOINCREMENT counter of the table"""
+    rows = await session.db.fetch_all("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    return rows[0][0] if rows else 0
+
+async def insert_rows(session: Session, table: str, query: str, rows: List[Sequence]) -> List[Union[int, Exception]]:
+    """Insert rows with one executemany and return their ids in order.
+
+    AUTOINCREMENT ids handed out inside one write transaction are
+    consecutive, so they are read off sqlite_sequence rather than with a
+    round trip per row. If the batch fails, the rows are retried one at a
+    time and a failing row's entry is its exception.
+    """
+    if not rows:
+        return []
+
+    try:
+        async with session.transaction():
+            first_id = await _sequence(session, table) + 1
+            await session.db.executemany(query, rows)
+            if await _sequence(session, table) - first_id + 1 != len(rows):
+                raise RuntimeError(f"Inserted {table} ids are not consecutive")
+        return list(range(first_id, first_id + len(rows)))
+    except Exception:
+        ids = []
+        async with session.transaction():
+            for row in rows:
+                try:
+                    ids.append((await session.db.execute(query, row))[0])
+                except Exception as e:
+                    ids.append(e)
+        return ids
@@ -1,3 +1,3 @@
-from . import users, quizzes, questions, categories
+from . import users, quizzes, questions, categories, monitoring, export, scoring, leaderboards, search, metrics
 
-__all__ = ['users', 'quizzes', 'questions', 'categories']
\ No newline at end of file
+__all__ = ['users', 'quizzes', 'questions', 'categories', 'monitoring', 'export', 'scoring', 'leaderboards', 'search', 'metrics']
\ No newline at end of file
@@ -1,20 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from databases import Database
-from app.database import get_db
+from fastapi import APIRouter, HTTPException, Header, Response
+from typing import List, Optional
+from app.database import pool, session_for
+from app.core.cache import catalog_cache, catalog_etag
+from app.core.etag import matching_etag, not_modified
+from app.models.quiz import Quiz
 
 # Remove the /api prefix from here since it's added in the main app
 router = APIRouter()
 
 @router.get("/categories", response_model=List[str])
-async def get_categories(db: Database = Depends(get_db)):
+async def get_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None)
+):
     """Get all unique category names"""
     try:
-        query = "SELECT DISTINCT category FROM quiz ORDER BY category"
-        categories = await db.fetch_all(query=query)
+        version = catalog_cache.version
+        etag = catalog_etag()
+        matched = matching_etag(if_none_match, etag)
+        if matched is not None:
+            return not_modified(matched)
+        response.headers['ETag'] = etag
 
-        # Extract category names from the result
-        return [category['category'] for category in categories]
+        cached = catalog_cache.get('categories')
+        if cached is not None:
+            return cached
+
+        # A reader is only checked out on a miss, so hits never wait for one
+        async with pool.reader() as db:
+            result = await Quiz.categories(session_for(db))
+        catalog_cache.set('categories', result, version)
+        return result
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.database import pool
+from app.export import EXPORT_QUERY, FORMATS, ExportStream
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+async def _export_stream(export_format: str, gzip: bool):
+    stream = ExportStream(export_format, gzip)
+    # A connection of its own: a slow client would otherwise keep a
+    # pooled reader checked out for the whole download
+    async with pool.dedicated_reader() as db:
+        # iterate() steps a server-side cursor, so rows are never all in memory
+        async for row in db.iterate(EXPORT_QUERY):
+            chunk = stream.feed(row)
+            if chunk:
+                yield chunk
+    yield stream.close()
+
+@router.get("/export",
+    summary="Export the catalog",
+    description="Stream every quiz and question as NDJSON or CSV, optionally gzipped"
+)
+async def export_catalog(
+    format: str = Query(default='ndjson', description="ndjson or csv"),
+    gzip: bool = Query(default=False, description="gzip the export")
+):
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}', expected one of: {', '.join(FORMATS)}"
+        )
+
+    filename = f"catalog.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _export_stream(format, gzip),
+        media_type='application/gzip' if gzip else MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
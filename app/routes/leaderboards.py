@@ -0,0 +1,132 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Optional
+from app.database import pool
+from app.core.leaderboard import LeaderboardLoader, RankedScores, leaderboards
+from contextlib import aclosing
+import asyncio
+
+router = APIRouter()
+
+# Best score per (user, quiz), read in index order from the covering
+# (user_id, quiz_id, score) index
+WARM_QUERY = """
+    SELECT qr.user_id, qr.quiz_id, q.category, MAX(qr.score) AS best
+    FROM quiz_results qr
+    LEFT JOIN quiz q ON q.id = qr.quiz_id
+    GROUP BY qr.user_id, qr.quiz_id
+"""
+
+async def warm_leaderboards():
+    """Build every leaderboard from quiz_results.
+
+    The scan runs on a connection of its own, so writes and other reads
+    carry on meanwhile. Results saved once it has begun are buffered and
+    replayed onto the new boards.
+    """
+    leaderboards.begin_load()
+    try:
+        loader = LeaderboardLoader()
+        async with pool.dedicated_reader() as db:
+            # Closed explicitly so an abandoned load releases its cursor at once
+            async with aclosing(db.iterate(WARM_QUERY)) as rows:
+                async for row in rows:
+                    if _stopping:
+                        return
+                    loader.add(row['user_id'], row['quiz_id'], row['category'], row['best'])
+        leaderboards.load(loader)
+    finally:
+        # No-op once loaded
+        leaderboards.cancel_load()
+
+async def _standings(board: Optional[RankedScores], limit: int, email: Optional[str]) -> Dict:
+    """Top entries of a board plus the caller's own rank"""
+    top = board.top(limit) if board else []
+    standings = {
+        'total_players': len(board) if board else 0,
+        'top': [
+            {'rank': rank, 'user_id': user_id, 'score': score}
+            for rank, user_id, score in top
+        ]
+    }
+
+    if email is not None:
+        async with pool.reader() as db:
+            user = await db.fetch_one(
+                "SELECT id FROM users WHERE email = :email",
+                values={"email": email}
+            )
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        rank = board.rank(user['id']) if board else None
+        standings['me'] = {
+            'user_id': user['id'],
+            'rank': rank,
+            'score': board.score(user['id']) if rank else None
+        }
+
+    return standings
+
+_warming: Optional[asyncio.Task] = None
+# Set by stop_warming() to abandon a load in progress
+_stopping = False
+
+def start_warming() -> asyncio.Task:
+    """Load the leaderboards in a background task, unless they are loaded or loading.
+
+    The startup hook calls this so a new worker serves other routes while
+    quiz_results is read; leaderboard requests wait for the same task.
+    """
+    global _warming
+    if _warming is None or (_warming.done() and not leaderboards.loaded):
+        _warming = asyncio.get_running_loop().create_task(warm_leaderboards())
+    return _warming
+
+async def stop_warming():
+    """Abandon a background load still in progress, so shutdown doesn't wait for it"""
+    global _warming, _stopping
+    if _warming is not None and not _warming.done():
+        _stopping = True
+        try:
+            await _warming
+        except Exception:
+            pass
+        finally:
+            _stopping = False
+    _warming = None
+
+async def _ensure_loaded():
+    if not leaderboards.loaded:
+        # Shielded so a request that goes away doesn't cancel the load
+        await asyncio.shield(start_warming())
+
+@router.get("/leaderboards/global", response_model=Dict)
+async def get_global_leaderboard(
+    limit: int = Query(default=10, ge=1, le=100),
+    email: Optional[str] = None
+):
+    """Users ranked by the sum of their best score on every quiz"""
+    await _ensure_loaded()
+    return await _standings(leaderboards.overall, limit, email)
+
+@router.get("/leaderboards/quizzes/{quiz_id}", response_model=Dict)
+async def get_quiz_leaderboard(
+    quiz_id: int,
+    limit: int = Query(default=10, ge=1, le=100),
+    email: Optional[str] = None
+):
+    """Users ranked by their best score on one quiz"""
+    await _ensure_loaded()
+    standings = await _standings(leaderboards.quizzes.get(quiz_id), limit, email)
+    return {'quiz_id': quiz_id, **standings}
+
+@router.get("/leaderboards/categories/{category}", response_model=Dict)
+async def get_category_leaderboard(
+    category: str,
+    limit: int = Query(default=10, ge=1, le=100),
+    email: Optional[str] = None
+):
+    """Users ranked by the sum of their best scores on a category's quizzes"""
+    await _ensure_loaded()
+    standings = await _standings(leaderboards.categories.get(category), limit, email)
+    return {'category': category, **standings}
@@ -0,0 +1,83 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.database import pool
+from app.core.answer_keys import answer_keys
+from app.core.cache import catalog_cache, quiz_payload_cache
+from app.core.metrics import metrics
+from app.core.startup import startup_times
+from app.routes.users import result_queue
+
+router = APIRouter()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _cache_families():
+    caches = {
+        'catalog': catalog_cache.stats(),
+        'quiz_payloads': quiz_payload_cache.stats(),
+        'answer_keys': answer_keys.stats()
+    }
+    return [
+        ('cache_hits_total', 'counter', 'Cache lookups that found an entry.',
+            [({'cache': name}, stats['hits']) for name, stats in caches.items()]),
+        ('cache_misses_total', 'counter', 'Cache lookups that found nothing.',
+            [({'cache': name}, stats['misses']) for name, stats in caches.items()]),
+        ('cache_hit_ratio', 'gauge', 'Hits over lookups since startup.',
+            [({'cache': name}, stats['hit_ratio']) for name, stats in caches.items()]),
+        ('cache_entries', 'gauge', 'Entries currently cached.',
+            [({'cache': name}, stats.get('entries', stats.get('quizzes', 0))) for name, stats in caches.items()]),
+        ('cache_bytes', 'gauge', 'Bytes held by the quiz payload cache, compressed variants included.',
+            [({'cache': 'quiz_payloads'}, caches['quiz_payloads']['bytes'])]),
+    ]
+
+def _pool_families():
+    stats = pool.stats()
+    return [
+        ('db_pool_connections', 'gauge', 'Pooled connections by role.',
+            [({'role': 'reader'}, stats['readers']), ({'role': 'writer'}, stats['writers'])]),
+        ('db_pool_idle_readers', 'gauge', 'Reader connections waiting to be checked out.',
+            [({}, stats['idle_readers'])]),
+        ('db_pool_in_use', 'gauge', 'Connections currently checked out.',
+            [({}, stats['in_flight'])]),
+        ('db_pool_checkouts_total', 'counter', 'Connection checkouts since startup.',
+            [({}, stats['checkouts'])]),
+        ('db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.',
+            [({}, stats['wait_time_total'])]),
+        ('db_pool_wait_seconds_max', 'gauge', 'Longest wait for a connection.',
+            [({}, stats['wait_time_max'])]),
+    ]
+
+def _results_queue_families():
+    stats = result_queue.stats()
+    return [
+        ('results_queue_depth', 'gauge', 'Quiz results waiting to be written.',
+            [({}, stats['depth'])]),
+        ('results_queue_max_size', 'gauge', 'Capacity of the quiz result queue.',
+            [({}, stats['max_size'])]),
+        ('results_queue_results_total', 'counter', 'Quiz results by outcome.',
+            [({'outcome': outcome}, stats[outcome]) for outcome in ('enqueued', 'written', 'failed', 'rejected')]),
+        ('results_queue_flushes_total', 'counter', 'Batches written.',
+            [({}, stats['flushes'])]),
+        ('results_queue_flush_seconds_total', 'counter', 'Time spent writing batches.',
+            [({}, stats['flush_time_total'])]),
+    ]
+
+def _startup_families():
+    stats = startup_times.stats()
+    timings = [(name, stats[name]) for name in ('imported', 'ready', 'first_request') if stats[name] is not None]
+    return [
+        ('startup_seconds', 'gauge', 'Seconds from the start of the app import to each startup milestone.',
+            [({'milestone': name}, value) for name, value in timings]),
+        ('startup_phase_seconds', 'gauge', 'Seconds spent in each step of the startup hook.',
+            [({'phase': name}, value) for name, value in stats['phases'].items()]),
+    ]
+
+metrics.add_collector(_cache_families)
+metrics.add_collector(_pool_families)
+metrics.add_collector(_results_queue_families)
+metrics.add_collector(_startup_families)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, query, cache, pool, queue and startup metrics for Prometheus to scrape"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Literal
+from app.database import pool
+from app.core.answer_keys import answer_keys
+from app.core.cache import catalog_cache, quiz_payload_cache, version_watcher
+from app.core.query_log import query_log
+from app.routes.users import result_queue
+
+router = APIRouter()
+
+@router.get("/monitoring/pool", response_model=Dict)
+async def get_pool_stats():
+    """Get connection pool size, checkouts and wait times"""
+    return pool.stats()
+
+
+@router.get("/monitoring/cache", response_model=Dict)
+async def get_cache_stats():
+    """Get catalog, quiz payload and answer key cache sizes and hit/miss counters"""
+    return {
+        'catalog': catalog_cache.stats(),
+        'quiz_payloads': quiz_payload_cache.stats(),
+        'answer_keys': answer_keys.stats(),
+        'versions': version_watcher.stats()
+    }
+
+
+@router.get("/monitoring/results-queue", response_model=Dict)
+async def get_results_queue_stats():
+    """Get quiz result write queue depth, batch sizes and flush latency"""
+    return result_queue.stats()
+
+
+@router.get("/monitoring/queries", response_model=Dict)
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=500),
+    order: Literal["total", "max", "calls", "slow"] = "total"
+):
+    """Get the top statements by total time, with the query plan of slow ones"""
+    if not query_log.enabled:
+        raise HTTPException(status_code=404, detail="Slow-query log is disabled")
+    return {**query_log.stats(), 'queries': query_log.top(limit, order)}
+
+
+@router.delete("/monitoring/queries", response_model=Dict)
+async def reset_query_stats():
+    """Clear per-statement totals and captured plans"""
+    query_log.reset()
+    return {"message": "Query stats cleared"}
@@ -1,69 +1,45 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict
-from databases import Database
-from app.database import get_db
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from typing import List, Dict, Optional
+from app.database import get_session, pool, session_for, session_write
+from app.core.cache import quiz_etag, quiz_payload_cache, version_watcher
+from app.core.config import get_settings
+from app.core.etag import matching_etag, not_modified
+from app.core.compression import EncodedBody, PrecompressedJSONResponse
+from app.core.sampling import question_sampler
+from app.core.serialization import FastJSONResponse, encode_record, encode_records, splice_member
 from app.models.schemas import Question, QuestionCreate, QuizWithQuestions
+from app.models.quiz import Quiz as QuizModel
+from app.models.question import INSERT_COLUMNS, Question as QuestionModel
+from app.models.session import Session
 import json
-import traceback
 
 router = APIRouter()
+settings = get_settings()
+
+MAX_RANDOM_QUESTIONS = 50
+QUESTION_LIST = TypeAdapter(List[Question])
 
 @router.post("/questions", response_model=Dict)
-async def add_questions(questions: List[QuestionCreate], db: Database = Depends(get_db)):
+async def add_questions(questions: List[QuestionCreate]):
     """Add multiple questions to quizzes"""
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # create_many runs its own transactions
+        inserted, errors = await session_write(
+            lambda session: QuestionModel.create_many(
+                session, [(index, question.model_dump()) for index, question in enumerate(questions)]
+            ),
+            transaction=False
+        )
 
+        # Build the response from the submitted data instead of re-reading it
         results = []
-        errors = []
-
-        for index, question in enumerate(questions):
-            try:
-                # Verify quiz exists
-                cursor.execute("SELECT id FROM quiz WHERE id = ?", (question.quiz_id,))
-                quiz = cursor.fetchone()
-
-                if not quiz:
-                    errors.append({
-                        'index': index,
-                        'error': f'Quiz with ID {question.quiz_id} not found'
-                    })
-                    continue
-
-                choices_json = json.dumps(question.choices)
-
-                cursor.execute('''
-                    INSERT INTO questions (
-                        quiz_id, question_text, choices, correct_answer_index,
-                        explanation, category, difficulty, image
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    question.quiz_id,
-                    question.question_text,
-                    choices_json,
-                    question.correct_answer_index,
-                    question.explanation,
-                    question.category,
-                    question.difficulty,
-                    question.image
-                ))
-
-                new_question_id = cursor.lastrowid
-                cursor.execute("SELECT * FROM questions WHERE id = ?", (new_question_id,))
-                new_question = dict(cursor.fetchone())
-                new_question['choices'] = json.loads(new_question['choices'])
-                results.append(new_question)
-
-            except Exception as e:
-                errors.append({
-                    'index': index,
-                    'error': str(e)
-                })
-
-        conn.commit()
+        for index, question_id in inserted:
+            new_question = {'id': question_id}
+            for column in INSERT_COLUMNS:
+                new_question[column] = getattr(questions[index], column)
+            results.append(new_question)
 
         response = {
             'success': True,
@@ -79,70 +55,248 @@ async def add_questions(questions: List[QuestionCreate], db: Database = Depends(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
 
-@router.delete("/questions/{question_id}")
-async def delete_question(question_id: int, db: Database = Depends(get_db)):
-    """Delete a specific question"""
+NDJSON_MEDIA_TYPES = ('application/x-ndjson', 'application/ndjson')
+
+class ImportStreamingResponse(StreamingResponse):
+    """StreamingResponse that leaves the request body to the import generator.
+
+    Starlette normally watches for client disconnects by reading ``receive``
+    while it streams, which would swallow the upload the import is still
+    reading. A disconnect still surfaces as ClientDisconnect from the body.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def _ndjson_lines(request: Request, max_line_bytes: int):
+    """Yield (line_number, line) for each body line as it arrives.
+
+    A line longer than ``max_line_bytes`` is discarded while it streams in
+    and yielded as ``None`` so memory stays bounded.
+    """
+    buffer = b''
+    line_number = 0
+    oversized = False
+
+    async for chunk in request.stream():
+        lines = (buffer + chunk).split(b'\n')
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            yield line_number, None if oversized or len(line) > max_line_bytes else line
+            oversized = False
+        if len(buffer) > max_line_bytes:
+            buffer = b''
+            oversized = True
+
+    if oversized or buffer.strip():
+        yield line_number + 1, None if oversized or len(buffer) > max_line_bytes else buffer
+
+def _validation_message(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'line'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+async def _import_batch(batch, failed, session: Session) -> List[Dict]:
+    """Insert one batch as a write and return its per-line results"""
+    results = [{'line': line, 'success': False, 'error': error} for line, error in failed]
+    if batch:
+        inserted, errors = await session_write(
+            lambda session: QuestionModel.create_many(
+                session, [(line, question.model_dump()) for line, question in batch]
+            ),
+            transaction=False,
+            session=session
+        )
+        results.extend({'line': line, 'success': True, 'id': question_id} for line, question_id in inserted)
+        results.extend({'line': error['index'], 'success': False, 'error': error['error']} for error in errors)
+    results.sort(key=lambda result: result['line'])
+    return results
+
+async def _import_stream(request: Request):
+    batch_size = settings.IMPORT_BATCH_SIZE
+    # One session for the whole import, so each quiz is looked up once
+    session = Session()
+    batch = []
+    failed = []
+    total_added = 0
+    total_errors = 0
+
+    async def flush():
+        nonlocal batch, failed, total_added, total_errors
+        results = await _import_batch(batch, failed, session)
+        batch, failed = [], []
+        for result in results:
+            if result['success']:
+                total_added += 1
+            else:
+                total_errors += 1
+        return ''.join(json.dumps(result) + '\n' for result in results)
+
+    async for line_number, line in _ndjson_lines(request, settings.IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            failed.append((line_number, f'Line exceeds {settings.IMPORT_MAX_LINE_BYTES} bytes'))
+        elif not line.strip():
+            continue
+        else:
+            try:
+                batch.append((line_number, QuestionCreate.model_validate_json(line)))
+            except ValidationError as e:
+                failed.append((line_number, _validation_message(e)))
+
+        if len(batch) + len(failed) >= batch_size:
+            yield await flush()
+
+    if batch or failed:
+        yield await flush()
+
+    yield json.dumps({
+        'done': True,
+        'total_added': total_added,
+        'total_errors': total_errors
+    }) + '\n'
+
+@router.post("/questions/import")
+async def import_questions(request: Request):
+    """Stream-import questions from an NDJSON body, one question object per line.
+
+    Lines are validated and inserted in batches of IMPORT_BATCH_SIZE as they
+    arrive; the response streams one result object per line followed by a
+    summary object.
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in NDJSON_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail='Content-Type must be application/x-ndjson'
+        )
+
+    return ImportStreamingResponse(_import_stream(request), media_type='application/x-ndjson')
+
+@router.get("/questions/random",
+    response_model=List[Question],
+    summary="Get random questions",
+    description="Draw distinct random questions, optionally skipping ones a user has already answered"
+)
+async def get_random_questions(
+    category: Optional[str] = Query(default=None, description="Only questions in this category"),
+    difficulty: Optional[str] = Query(default=None, description="Only questions of this difficulty"),
+    count: int = Query(default=10, ge=1, le=MAX_RANDOM_QUESTIONS, description="Number of questions"),
+    email: Optional[str] = Query(default=None, description="Skip questions this user has already answered"),
+    seed: Optional[int] = Query(default=None, description="Seed for a reproducible sample"),
+    session: Session = Depends(get_session)
+):
+    exclude = ()
+    if email is not None:
+        users = await session.db.fetch_all("SELECT id FROM users WHERE email = ?", (email,))
+        if not users:
+            raise HTTPException(status_code=404, detail="User not found")
+        exclude = await QuestionModel.answered_by(session, users[0][0])
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if question_sampler.needs_refresh:
+            version = question_sampler.version
+            question_sampler.load(await QuestionModel.sampler_index(session), version)
 
-        cursor.execute("SELECT id FROM questions WHERE id = ?", (question_id,))
-        question = cursor.fetchone()
+        sampled_ids = question_sampler.sample(count, category, difficulty, exclude, seed)
 
-        if not question:
-            raise HTTPException(
-                status_code=404,
-                detail=f'Question with ID {question_id} not found'
+        # Fetch every chosen question in one query, keeping the sampled order
+        questions_by_id = await QuestionModel.get_many(session, sampled_ids)
+        questions = [questions_by_id[question_id] for question_id in sampled_ids if questions_by_id[question_id] is not None]
+
+        if settings.VALIDATE_RESPONSES:
+            body = QUESTION_LIST.dump_json(
+                QUESTION_LIST.validate_python([QuestionModel.decode(question) for question in questions])
             )
+        else:
+            # choices is stored as JSON text, so it is spliced in as is
+            body = encode_records(questions, ('choices',))
+        return FastJSONResponse(body)
 
-        cursor.execute("DELETE FROM questions WHERE id = ?", (question_id,))
-        conn.commit()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching random questions: {str(e)}"
+        )
 
-        return {
-            'success': True,
-            'message': f'Question with ID {question_id} was deleted successfully'
-        }
+@router.delete("/questions/{question_id}")
+async def delete_question(question_id: int):
+    """Delete a specific question"""
+    quiz_id = await session_write(lambda session: QuestionModel.delete(session, question_id))
+
+    if quiz_id is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f'Question with ID {question_id} not found'
+        )
+
+    return {
+        'success': True,
+        'message': f'Question with ID {question_id} was deleted successfully'
+    }
 
-    finally:
-        if conn:
-            conn.close()
+def _validated_quiz_payload(quiz, questions) -> bytes:
+    """Render a quiz with its questions through the QuizWithQuestions model"""
+    quiz_dict = dict(quiz)
+    quiz_dict['questions'] = [QuestionModel.decode(question) for question in questions]
+    return QuizWithQuestions.model_validate(quiz_dict).model_dump_json().encode()
 
 @router.get("/quizzes/{quiz_id}/questions", response_model=QuizWithQuestions)
-async def get_questions_by_quiz_id(quiz_id: int, db: Database = Depends(get_db)):
+async def get_questions_by_quiz_id(
+    quiz_id: int,
+    if_none_match: Optional[str] = Header(default=None)
+):
     """Get quiz details and all its questions"""
+    version = quiz_payload_cache.version(quiz_id)
+    # None until the quiz's shared version is known; it is read with the quiz
+    etag = quiz_etag(quiz_id)
+    if etag is not None:
+        matched = matching_etag(if_none_match, etag)
+        if matched is not None:
+            return not_modified(matched)
+
+        # Serve the pre-serialized body without touching the database
+        body = quiz_payload_cache.get(quiz_id)
+        if body is not None:
+            return PrecompressedJSONResponse(body, headers={'ETag': etag})
+
     try:
-        # First, get the quiz details
-        quiz_query = "SELECT * FROM quiz WHERE id = :quiz_id"
-        quiz = await db.fetch_one(quiz_query, values={"quiz_id": quiz_id})
-
-        if not quiz:
-            raise HTTPException(
-                status_code=404,
-                detail=f'Quiz with ID {quiz_id} not found'
-            )
+        async with pool.reader() as db:
+            session = session_for(db)
+
+            # Read before the quiz, so a write in between can only make
+            # the tag older than the body, never newer
+            await version_watcher.load_quiz(db, quiz_id)
+            etag = quiz_etag(quiz_id)
 
-        quiz_dict = dict(quiz)
+            # First, get the quiz details
+            quiz = await QuizModel.get(session, quiz_id)
 
-        # Get all questions for this quiz
-        questions_query = "SELECT * FROM questions WHERE quiz_id = :quiz_id"
-        questions = await db.fetch_all(questions_query, values={"quiz_id": quiz_id})
+            if not quiz:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f'Quiz with ID {quiz_id} not found'
+                )
 
-        question_list = []
-        for question in questions:
-            question_dict = dict(question)
-            if 'choices' in question_dict and question_dict['choices']:
-                try:
-                    question_dict['choices'] = json.loads(question_dict['choices'])
-                except json.JSONDecodeError:
-                    pass
-            question_list.append(question_dict)
+            # Get all questions for this quiz
+            questions = await QuestionModel.get_by_quiz(session, quiz_id)
 
-        quiz_dict['questions'] = question_list
-        return quiz_dict
+        if settings.VALIDATE_RESPONSES:
+            body = _validated_quiz_payload(quiz, questions)
+        else:
+            # choices is stored as JSON text, so it is spliced in as is
+            body = splice_member(
+                encode_record(quiz), 'questions', encode_records(questions, ('choices',))
+            )
 
+        # Cache the rendered and compressed body for later requests
+        body = EncodedBody(body)
+        quiz_payload_cache.put(quiz_id, version, body)
+        return PrecompressedJSONResponse(body, headers={'ETag': etag})
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,34 +1,96 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Query, Header, Response
+from pydantic import TypeAdapter
 from typing import List, Dict, Optional
-from databases import Database
-from app.database import get_db
-from app.models.schemas import Quiz, QuizCreate, Question, QuestionCreate, QuizWithQuestions
+from app.database import pool, session_for, session_write
+from app.core.cache import catalog_cache, catalog_etag
+from app.core.etag import matching_etag, not_modified
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor
+from app.core.config import get_settings
+from app.core.sampling import category_sampler
+from app.core.compression import EncodedBody, PrecompressedJSONResponse
+from app.core.serialization import dumps, encode_records
+from app.models.schemas import Quiz, QuizCreate
+from app.models.quiz import Quiz as QuizModel
 import sqlite3
-from datetime import datetime
-import json
-import traceback
 
 router = APIRouter()
+settings = get_settings()
+
+QUIZ_LIST = TypeAdapter(List[Quiz])
+
+# Bounds the work per request and the cached (limit, seed) variants
+MAX_SAMPLES_PER_CATEGORY = 20
+
+def _render_quizzes(quizzes) -> EncodedBody:
+    """Encode quiz rows, through the Quiz model unless validation is off"""
+    if settings.VALIDATE_RESPONSES:
+        return EncodedBody(QUIZ_LIST.dump_json(QUIZ_LIST.validate_python([dict(quiz) for quiz in quizzes])))
+    return EncodedBody(encode_records(quizzes))
+
+def _quizzes_response(etag: str, body: EncodedBody, next_cursor: Optional[str]) -> PrecompressedJSONResponse:
+    headers = {'ETag': etag}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return PrecompressedJSONResponse(body, headers=headers)
 
 @router.get("/quizzes",
     response_model=List[Quiz],
     summary="Get all quizzes",
-    description="Retrieve all quizzes, optionally filtered by category"
+    description=(
+        "Retrieve quizzes, optionally filtered by category and difficulty. "
+        "Pass limit (and the X-Next-Cursor value as after) to page through "
+        "them newest first."
+    )
 )
 async def get_quizzes(
     category: Optional[str] = None,
-    db: Database = Depends(get_db)
+    difficulty: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None)
 ):
+    paged = limit is not None or after is not None
+    if paged:
+        limit = limit or DEFAULT_PAGE_SIZE
+    if after is not None:
+        try:
+            after_created_at, after_id = decode_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        if category:
-            query = "SELECT * FROM quiz WHERE category = :category"
-            quizzes = await db.fetch_all(query=query, values={"category": category})
-        else:
-            query = "SELECT * FROM quiz"
-            quizzes = await db.fetch_all(query=query)
-
-        # Convert the results to a list of dictionaries
-        return [dict(quiz) for quiz in quizzes]
+        version = catalog_cache.version
+        etag = catalog_etag()
+        matched = matching_etag(if_none_match, etag)
+        if matched is not None:
+            return not_modified(matched)
+
+        # Entries hold the rendered and compressed body, so a hit skips
+        # validation and compression too
+        cache_key = ('quizzes', category or None, difficulty or None, limit, after)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            return _quizzes_response(etag, *cached)
+
+        # A reader is only checked out on a miss, so hits never wait for one.
+        # A page fetches one extra row to learn whether another follows
+        async with pool.reader() as db:
+            quizzes = await QuizModel.get_all(
+                session_for(db),
+                category=category,
+                difficulty=difficulty,
+                after=(after_created_at, after_id) if after is not None else None,
+                limit=limit + 1 if paged else None
+            )
+
+        next_cursor = None
+        if paged and len(quizzes) > limit:
+            quizzes = quizzes[:limit]
+            next_cursor = encode_cursor(quizzes[-1]['created_at'], quizzes[-1]['id'])
+
+        body = _render_quizzes(quizzes)
+        catalog_cache.set(cache_key, (body, next_cursor), version)
+        return _quizzes_response(etag, body, next_cursor)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -41,29 +103,9 @@ async def get_quizzes(
     summary="Create a new quiz",
     description="Create a new quiz with the provided details"
 )
-async def create_quiz(
-    quiz: QuizCreate,
-    db: Database = Depends(get_db)
-):
+async def create_quiz(quiz: QuizCreate):
     try:
-        current_time = datetime.now().date().isoformat()  # Format as YYYY-MM-DD
-
-        query = """
-            INSERT INTO quiz (name, description, image, category, difficulty, created_at)
-            VALUES (:name, :description, :image, :category, :difficulty, :created_at)
-        """
-        values = {
-            **quiz.dict(),
-            "created_at": current_time
-        }
-
-        quiz_id = await db.execute(query=query, values=values)
-
-        # Fetch the created quiz
-        fetch_query = "SELECT * FROM quiz WHERE id = :id"
-        created_quiz = await db.fetch_one(fetch_query, values={"id": quiz_id})
-
-        return dict(created_quiz)
+        return await session_write(lambda session: QuizModel.create(session, quiz.model_dump()))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -71,25 +113,14 @@ async def create_quiz(
         )
 
 @router.delete("/quizzes/{quiz_id}", status_code=200)
-async def delete_quiz(quiz_id: int, db: Database = Depends(get_db)):
+async def delete_quiz(quiz_id: int):
     """Delete a quiz and its questions"""
     try:
-        conn = await db.connection()
-        cursor = conn.cursor()
+        questions_deleted = await session_write(lambda session: QuizModel.delete(session, quiz_id))
 
-        cursor.execute("SELECT id FROM quiz WHERE id = ?", (quiz_id,))
-        quiz = cursor.fetchone()
-
-        if not quiz:
+        if questions_deleted is None:
             raise HTTPException(status_code=404, detail=f"Quiz with ID {quiz_id} not found")
 
-        conn.execute("BEGIN TRANSACTION")
-        cursor.execute("DELETE FROM questions WHERE quiz_id = ?", (quiz_id,))
-        questions_deleted = cursor.rowcount
-        cursor.execute("DELETE FROM quiz WHERE id = ?", (quiz_id,))
-
-        conn.commit()
-
         return {
             "success": True,
             "message": f"Quiz with ID {quiz_id} was deleted successfully",
@@ -99,10 +130,7 @@ async def delete_quiz(quiz_id: int, db: Database = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/quizzes/with-questions")
-async def create_quiz_with_questions(
-    data: Dict,
-    db: Database = Depends(get_db)
-):
+async def create_quiz_with_questions(data: Dict):
     """Create a new quiz with questions"""
     try:
         if 'quiz' not in data:
@@ -110,68 +138,20 @@ async def create_quiz_with_questions(
         if 'questions' not in data or not isinstance(data['questions'], list):
             raise HTTPException(status_code=400, detail="Missing or invalid questions array")
 
-        quiz_data = data['quiz']
-        questions_data = data['questions']
-
-        # Create quiz
-        quiz_query = """
-            INSERT INTO quiz (name, description, image, category, difficulty, created_at)
-            VALUES (:name, :description, :image, :category, :difficulty, :created_at)
-        """
-        quiz_values = {
-            **quiz_data,
-            "created_at": datetime.now().strftime('%Y-%m-%d')
-        }
-
-        quiz_id = await db.execute(query=quiz_query, values=quiz_values)
-
-        # Insert questions
-        inserted_questions = []
-        for question in questions_data:
-            question['quiz_id'] = quiz_id
-            choices_json = json.dumps(question['choices'])
-
-            question_query = """
-                INSERT INTO questions (
-                    quiz_id, question_text, choices, correct_answer_index,
-                    explanation, category, difficulty, image
-                ) VALUES (
-                    :quiz_id, :question_text, :choices, :correct_answer_index,
-                    :explanation, :category, :difficulty, :image
-                )
-            """
-            question_values = {
-                **question,
-                "choices": choices_json
-            }
-
-            question_id = await db.execute(query=question_query, values=question_values)
-
-            # Fetch the created question
-            fetch_query = "SELECT * FROM questions WHERE id = :id"
-            new_question = await db.fetch_one(
-                query=fetch_query,
-                values={"id": question_id}
-            )
-
-            question_dict = dict(new_question)
-            question_dict['choices'] = json.loads(question_dict['choices'])
-            inserted_questions.append(question_dict)
-
-        # Fetch the created quiz
-        fetch_quiz_query = "SELECT * FROM quiz WHERE id = :id"
-        created_quiz = await db.fetch_one(
-            query=fetch_quiz_query,
-            values={"id": quiz_id}
+        # The quiz and all its questions commit together or not at all
+        created_quiz, inserted_questions = await session_write(
+            lambda session: QuizModel.create_with_questions(session, data['quiz'], data['questions'])
         )
 
         return {
             'success': True,
-            'quiz': dict(created_quiz),
+            'quiz': created_quiz,
             'questions': inserted_questions,
             'total_questions': len(inserted_questions)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -181,40 +161,60 @@ async def create_quiz_with_questions(
     description="Retrieve random quizzes from each category"
 )
 async def get_category_samples(
-    limit: int = Query(default=3, description="Number of quizzes per category"),
-    db: Database = Depends(get_db)
+    response: Response,
+    limit: int = Query(default=3, ge=1, le=MAX_SAMPLES_PER_CATEGORY, description="Number of quizzes per category"),
+    seed: Optional[int] = Query(default=None, description="Seed for a reproducible sample"),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     try:
-        # Get all unique categories
-        categories_query = "SELECT DISTINCT category FROM quiz ORDER BY category"
-        categories = await db.fetch_all(query=categories_query)
-
-        result = {}
-        for category_row in categories:
-            category = category_row['category']
-            # Get random quizzes for this category
-            quizzes_query = """
-                SELECT * FROM quiz
-                WHERE category = :category
-                ORDER BY RANDOM()
-                LIMIT :limit
-            """
-            quizzes = await db.fetch_all(
-                query=quizzes_query,
-                values={"category": category, "limit": limit}
+        # A seeded sample is deterministic for a catalog version, so it can be
+        # cached and revalidated; an unseeded one is new on every call
+        catalog_version = catalog_cache.version
+        cache_key = ('category-samples', limit, seed)
+        if seed is not None:
+            etag = catalog_etag()
+            matched = matching_etag(if_none_match, etag)
+            if matched is not None:
+                return not_modified(matched)
+            response.headers['ETag'] = etag
+
+            # Seeded samples are cached rendered and compressed
+            cached = catalog_cache.get(cache_key)
+            if cached is not None:
+                return PrecompressedJSONResponse(cached, headers={'ETag': etag})
+
+        async with pool.reader() as db:
+            session = session_for(db)
+            if category_sampler.needs_refresh:
+                version = category_sampler.version
+                category_sampler.load(await QuizModel.category_index(session), version)
+
+            sampled_ids = category_sampler.sample(limit, seed)
+
+            # Fetch every chosen quiz in one query
+            quizzes_by_id = await QuizModel.get_many(
+                session, [quiz_id for ids in sampled_ids.values() for quiz_id in ids]
             )
 
-            result[category] = [dict(quiz) for quiz in quizzes]
+        result = {
+            category: [quizzes_by_id[quiz_id] for quiz_id in ids if quizzes_by_id[quiz_id] is not None]
+            for category, ids in sampled_ids.items()
+        }
 
-        return {
+        payload = {
             'success': True,
             'samples': result,
-            'total_categories': len(categories),
+            'total_categories': len(result),
             'quizzes_per_category': limit
         }
+        if seed is not None:
+            body = EncodedBody(dumps(payload))
+            catalog_cache.set(cache_key, body, catalog_version)
+            return PrecompressedJSONResponse(body, headers={'ETag': etag})
+        return payload
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching category samples: {str(e)}"
-        )
\ No newline at end of file
+        )
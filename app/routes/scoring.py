@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Response
+from typing import Optional
+from app.database import pool, session_for
+from app.core.answer_keys import AnswerKey, answer_keys, score_answers
+from app.core.write_behind import QueueFull
+from app.models.schemas import AnswerSubmission, ScoreResponse
+from app.models.question import Question
+from app.models.quiz import Quiz
+from app.routes.users import record_quiz_result
+from datetime import datetime
+import json
+
+router = APIRouter()
+
+async def get_answer_key(quiz_id: int) -> Optional[AnswerKey]:
+    """Return the quiz's answer key, loading it on first use; None if the quiz doesn't exist"""
+    key = answer_keys.get(quiz_id)
+    if key is not None:
+        return key
+
+    version = answer_keys.version(quiz_id)
+    async with pool.reader() as db:
+        session = session_for(db)
+        rows = await Question.answer_key(session, quiz_id)
+        if not rows and await Quiz.get(session, quiz_id) is None:
+            return None
+
+    return answer_keys.load(quiz_id, rows, version)
+
+@router.post("/quizzes/{quiz_id}/score", response_model=ScoreResponse)
+async def score_quiz(quiz_id: int, submission: AnswerSubmission, response: Response):
+    """Score chosen answers on the server, optionally saving the result for a user"""
+    key = await get_answer_key(quiz_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail=f'Quiz with ID {quiz_id} not found')
+
+    correct, results, unknown = score_answers(key, submission.answers)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Questions not in quiz {quiz_id}: {', '.join(str(question_id) for question_id in unknown)}"
+        )
+
+    total = len(results)
+    scored = {
+        'quiz_id': quiz_id,
+        'score': round(100 * correct / total, 2) if total else 0.0,
+        'correct': correct,
+        'total': total,
+        'results': results,
+        'result_id': None
+    }
+
+    if submission.email:
+        item = {
+            "email": submission.email,
+            "quiz_id": quiz_id,
+            "score": scored['score'],
+            "answers": json.dumps(submission.answers),
+            "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        try:
+            scored['result_id'] = await record_quiz_result(item)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '1'})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if scored['result_id'] is None:
+            response.status_code = 202
+
+    return scored
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, Optional
+from databases.core import Connection
+from app.database import get_db
+from app.core.search import SEARCH_CANDIDATES, SEARCH_QUERIES, SEARCH_TYPES, build_match_query, highlight
+
+router = APIRouter()
+
+@router.get(
+    "/search",
+    response_model=Dict,
+    description=(
+        "Results are ranked by BM25. When a query matches more than "
+        f"{SEARCH_CANDIDATES:,} rows, only the newest {SEARCH_CANDIDATES:,} matches are ranked, "
+        "so an older row can be left out even if it would score higher; "
+        "add words or filters to narrow a broad query. "
+        "snippet is HTML: the stored text escaped, with the matches in <mark>."
+    )
+)
+async def search(
+    q: str = Query(..., min_length=1, description="Words to search for; end a word with * for a prefix match"),
+    kind: str = Query(default='questions', alias='type', description="questions or quizzes"),
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    prefix: bool = Query(default=True, description="Treat the last word as a prefix"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=800),
+    db: Connection = Depends(get_db)
+):
+    """Full-text search over question text and explanations, or quiz names and descriptions"""
+    if kind not in SEARCH_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported type '{kind}', use one of: {', '.join(SEARCH_TYPES)}"
+        )
+
+    match_query = build_match_query(q, prefix)
+    if match_query is None:
+        raise HTTPException(status_code=400, detail="Search query has no words")
+
+    filters = ""
+    values = {
+        "query": match_query,
+        "limit": limit + 1,
+        "offset": offset,
+        "candidates": SEARCH_CANDIDATES
+    }
+    if category:
+        filters += " AND q.category = :category"
+        values["category"] = category
+    if difficulty:
+        filters += " AND q.difficulty = :difficulty"
+        values["difficulty"] = difficulty
+
+    try:
+        rows = await db.fetch_all(SEARCH_QUERIES[kind].format(filters=filters), values=values)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    results = []
+    for row in rows[:limit]:
+        result = dict(row)
+        result['score'] = -result.pop('rank')
+        result['snippet'] = highlight(result['snippet'])
+        results.append(result)
+
+    return {
+        'query': q,
+        'type': kind,
+        'results': results,
+        'limit': limit,
+        'offset': offset,
+        'has_more': len(rows) > limit
+    }
@@ -1,88 +1,208 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List
-from databases import Database
-from app.database import get_db
-from app.models.schemas import (
-    UserCreate, User, QuizResult, QuizResultResponse,
-    UserStatsResponse
-)
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import Dict, List, Optional, Tuple, Union
+from databases.core import Connection
+from app.database import get_db, in_params, pool, session_for
+from app.core.config import get_settings
+from app.core.leaderboard import leaderboards
+from app.core.write_behind import QueueFull, WriteBehindQueue
+from app.stats import UPDATE_USER_STATS_QUERY, UPDATE_USER_CATEGORY_STATS_QUERY
+from app.models.quiz import Quiz
+from app.models.schemas import UserCreate, QuizResult
 import json
 from datetime import datetime
 
 router = APIRouter()
+settings = get_settings()
+
+async def _create_user(db: Connection, email: str) -> Dict:
+    # Check if user exists
+    query = "SELECT id FROM users WHERE email = :email"
+    existing_user = await db.fetch_one(query=query, values={"email": email})
+
+    if existing_user:
+        return {
+            'success': False,
+            'message': 'User already exists',
+            'user_id': existing_user['id']
+        }
+
+    # Create new user
+    query = """
+        INSERT INTO users (email, created_at)
+        VALUES (:email, :created_at)
+    """
+    values = {
+        "email": email,
+        "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+    user_id = await db.execute(query=query, values=values)
+
+    return {
+        'success': True,
+        'message': 'User created successfully',
+        'user_id': user_id
+    }
 
 @router.post("/users", response_model=Dict)
-async def create_user(user: UserCreate, db: Database = Depends(get_db)):
+async def create_user(user: UserCreate):
     """Create a new user or return existing user"""
     try:
-        # Check if user exists
-        query = "SELECT id FROM users WHERE email = :email"
-        existing_user = await db.fetch_one(query=query, values={"email": user.email})
+        return await pool.write(lambda db: _create_user(db, user.email))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if existing_user:
-            return {
-                'success': False,
-                'message': 'User already exists',
-                'user_id': existing_user['id']
+async def _user_ids(db: Connection, emails) -> Dict[str, int]:
+    """Look up users by email, creating the ones that don't exist yet"""
+    placeholders, values = in_params("email", emails)
+    users = await db.fetch_all(
+        query=f"SELECT id, email FROM users WHERE email IN ({placeholders})",
+        values=values
+    )
+    user_ids = {user['email']: user['id'] for user in users}
+
+    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for email in emails:
+        if email not in user_ids:
+            user_ids[email] = await db.execute(
+                query="INSERT INTO users (email, created_at) VALUES (:email, :created_at)",
+                values={"email": email, "created_at": created_at}
+            )
+    return user_ids
+
+async def _write_quiz_results(db: Connection, results: List[Dict]) -> Tuple[List[int], List[Tuple]]:
+    user_ids = await _user_ids(db, {result['email'] for result in results})
+
+    # Which (user, quiz) pairs already have a result, for unique_quizzes
+    user_placeholders, values = in_params("user_id", set(user_ids.values()))
+    quiz_placeholders, quiz_values = in_params("quiz_id", {result['quiz_id'] for result in results})
+    values.update(quiz_values)
+    seen_rows = await db.fetch_all(
+        query=f"""
+            SELECT DISTINCT user_id, quiz_id FROM quiz_results
+            WHERE user_id IN ({user_placeholders}) AND quiz_id IN ({quiz_placeholders})
+        """,
+        values=values
+    )
+    seen = {(row['user_id'], row['quiz_id']) for row in seen_rows}
+
+    quizzes = await Quiz.get_many(session_for(db), {result['quiz_id'] for result in results})
+    categories = {quiz_id: quiz['category'] for quiz_id, quiz in quizzes.items() if quiz is not None}
+
+    result_ids = []
+    entries = []
+    user_stats = []
+    category_stats = []
+    for result in results:
+        user_id = user_ids[result['email']]
+        result_ids.append(await db.execute(
+            query="""
+                INSERT INTO quiz_results (user_id, quiz_id, score, answers, completed_at)
+                VALUES (:user_id, :quiz_id, :score, :answers, :completed_at)
+            """,
+            values={
+                "user_id": user_id,
+                "quiz_id": result['quiz_id'],
+                "score": result['score'],
+                "answers": result['answers'],
+                "completed_at": result['completed_at']
             }
+        ))
 
-        # Create new user
-        query = """
-            INSERT INTO users (email, created_at)
-            VALUES (:email, :created_at)
-        """
-        values = {
-            "email": user.email,
-            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        pair = (user_id, result['quiz_id'])
+        user_stats.append({"user_id": user_id, "score": result['score'], "new_quiz": 0 if pair in seen else 1})
+        category_stats.append({"user_id": user_id, "quiz_id": result['quiz_id'], "score": result['score']})
+        seen.add(pair)
+        entries.append((user_id, result['quiz_id'], categories.get(result['quiz_id']), result['score']))
 
-        user_id = await db.execute(query=query, values=values)
+    raw = db.raw_connection
+    await raw.executemany(UPDATE_USER_STATS_QUERY, user_stats)
+    await raw.executemany(UPDATE_USER_CATEGORY_STATS_QUERY, category_stats)
+    return result_ids, entries
 
-        return {
-            'success': True,
-            'message': 'User created successfully',
-            'user_id': user_id
-        }
+async def write_quiz_results(db: Connection, results: List[Dict]) -> List[Union[int, Exception]]:
+    """Save results and update the user stats in one transaction.
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    Each result is a dict with email, quiz_id, score, answers (JSON text)
+    and completed_at. Returns the new result id, or the exception that
+    stopped it from being saved, for each result in order. Leaderboards are
+    updated once the results have committed.
+    """
+    try:
+        async with db.transaction():
+            result_ids, entries = await _write_quiz_results(db, results)
+    except Exception:
+        if len(results) == 1:
+            raise
+    else:
+        for entry in entries:
+            leaderboards.record(*entry)
+        return result_ids
+
+    # Retry one by one so a bad result only fails itself
+    outcomes = []
+    for result in results:
+        try:
+            async with db.transaction():
+                result_ids, entries = await _write_quiz_results(db, [result])
+        except Exception as e:
+            outcomes.append(e)
+            continue
+        for entry in entries:
+            leaderboards.record(*entry)
+        outcomes.extend(result_ids)
+    return outcomes
+
+async def _write_result_batch(results: List[Dict]) -> List[Union[int, Exception]]:
+    # write_quiz_results runs its own transactions
+    return await pool.write(lambda db: write_quiz_results(db, results), transaction=False)
+
+# Groups result submissions into one transaction per batch
+result_queue = WriteBehindQueue(
+    _write_result_batch,
+    max_size=settings.RESULTS_QUEUE_MAX_SIZE,
+    batch_size=settings.RESULTS_BATCH_SIZE,
+    interval=settings.RESULTS_FLUSH_INTERVAL_MS / 1000,
+    enqueue_timeout=settings.RESULTS_ENQUEUE_TIMEOUT
+)
+
+async def record_quiz_result(item: Dict) -> Optional[int]:
+    """Save a result the way RESULTS_WRITE_MODE says; returns None once it is only queued.
+
+    Raises QueueFull when the write queue has no room.
+    """
+    if settings.RESULTS_WRITE_MODE == "queued":
+        await result_queue.submit(item, wait=False)
+        return None
+
+    if settings.RESULTS_WRITE_MODE == "commit":
+        return await result_queue.submit(item)
+
+    result_id = (await pool.write(lambda db: write_quiz_results(db, [item]), transaction=False))[0]
+    if isinstance(result_id, Exception):
+        raise result_id
+    return result_id
 
 @router.post("/users/{email}/results", response_model=Dict)
-async def save_quiz_result(email: str, result: QuizResult, db: Database = Depends(get_db)):
+async def save_quiz_result(email: str, result: QuizResult, response: Response):
     """Save a quiz result for a user"""
-    try:
-        # Get user ID
-        query = "SELECT id FROM users WHERE email = :email"
-        user = await db.fetch_one(query=query, values={"email": email})
+    item = {
+        "email": email,
+        "quiz_id": result.quiz_id,
+        "score": result.score,
+        "answers": json.dumps(result.answers),
+        "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
 
-        if not user:
-            # Create user if they don't exist
-            create_user_query = """
-                INSERT INTO users (email, created_at)
-                VALUES (:email, :created_at)
-            """
-            values = {
-                "email": email,
-                "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        result_id = await record_quiz_result(item)
+        if result_id is None:
+            response.status_code = 202
+            return {
+                'success': True,
+                'message': 'Quiz result queued',
+                'result_id': None
             }
-            user_id = await db.execute(query=create_user_query, values=values)
-        else:
-            user_id = user['id']
-
-        # Save quiz result
-        query = """
-            INSERT INTO quiz_results (user_id, quiz_id, score, answers, completed_at)
-            VALUES (:user_id, :quiz_id, :score, :answers, :completed_at)
-        """
-        values = {
-            "user_id": user_id,
-            "quiz_id": result.quiz_id,
-            "score": result.score,
-            "answers": json.dumps(result.answers),
-            "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-
-        result_id = await db.execute(query=query, values=values)
 
         return {
             'success': True,
@@ -90,11 +210,13 @@ async def save_quiz_result(email: str, result: QuizResult, db: Database = Depend
             'result_id': result_id
         }
 
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '1'})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/users/{email}/results")
-async def get_user_results(email: str, db: Database = Depends(get_db)):
+async def get_user_results(email: str, db: Connection = Depends(get_db)):
     """Get all quiz results for a user"""
     try:
         # Get user ID
@@ -136,57 +258,57 @@ async def get_user_results(email: str, db: Database = Depends(get_db)):
             'total_results': len(formatted_results)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/users/{email}/stats", response_model=Dict)
-async def get_user_stats(email: str, db: Database = Depends(get_db)):
+async def get_user_stats(email: str, db: Connection = Depends(get_db)):
     """Get user statistics across all quizzes"""
     try:
-        # Get user ID
-        query = "SELECT id FROM users WHERE email = :email"
-        user = await db.fetch_one(query=query, values={"email": email})
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Get overall stats
+        # User and running totals in one point lookup
         stats_query = """
-            SELECT
-                COUNT(*) as total_quizzes,
-                AVG(score) as average_score,
-                MAX(score) as highest_score,
-                MIN(score) as lowest_score,
-                COUNT(DISTINCT quiz_id) as unique_quizzes
-            FROM quiz_results
-            WHERE user_id = :user_id
+            SELECT u.id, s.total_quizzes, s.score_sum, s.highest_score, s.lowest_score, s.unique_quizzes
+            FROM users u
+            LEFT JOIN user_stats s ON s.user_id = u.id
+            WHERE u.email = :email
         """
-        stats = await db.fetch_one(stats_query, values={"user_id": user['id']})
+        stats = await db.fetch_one(stats_query, values={"email": email})
+
+        if not stats:
+            raise HTTPException(status_code=404, detail="User not found")
 
-        # Get category breakdown
+        # Category breakdown, kept in category order by the primary key
         categories_query = """
-            SELECT
-                q.category,
-                COUNT(*) as quizzes_taken,
-                AVG(qr.score) as average_score
-            FROM quiz_results qr
-            JOIN quiz q ON qr.quiz_id = q.id
-            WHERE qr.user_id = :user_id
-            GROUP BY q.category
+            SELECT category, quizzes_taken, score_sum
+            FROM user_category_stats
+            WHERE user_id = :user_id
+            ORDER BY category
         """
-        categories = await db.fetch_all(categories_query, values={"user_id": user['id']})
+        categories = await db.fetch_all(categories_query, values={"user_id": stats['id']})
 
+        total_quizzes = stats['total_quizzes'] or 0
         return {
             'email': email,
-            'overall_stats': dict(stats) if stats else {
-                'total_quizzes': 0,
-                'average_score': 0,
-                'highest_score': 0,
-                'lowest_score': 0,
-                'unique_quizzes': 0
+            'overall_stats': {
+                'total_quizzes': total_quizzes,
+                'average_score': stats['score_sum'] / total_quizzes if total_quizzes else None,
+                'highest_score': stats['highest_score'],
+                'lowest_score': stats['lowest_score'],
+                'unique_quizzes': stats['unique_quizzes'] or 0
             },
-            'category_stats': [dict(cat) for cat in categories]
+            'category_stats': [
+                {
+                    'category': cat['category'],
+                    'quizzes_taken': cat['quizzes_taken'],
+                    'average_score': cat['score_sum'] / cat['quizzes_taken']
+                }
+                for cat in categories
+            ]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,103 @@
+import sqlite3
+import sys
+from typing import List, Optional, Tuple
+
+# Running totals for one new result. Named parameters work with both the
+# databases library and sqlite3, so the routes and the CLI share them.
+# :new_quiz is 1 when the user had no earlier result for the quiz.
+UPDATE_USER_STATS_QUERY = """
+    INSERT INTO user_stats (user_id, total_quizzes, score_sum, highest_score, lowest_score, unique_quizzes)
+    VALUES (:user_id, 1, :score, :score, :score, :new_quiz)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_quizzes = total_quizzes + 1,
+        score_sum = score_sum + excluded.score_sum,
+        highest_score = MAX(highest_score, excluded.highest_score),
+        lowest_score = MIN(lowest_score, excluded.lowest_score),
+        unique_quizzes = unique_quizzes + excluded.unique_quizzes
+"""
+
+# Results for a quiz that no longer exists have no category, as in the join
+UPDATE_USER_CATEGORY_STATS_QUERY = """
+    INSERT INTO user_category_stats (user_id, category, quizzes_taken, score_sum)
+    SELECT :user_id, category, 1, :score FROM quiz WHERE id = :quiz_id
+    ON CONFLICT (user_id, category) DO UPDATE SET
+        quizzes_taken = quizzes_taken + 1,
+        score_sum = score_sum + excluded.score_sum
+"""
+
+# Takes a quiz's results out of its category totals, as they drop out of
+# the join once the quiz is gone. Run before the quiz row is deleted.
+# Users come from the category's stats rows, so results are found through
+# the (user_id, quiz_id, score) index rather than a scan of quiz_results.
+REMOVE_QUIZ_CATEGORY_STATS_STATEMENTS: List[str] = [
+    """
+    UPDATE user_category_stats AS s
+    SET quizzes_taken = s.quizzes_taken - r.taken, score_sum = s.score_sum - r.total
+    FROM (
+        SELECT c.user_id, COUNT(*) AS taken, SUM(qr.score) AS total
+        FROM user_category_stats c
+        JOIN quiz_results qr ON qr.user_id = c.user_id AND qr.quiz_id = :quiz_id
+        WHERE c.category = :category
+        GROUP BY c.user_id
+    ) AS r
+    WHERE s.user_id = r.user_id AND s.category = :category
+    """,
+    "DELETE FROM user_category_stats WHERE category = :category AND quizzes_taken <= 0",
+]
+
+REBUILD_STATEMENTS: List[str] = [
+    "DELETE FROM user_category_stats",
+    "DELETE FROM user_stats",
+    """
+    INSERT INTO user_stats (user_id, total_quizzes, score_sum, highest_score, lowest_score, unique_quizzes)
+    SELECT user_id, COUNT(*), SUM(score), MAX(score), MIN(score), COUNT(DISTINCT quiz_id)
+    FROM quiz_results
+    GROUP BY user_id
+    """,
+    """
+    INSERT INTO user_category_stats (user_id, category, quizzes_taken, score_sum)
+    SELECT qr.user_id, q.category, COUNT(*), SUM(qr.score)
+    FROM quiz_results qr
+    JOIN quiz q ON qr.quiz_id = q.id
+    GROUP BY qr.user_id, q.category
+    """,
+]
+
+def rebuild_user_stats(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Recompute both stats tables from quiz_results in one transaction.
+
+    Returns the number of user_stats and user_category_stats rows written.
+    """
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in REBUILD_STATEMENTS:
+            conn.execute(statement)
+        users = conn.execute("SELECT COUNT(*) FROM user_stats").fetchone()[0]
+        categories = conn.execute("SELECT COUNT(*) FROM user_category_stats").fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return users, categories
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.config import get_settings
+
+    argv = sys.argv if argv is None else argv
+    command = argv[1] if len(argv) > 1 else "rebuild"
+    database = argv[2] if len(argv) > 2 else get_settings().database_path
+
+    if command != "rebuild":
+        print("Usage: python -m app.stats rebuild [database]")
+        return 2
+
+    conn = sqlite3.connect(database, isolation_level=None)
+    try:
+        users, categories = rebuild_user_stats(conn)
+    finally:
+        conn.close()
+    print(f"Rebuilt stats for {users} users ({categories} category rows)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
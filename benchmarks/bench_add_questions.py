@@ -0,0 +1,136 @@
+"""Rows/sec for POST /questions: the old per-row paths against the bulk path.
+
+Runs against a throwaway database in a temporary directory:
+
+    python benchmarks/bench_add_questions.py [rows]
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def make_questions(count, quiz_ids):
+    return [
+        {
+            'quiz_id': quiz_ids[i % len(quiz_ids)],
+            'question_text': f'Benchmark question {i}?',
+            'choices': ['Apple', 'Banana', 'Cherry', 'Date'],
+            'correct_answer_index': i % 4,
+            'explanation': 'Generated for the insert benchmark.',
+            'category': 'Benchmark',
+            'difficulty': 'Easy',
+            'image': 'https://example.com/bench.jpg'
+        }
+        for i in range(count)
+    ]
+
+def per_row_insert(conn, questions):
+    """The previous implementation: check, insert and re-read every row"""
+    cursor = conn.cursor()
+    results = []
+    for question in questions:
+        cursor.execute("SELECT id FROM quiz WHERE id = ?", (question['quiz_id'],))
+        if not cursor.fetchone():
+            continue
+        cursor.execute('''
+            INSERT INTO questions (
+                quiz_id, question_text, choices, correct_answer_index,
+                explanation, category, difficulty, image
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            question['quiz_id'], question['question_text'], json.dumps(question['choices']),
+            question['correct_answer_index'], question['explanation'],
+            question['category'], question['difficulty'], question['image']
+        ))
+        cursor.execute("SELECT * FROM questions WHERE id = ?", (cursor.lastrowid,))
+        row = dict(cursor.fetchone())
+        row['choices'] = json.loads(row['choices'])
+        results.append(row)
+    conn.commit()
+    return results
+
+async def per_row_insert_async(questions):
+    """The per-row pattern over the async connection, as create_quiz_with_questions does it"""
+    from app.database import pool
+
+    async def insert(db):
+        started = time.perf_counter()
+        for question in questions:
+            quiz = await db.fetch_one(
+                "SELECT id FROM quiz WHERE id = :id", values={"id": question['quiz_id']}
+            )
+            if not quiz:
+                continue
+            question_id = await db.execute(
+                """
+                INSERT INTO questions (
+                    quiz_id, question_text, choices, correct_answer_index,
+                    explanation, category, difficulty, image
+                ) VALUES (
+                    :quiz_id, :question_text, :choices, :correct_answer_index,
+                    :explanation, :category, :difficulty, :image
+                )
+                """,
+                values={**question, 'choices': json.dumps(question['choices'])}
+            )
+            await db.fetch_one("SELECT * FROM questions WHERE id = :id", values={"id": question_id})
+        return time.perf_counter() - started
+
+    await pool.open()
+    try:
+        # No transaction: each row commits on its own
+        elapsed = await pool.write(insert, transaction=False)
+    finally:
+        await pool.close()
+    return elapsed
+
+async def bulk_insert(questions):
+    """The current FastAPI route, which runs the insert on the pool's writer task"""
+    from app.database import pool
+    from app.models.schemas import QuestionCreate
+    from app.routes.questions import add_questions
+
+    payload = [QuestionCreate(**question) for question in questions]
+    await pool.open()
+    try:
+        started = time.perf_counter()
+        response = await add_questions(payload)
+        elapsed = time.perf_counter() - started
+    finally:
+        await pool.close()
+    return response, elapsed
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'trivia.db')}"
+        from app.database import get_db_connection, init_db
+
+        init_db()  # creates and seeds trivia.db here
+        conn = get_db_connection()
+        quiz_ids = [row['id'] for row in conn.execute("SELECT id FROM quiz")]
+        questions = make_questions(rows, quiz_ids)
+
+        started = time.perf_counter()
+        per_row_insert(conn, questions)
+        before = time.perf_counter() - started
+        conn.close()
+
+        before_async = asyncio.run(per_row_insert_async(questions))
+        response, after = asyncio.run(bulk_insert(questions))
+        assert response['total_added'] == rows, response.get('errors')
+
+    print(f"rows:              {rows}")
+    print(f"per-row (sqlite3): {before:8.3f}s  {rows / before:12,.0f} rows/sec")
+    print(f"per-row (async):   {before_async:8.3f}s  {rows / before_async:12,.0f} rows/sec")
+    print(f"bulk (route):      {after:8.3f}s  {rows / after:12,.0f} rows/sec")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Load, update and lookup speed of the in-memory leaderboards.
+
+Builds the boards from synthetic best scores (one per user and quiz, the
+worst case for memory), then times incremental results, rank lookups and
+top-N reads, and compares a rank lookup against the linear count an
+``ORDER BY score`` query has to do:
+
+    python benchmarks/bench_leaderboards.py [results]
+
+The default of 10M results needs roughly 4 GB of memory.
+"""
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.core.leaderboard import LeaderboardLoader, Leaderboards
+
+QUIZZES = 1000
+CATEGORIES = 20
+QUIZZES_PER_USER = 20
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {count / elapsed:>14,.0f} ops/sec  {elapsed / count * 1e6:>9.2f} us/op")
+
+def main():
+    results = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    users = max(1, results // QUIZZES_PER_USER)
+    rng = random.Random(42)
+    category_of = [f"category-{quiz_id % CATEGORIES}" for quiz_id in range(QUIZZES)]
+
+    print(f"{results:,} results, {users:,} users, {QUIZZES} quizzes, {CATEGORIES} categories")
+
+    boards = Leaderboards()
+    loader = LeaderboardLoader()
+    started = time.perf_counter()
+    for i in range(results):
+        # Every (user, quiz) pair appears once
+        user_id = i % users
+        quiz_id = (i // users + user_id) % QUIZZES
+        loader.add(user_id, quiz_id, category_of[quiz_id], float(rng.randrange(101)))
+    collected = time.perf_counter() - started
+    started = time.perf_counter()
+    boards.load(loader)
+    del loader
+    built = time.perf_counter() - started
+    print(f"collect rows {collected:.1f}s, build boards {built:.1f}s, "
+          f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB")
+
+    updates = 200_000
+    new_results = [
+        (rng.randrange(users), quiz_id, category_of[quiz_id], float(rng.randrange(101)))
+        for quiz_id in (rng.randrange(QUIZZES) for _ in range(updates))
+    ]
+    timed("record result", updates, lambda: [boards.record(*result) for result in new_results])
+
+    lookups = 100_000
+    members = [rng.randrange(users) for _ in range(lookups)]
+    timed("global rank", lookups, lambda: [boards.overall.rank(member) for member in members])
+    category_board = boards.categories[category_of[0]]
+    timed("category rank", lookups, lambda: [category_board.rank(member) for member in members])
+    quiz_board = boards.quizzes[0]
+    quiz_members = [member for _, member, _ in quiz_board.top(lookups)]
+    timed("quiz rank", len(quiz_members), lambda: [quiz_board.rank(member) for member in quiz_members])
+    timed("global top 10", 10_000, lambda: [boards.overall.top(10) for _ in range(10_000)])
+
+    # What a per-request ORDER BY has to do: look at every score
+    scores = {member: score for _, member, score in boards.overall.top(len(boards.overall))}
+    scans = 20
+    timed("global rank by linear scan", scans, lambda: [
+        sum(1 for score in scores.values() if score > scores[member]) + 1
+        for member in members[:scans]
+    ])
+
+if __name__ == '__main__':
+    main()
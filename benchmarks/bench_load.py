@@ -0,0 +1,320 @@
+"""In-process load benchmark for the API.
+
+Drives the FastAPI ``app`` from run.py through httpx's ASGI transport (no
+sockets, no server) with weighted request mixes at fixed concurrency
+levels, and reports p50/p95/p99 latency and throughput per route template:
+
+    python benchmarks/bench_load.py [--database trivia.db] [--mix browse,play,mixed]
+        [--concurrency 1,8,32] [--requests 2000] [--seed 42]
+        [--output results.json] [--baseline baseline.json] [--tolerance 0.25]
+        [--min-delta-ms 1.0] [--in-place]
+
+The run writes load users and their results, so by default it works on
+a temporary copy of the database and leaves the original untouched.
+Pass ``--in-place`` to skip the copy, e.g. for a database too large to
+copy; the load users and their results are then saved to it. Every
+request (route, quiz, user, answers) is drawn from ``--seed`` before a
+level starts, so two runs send the same requests in the same order.
+Settings come from the environment as usual, e.g.
+``RESULTS_WRITE_MODE=queued python benchmarks/bench_load.py``.
+
+``--output`` writes the results as JSON. Pass a previous output as
+``--baseline`` to compare against it: the run exits with status 1 when
+any route's p95 grows, or a level's throughput drops, by more than
+``--tolerance`` (a fraction), or when any request fails. A p95 has to
+grow by at least ``--min-delta-ms`` too, so sub-millisecond routes don't
+fail the run on scheduler noise.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+
+# Users that play quizzes during the run; a few of them play most of the
+# games, like on a real site
+USERS = 500
+SEARCH_TERMS = ['vitamin', 'protein', 'water', 'fiber', 'sugar', 'climate', 'history', 'food']
+
+class Catalog:
+    """What the request builders pick from, read from the database once"""
+
+    def __init__(self, database: str):
+        conn = sqlite3.connect(database)
+        self.quiz_ids = [row[0] for row in conn.execute("SELECT id FROM quiz ORDER BY id")]
+        self.categories = [row[0] for row in conn.execute("SELECT DISTINCT category FROM quiz ORDER BY category")]
+        self.questions = {}
+        for quiz_id, question_id, choices in conn.execute(
+            "SELECT quiz_id, id, choices FROM questions ORDER BY quiz_id, id"
+        ):
+            self.questions.setdefault(quiz_id, []).append((question_id, len(json.loads(choices or '[]')) or 1))
+        conn.close()
+
+        # Only quizzes with questions can be played
+        self.playable = [quiz_id for quiz_id in self.quiz_ids if quiz_id in self.questions]
+        self.emails = [f'load-user-{i}@example.com' for i in range(USERS)]
+        self.user_weights = [1 / (rank + 1) for rank in range(USERS)]
+
+    def user(self, rng: random.Random) -> str:
+        return rng.choices(self.emails, self.user_weights)[0]
+
+    def answers(self, rng: random.Random, quiz_id: int) -> dict:
+        return {str(question_id): rng.randrange(choices) for question_id, choices in self.questions[quiz_id]}
+
+# Request builders return (route template, method, url, json body)
+
+def get_categories(catalog, rng):
+    return 'GET /api/categories', 'GET', '/api/categories', None
+
+def list_quizzes(catalog, rng):
+    if rng.random() < 0.5:
+        category = rng.choice(catalog.categories)
+        return 'GET /api/quizzes', 'GET', f'/api/quizzes?category={category}', None
+    return 'GET /api/quizzes', 'GET', '/api/quizzes', None
+
+def category_samples(catalog, rng):
+    return ('GET /api/quizzes/category-samples', 'GET',
+            f'/api/quizzes/category-samples?seed={rng.randrange(10)}', None)
+
+def fetch_quiz(catalog, rng):
+    quiz_id = rng.choice(catalog.playable)
+    return 'GET /api/quizzes/{quiz_id}/questions', 'GET', f'/api/quizzes/{quiz_id}/questions', None
+
+def submit_score(catalog, rng):
+    quiz_id = rng.choice(catalog.playable)
+    body = {'answers': catalog.answers(rng, quiz_id), 'email': catalog.user(rng)}
+    return 'POST /api/quizzes/{quiz_id}/score', 'POST', f'/api/quizzes/{quiz_id}/score', body
+
+def save_result(catalog, rng):
+    quiz_id = rng.choice(catalog.playable)
+    body = {'quiz_id': quiz_id, 'score': rng.randrange(0, 101), 'answers': catalog.answers(rng, quiz_id)}
+    return 'POST /api/users/{email}/results', 'POST', f'/api/users/{catalog.user(rng)}/results', body
+
+def user_stats(catalog, rng):
+    return 'GET /api/users/{email}/stats', 'GET', f'/api/users/{catalog.user(rng)}/stats', None
+
+def user_results(catalog, rng):
+    return 'GET /api/users/{email}/results', 'GET', f'/api/users/{catalog.user(rng)}/results', None
+
+def leaderboard(catalog, rng):
+    if rng.random() < 0.5:
+        quiz_id = rng.choice(catalog.playable)
+        return 'GET /api/leaderboards/quizzes/{quiz_id}', 'GET', f'/api/leaderboards/quizzes/{quiz_id}', None
+    return 'GET /api/leaderboards/global', 'GET', '/api/leaderboards/global', None
+
+def search(catalog, rng):
+    return 'GET /api/search', 'GET', f'/api/search?q={rng.choice(SEARCH_TERMS)}', None
+
+# (weight, builder) per mix
+MIXES = {
+    # Visitors looking around the catalog
+    'browse': [(25, get_categories), (35, list_quizzes), (25, fetch_quiz), (10, category_samples), (5, search)],
+    # Players: load a quiz, submit answers, look at their stats
+    'play': [(35, fetch_quiz), (30, submit_score), (10, save_result), (15, user_stats), (10, user_results)],
+    # Everything, weighted roughly like production traffic
+    'mixed': [
+        (15, get_categories), (20, list_quizzes), (20, fetch_quiz), (5, category_samples),
+        (12, submit_score), (3, save_result), (10, user_stats), (5, user_results),
+        (7, leaderboard), (3, search)
+    ],
+}
+
+def build_requests(catalog, mix, count, seed):
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in MIXES[mix]]
+    builders = [builder for _, builder in MIXES[mix]]
+    return [builder(catalog, rng) for builder in rng.choices(builders, weights, k=count)]
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+async def run_level(client, requests, concurrency):
+    latencies = {}
+    errors = {}
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(requests):
+            route, method, url, body = requests[position]
+            position += 1
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.setdefault(route, []).append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                key = f'{route} {response.status_code}'
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, values in sorted(latencies.items()):
+        values.sort()
+        routes[route] = {
+            'count': len(values),
+            'throughput': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3)
+        }
+    return {
+        'requests': len(requests),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(requests) / elapsed, 1),
+        'errors': errors,
+        'routes': routes
+    }
+
+def print_level(mix, concurrency, level):
+    print(f"\n{mix} @ concurrency {concurrency}: {level['throughput']:,.0f} req/s, "
+          f"{level['requests']} requests in {level['seconds']:.2f}s")
+    print(f"  {'route':<42} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in level['routes'].items():
+        print(f"  {route:<42} {stats['count']:>6} {stats['throughput']:>8,.0f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    for key, count in level['errors'].items():
+        print(f"  ERROR {key}: {count}")
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Regressions of results against baseline, as printable lines"""
+    problems = []
+    for mix, levels in results['results'].items():
+        for concurrency, level in levels.items():
+            if level['errors']:
+                problems.append(f"{mix} @ {concurrency}: {sum(level['errors'].values())} failed requests")
+
+            base = baseline.get('results', {}).get(mix, {}).get(concurrency)
+            if base is None:
+                continue
+            if level['throughput'] < base['throughput'] * (1 - tolerance):
+                problems.append(
+                    f"{mix} @ {concurrency}: throughput {level['throughput']:,.0f} req/s "
+                    f"< baseline {base['throughput']:,.0f} req/s"
+                )
+            for route, stats in level['routes'].items():
+                base_route = base['routes'].get(route)
+                if (base_route
+                        and stats['p95_ms'] > base_route['p95_ms'] * (1 + tolerance)
+                        and stats['p95_ms'] - base_route['p95_ms'] >= min_delta_ms):
+                    problems.append(
+                        f"{mix} @ {concurrency}: {route} p95 {stats['p95_ms']:.2f} ms "
+                        f"> baseline {base_route['p95_ms']:.2f} ms"
+                    )
+    return problems
+
+async def benchmark(args, catalog):
+    # Imported here, once DATABASE_URL points at the database to load
+    from run import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            # Give every load user a result first, so stats and result
+            # lookups find them
+            rng = random.Random(args.seed)
+            for email in catalog.emails:
+                quiz_id = rng.choice(catalog.playable)
+                response = await client.post(
+                    f'/api/quizzes/{quiz_id}/score',
+                    json={'answers': catalog.answers(rng, quiz_id), 'email': email}
+                )
+                response.raise_for_status()
+
+            for mix in args.mix:
+                results[mix] = {}
+                if args.warmup:
+                    await run_level(client, build_requests(catalog, mix, args.warmup, args.seed - 1), 1)
+                for concurrency in args.concurrency:
+                    requests = build_requests(catalog, mix, args.requests, args.seed + concurrency)
+                    level = await run_level(client, requests, concurrency)
+                    results[mix][str(concurrency)] = level
+                    print_level(mix, concurrency, level)
+    return results
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(',') if item]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database', default=os.path.join(ROOT, 'trivia.db'))
+    parser.add_argument('--mix', type=parse_list, default=list(MIXES))
+    parser.add_argument('--concurrency', type=lambda value: parse_list(value, int), default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per mix and concurrency level')
+    parser.add_argument('--warmup', type=int, default=200, help='untimed requests before each mix')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a previous --output file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-delta-ms', type=float, default=1.0)
+    parser.add_argument('--in-place', action='store_true', help='write to the database itself instead of a temporary copy')
+    args = parser.parse_args()
+
+    unknown = [mix for mix in args.mix if mix not in MIXES]
+    if unknown:
+        parser.error(f"unknown mix {', '.join(unknown)}; choose from {', '.join(MIXES)}")
+
+    database = os.path.abspath(args.database)
+    catalog = Catalog(database)
+    if not catalog.playable:
+        parser.error(f'{database} has no quizzes with questions')
+    print(f"{len(catalog.quiz_ids)} quizzes, {sum(map(len, catalog.questions.values()))} questions, "
+          f"{USERS} load users")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = database
+        if not args.in_place:
+            target = os.path.join(tmp, 'trivia.db')
+            shutil.copy(database, target)
+        os.environ['DATABASE_URL'] = f'sqlite:///{target}'
+        results = {
+            'meta': {
+                'database': database,
+                'seed': args.seed,
+                'requests': args.requests,
+                'warmup': args.warmup,
+                'python': platform.python_version(),
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            },
+            'results': asyncio.run(benchmark(args, catalog))
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    problems = compare(results, baseline, args.tolerance, args.min_delta_ms)
+
+    if problems:
+        print(f"\n{len(problems)} regression(s):")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    if args.baseline:
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Per-request cost of the /metrics instrumentation.
+
+Runs the app once with METRICS_ENABLED=true and once with false, each in
+its own process, and calls it directly over ASGI (no HTTP client or
+server in the way) for cached routes, a route that queries the database
+and a 404. Both run against one temporary copy of the database, since
+starting the app applies any pending migrations. The two processes
+alternate a few times and the best round per route is kept, which keeps
+a noisy machine from deciding the result. Also times the two recording calls on their
+own and the middleware around a do-nothing app:
+
+    python benchmarks/bench_metrics.py [requests] [path/to/trivia.db]
+"""
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ROUTES = [
+    ('quizzes (cached)', '/api/quizzes', b''),
+    ('quiz questions (cached)', '/api/quizzes/1/questions', b''),
+    ('categories (cached)', '/api/categories', b''),
+    ('search (database)', '/api/search', b'q=vitamin'),
+    ('unmatched (404)', '/api/missing', b''),
+]
+
+async def call(app, path, query_string):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query_string, 'headers': [(b'host', b'bench')],
+        'client': ('127.0.0.1', 1), 'server': ('bench', 80),
+    }
+    status = 0
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+async def worker(count):
+    from run import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        for label, path, query_string in ROUTES:
+            for _ in range(50):
+                await call(app, path, query_string)
+            rounds = []
+            for _ in range(3):
+                started = time.perf_counter()
+                for _ in range(count):
+                    await call(app, path, query_string)
+                rounds.append((time.perf_counter() - started) / count * 1e6)
+            results[label] = min(rounds)
+    print(json.dumps(results))
+
+def run_mode(enabled, count, database):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{os.path.abspath(database)}',
+        METRICS_ENABLED='true' if enabled else 'false'
+    )
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', str(count)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+async def middleware_cost(calls=100_000):
+    from app.core.metrics import Metrics, MetricsMiddleware
+
+    async def endpoint(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'{}'})
+
+    wrapped = MetricsMiddleware(endpoint, Metrics())
+    results = {}
+    for label, app in (('bare', endpoint), ('wrapped', wrapped)):
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            for _ in range(calls):
+                await call(app, '/api/quizzes', b'')
+            timings.append((time.perf_counter() - started) / calls * 1e6)
+        results[label] = min(timings)
+    print(f"{'MetricsMiddleware':<28} {results['wrapped'] - results['bare']:8.2f} us/request")
+
+def recording_cost():
+    from app.core.metrics import Metrics
+
+    registry = Metrics()
+    query = "SELECT * FROM questions WHERE quiz_id = :quiz_id ORDER BY id"
+    calls = 200_000
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(calls):
+            registry.observe_query(query, 0.0002)
+        timings.append((time.perf_counter() - started) / calls * 1e6)
+    print(f"{'observe_query':<28} {min(timings):8.2f} us/call")
+
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(calls):
+            registry.observe_request('GET', '/api/quizzes/{quiz_id}/questions', 200, 0.0012, 2)
+        timings.append((time.perf_counter() - started) / calls * 1e6)
+    print(f"{'observe_request':<28} {min(timings):8.2f} us/call")
+
+def main():
+    if sys.argv[1:2] == ['--worker']:
+        asyncio.run(worker(int(sys.argv[2])))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(ROOT, 'trivia.db')
+
+    recording_cost()
+    asyncio.run(middleware_cost())
+    off, on = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database = shutil.copy(source, os.path.join(tmp, 'trivia.db'))
+        for _ in range(3):
+            for enabled, best in ((False, off), (True, on)):
+                for label, micros in run_mode(enabled, count, database).items():
+                    best[label] = min(micros, best.get(label, micros))
+    print(f"\n{'route':<28} {'off us/req':>11} {'on us/req':>11} {'overhead':>10}")
+    for label, _, _ in ROUTES:
+        overhead = on[label] - off[label]
+        print(f"{label:<28} {off[label]:11.1f} {on[label]:11.1f} {overhead:+8.1f}us ({overhead / off[label]:+.1%})")
+    print(f"\nmedian overhead {statistics.median(on[l] - off[l] for l, _, _ in ROUTES):+.1f} us/request")
+
+if __name__ == '__main__':
+    main()
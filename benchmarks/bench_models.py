@@ -0,0 +1,104 @@
+"""Per-call cost of the model layer against the ``databases`` queries it replaced.
+
+Runs each catalog read both ways on the same pooled reader connection:
+through ``databases`` with named parameters (compiled by SQLAlchemy on
+every call), and through the Quiz/Question models, which run fixed
+statements straight on the aiosqlite connection. Also times a repeated
+lookup answered by a session's identity map. Runs against a temporary
+copy of the database, since pending migrations are applied to it first;
+pass ``--in-place`` to use the database itself:
+
+    python benchmarks/bench_models.py [calls] [path/to/trivia.db] [--in-place]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+async def best_of(call, calls, rounds=5):
+    for _ in range(min(calls, 200)):
+        await call()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            await call()
+        timings.append((time.perf_counter() - started) / calls * 1e6)
+    return min(timings)
+
+async def run(calls):
+    from app.database import in_params, init_db, pool, session_for
+    from app.models.question import Question
+    from app.models.quiz import Quiz
+    from app.models.session import Session
+
+    init_db()
+    await pool.open()
+    try:
+        async with pool.reader() as db:
+            quiz_ids = [row['id'] for row in await db.fetch_all("SELECT id FROM quiz ORDER BY id LIMIT 20")]
+            quiz_id = quiz_ids[0]
+            placeholders, values = in_params("id", quiz_ids)
+
+            cases = [
+                (
+                    'quiz by id',
+                    lambda: db.fetch_one("SELECT * FROM quiz WHERE id = :id", values={"id": quiz_id}),
+                    lambda: Quiz.get(session_for(db), quiz_id)
+                ),
+                (
+                    f'{len(quiz_ids)} quizzes by id',
+                    lambda: db.fetch_all(f"SELECT * FROM quiz WHERE id IN ({placeholders})", values=values),
+                    lambda: Quiz.get_many(session_for(db), quiz_ids)
+                ),
+                (
+                    'questions of a quiz',
+                    lambda: db.fetch_all("SELECT * FROM questions WHERE quiz_id = :quiz_id", values={"quiz_id": quiz_id}),
+                    lambda: Question.get_by_quiz(session_for(db), quiz_id)
+                ),
+                (
+                    'answer key',
+                    lambda: db.fetch_all(
+                        "SELECT id, correct_answer_index FROM questions WHERE quiz_id = :quiz_id ORDER BY id",
+                        values={"quiz_id": quiz_id}
+                    ),
+                    lambda: Question.answer_key(session_for(db), quiz_id)
+                ),
+            ]
+
+            print(f"{'read':<24} {'databases us':>13} {'model us':>9} {'speedup':>8}")
+            for label, old, new in cases:
+                before = await best_of(old, calls)
+                after = await best_of(new, calls)
+                print(f"{label:<24} {before:13.1f} {after:9.1f} {before / after:7.1f}x")
+
+            session = session_for(db, Session())
+            await Quiz.get(session, quiz_id)
+            repeated = await best_of(lambda: Quiz.get(session, quiz_id), calls)
+            print(f"{'quiz by id, seen':<24} {'':>13} {repeated:9.1f}")
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('calls', nargs='?', type=int, default=2000)
+    parser.add_argument('database', nargs='?', default=os.path.join(ROOT, 'trivia.db'))
+    parser.add_argument('--in-place', action='store_true', help='migrate and read the database itself instead of a temporary copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.abspath(args.database)
+        if not args.in_place:
+            database = shutil.copy(database, os.path.join(tmp, 'trivia.db'))
+        # Read before app.core.config caches the settings
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+        asyncio.run(run(args.calls))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Cost of drawing random questions from the question sampler.
+
+Times loading the sampler's id arrays from the questions table, then a
+draw of ``count`` ids with and without a set of excluded ids, against
+the ``ORDER BY RANDOM() LIMIT`` query it stands in for. Runs against a
+temporary copy of the database, since pending migrations are applied to
+it first; pass ``--in-place`` to use the database itself:
+
+    python benchmarks/bench_random_questions.py [count] [path/to/trivia.db] [--in-place]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def best_of(call, rounds=5, calls=200):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            call()
+        timings.append((time.perf_counter() - started) / calls * 1e6)
+    return min(timings)
+
+async def run(count):
+    from app.core.sampling import QuestionSampler
+    from app.database import init_db, pool, session_for
+    from app.models.question import Question
+
+    init_db()
+    await pool.open()
+    try:
+        async with pool.reader() as db:
+            session = session_for(db)
+            started = time.perf_counter()
+            sampler = QuestionSampler()
+            sampler.load(await Question.sampler_index(session))
+            print(f"load {sampler.stats()['questions']} questions: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+            key = max(sampler.keys(), key=lambda key: len(sampler._ids[key]))
+            ids = list(sampler._ids[key])
+            excluded = set(random.Random(1).sample(ids, len(ids) // 4))
+            print(f"largest bucket {key}: {len(ids)} questions")
+
+            cases = [
+                ('all questions', lambda: sampler.sample(count)),
+                ('one bucket', lambda: sampler.sample(count, *key)),
+                (f'one bucket, {len(excluded)} excluded', lambda: sampler.sample(count, *key, exclude=excluded)),
+            ]
+            print(f"{'draw of ' + str(count):<36} {'us':>10}")
+            for label, call in cases:
+                print(f"{label:<36} {best_of(call):10.1f}")
+
+            query = "SELECT id FROM questions WHERE category = ? AND difficulty = ? ORDER BY RANDOM() LIMIT ?"
+            started = time.perf_counter()
+            for _ in range(5):
+                await db.raw_connection.execute_fetchall(query, (*key, count))
+            print(f"{'ORDER BY RANDOM() query':<36} {(time.perf_counter() - started) / 5 * 1e6:10.1f}")
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('count', nargs='?', type=int, default=10)
+    parser.add_argument('database', nargs='?', default=os.path.join(ROOT, 'trivia.db'))
+    parser.add_argument('--in-place', action='store_true', help='migrate and read the database itself instead of a temporary copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.abspath(args.database)
+        if not args.in_place:
+            database = shutil.copy(database, os.path.join(tmp, 'trivia.db'))
+        # Read before app.core.config caches the settings
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+        asyncio.run(run(args.count))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Latency of /search queries over a synthetic question catalog.
+
+Builds a throwaway database with the real migrations, fills it with
+questions drawn from a Zipf-distributed vocabulary, and times the search
+SQL for terms of different frequency:
+
+    python benchmarks/bench_search.py [questions]
+"""
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.core.search import SEARCH_CANDIDATES, SEARCH_QUERIES, build_match_query
+from app.migrations import migrate
+
+VOCABULARY = 20000
+CATEGORIES = ['nutrition', 'history', 'science', 'culture', 'cooking', 'ethics']
+
+def make_word(rank):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    word = ''
+    rank += 1
+    while rank:
+        rank, digit = divmod(rank, 26)
+        word += letters[digit]
+    return word + 'on'
+
+def fill(conn, count, rng):
+    words = [make_word(rank) for rank in range(VOCABULARY)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    conn.execute("INSERT INTO quiz (name, description, image, category, difficulty, created_at) "
+                 "VALUES ('Bench', 'Bench quiz', 'i', 'science', 'easy', '2025-01-01')")
+
+    batch = 10000
+    for start in range(0, count, batch):
+        rows = []
+        for i in range(start, min(start + batch, count)):
+            text = ' '.join(rng.choices(words, cum_weights=cum_weights, k=10))
+            explanation = ' '.join(rng.choices(words, cum_weights=cum_weights, k=20))
+            rows.append((1, text + '?', '["a", "b"]', 0, explanation, CATEGORIES[i % len(CATEGORIES)], 'easy', 'i'))
+        conn.executemany(
+            "INSERT INTO questions (quiz_id, question_text, choices, correct_answer_index, "
+            "explanation, category, difficulty, image) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+    conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('optimize')")
+    conn.commit()
+    return words
+
+def time_query(conn, label, text, category=None, prefix=False, runs=20):
+    filters = " AND q.category = :category" if category else ""
+    values = {
+        "query": build_match_query(text, prefix),
+        "limit": 21,
+        "offset": 0,
+        "candidates": SEARCH_CANDIDATES
+    }
+    if category:
+        values["category"] = category
+    query = SEARCH_QUERIES['questions'].format(filters=filters)
+
+    matches = conn.execute(
+        "SELECT COUNT(*) FROM questions_fts WHERE questions_fts MATCH ?", (values["query"],)
+    ).fetchone()[0]
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(query, values).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<32} {matches:>9,} matches  median {statistics.median(timings):8.2f} ms  "
+          f"max {max(timings):8.2f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'search.db'))
+        migrate(conn)
+
+        started = time.perf_counter()
+        words = fill(conn, count, rng)
+        print(f"indexed {count:,} questions in {time.perf_counter() - started:.1f}s")
+
+        time_query(conn, "rare word", words[15000])
+        time_query(conn, "mid-frequency word", words[2000])
+        time_query(conn, "two mid-frequency words", f"{words[500]} {words[800]}")
+        time_query(conn, "prefix (3 letters)", words[300][:3], prefix=True)
+        time_query(conn, "mid word + category filter", words[2000], category='history')
+        time_query(conn, "common word", words[50])
+        time_query(conn, "common word + category filter", words[50], category='history')
+        time_query(conn, "most common word", words[0])
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Time to render 1,000 questions as the GET /quizzes/{quiz_id}/questions body.
+
+Compares the validated path (dict per row, json.loads of choices, a
+QuizWithQuestions round trip) with the direct encoder that splices the
+stored choices JSON into the output, with orjson and with the stdlib
+fallback. Reads real ``databases`` records from a throwaway database:
+
+    python benchmarks/bench_serialization.py [questions]
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from databases import Database
+from app.core import serialization
+from app.core.serialization import encode_record, encode_records, splice_member
+from app.migrations import migrate
+from app.models.schemas import QuizWithQuestions
+
+def fill(conn, count):
+    conn.execute(
+        "INSERT INTO quiz (name, description, image, category, difficulty, created_at) "
+        "VALUES ('Bench quiz', 'Generated for the serialization benchmark', "
+        "'https://example.com/quiz.jpg', 'science', 'medium', '2025-03-14')"
+    )
+    conn.executemany(
+        "INSERT INTO questions (quiz_id, question_text, choices, correct_answer_index, "
+        "explanation, category, difficulty, image) VALUES (1, ?, ?, ?, ?, 'science', 'medium', ?)",
+        [
+            (
+                f'Which of these foods is the richest source of nutrient number {i}?',
+                json.dumps(['Lentils', 'Spinach', 'Almonds', f'None of the above ({i})']),
+                i % 4,
+                'Legumes, leafy greens and nuts all contribute, but one stands out by weight.',
+                f'https://example.com/questions/{i}.jpg'
+            )
+            for i in range(count)
+        ]
+    )
+    conn.commit()
+
+def validated(quiz, questions):
+    """The validated path: the body the route rendered before this benchmark existed"""
+    quiz_dict = dict(quiz)
+    question_list = []
+    for question in questions:
+        question_dict = dict(question)
+        question_dict['choices'] = json.loads(question_dict['choices'])
+        question_list.append(question_dict)
+    quiz_dict['questions'] = question_list
+    return QuizWithQuestions.model_validate(quiz_dict).model_dump_json().encode()
+
+def direct(quiz, questions):
+    return splice_member(encode_record(quiz), 'questions', encode_records(questions, ('choices',)))
+
+def time_it(label, render, quiz, questions, runs=30):
+    render(quiz, questions)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        render(quiz, questions)
+        timings.append((time.perf_counter() - started) * 1000)
+    per_thousand = statistics.median(timings) * 1000 / len(questions)
+    print(f"{label:<34} {per_thousand:8.2f} ms per 1,000 questions")
+    return per_thousand
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        fill(conn, count)
+        conn.close()
+
+        db = Database(f"sqlite:///{path}")
+        await db.connect()
+        # Plain dicts, as the model layer returns rows
+        quiz = dict((await db.fetch_one("SELECT * FROM quiz WHERE id = 1"))._mapping)
+        questions = [dict(row._mapping) for row in await db.fetch_all("SELECT * FROM questions WHERE quiz_id = 1")]
+        await db.disconnect()
+
+    assert json.loads(validated(quiz, questions)) == json.loads(direct(quiz, questions))
+
+    baseline = time_it("validated (dict + loads + model)", validated, quiz, questions)
+    orjson = serialization.orjson
+    if orjson is not None:
+        fast = time_it("direct, orjson", direct, quiz, questions)
+        print(f"{'':<34} {baseline / fast:8.1f}x faster")
+    serialization.orjson = None
+    try:
+        fast = time_it("direct, stdlib json", direct, quiz, questions)
+        print(f"{'':<34} {baseline / fast:8.1f}x faster")
+    finally:
+        serialization.orjson = orjson
+
+if __name__ == '__main__':
+    asyncio.run(main())
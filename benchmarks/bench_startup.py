@@ -0,0 +1,142 @@
+"""Cold start of an API worker: app import time and time to the first served request.
+
+Every run starts fresh interpreters. Import time comes from a process
+that only imports ``run``. Time to first request spawns ``uvicorn run:app``
+on a free port and polls ``GET /api/categories`` until it answers 200;
+the worker's own startup gauges are then read from ``/metrics``:
+
+    python benchmarks/bench_startup.py [--runs 5] [--database trivia.db] [--budget 1.5] [--in-place]
+
+The workers run against a temporary copy of the database, since an
+untimed first start applies any pending migrations to it; the timed runs
+then measure a worker joining an up-to-date database. Pass
+``--in-place`` to use the database itself. The run exits with status 1
+when the median time to first request is over ``--budget`` seconds.
+"""
+import argparse
+import http.client
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import run; print(time.perf_counter() - started)"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def environment(database: str):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+def import_seconds(database: str) -> float:
+    done = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT],
+        cwd=ROOT, env=environment(database), capture_output=True, text=True, check=True
+    )
+    return float(done.stdout.strip().splitlines()[-1])
+
+def startup_gauges(url: str):
+    """quiz_api_startup_* samples from /metrics, keyed by their label value"""
+    try:
+        with urllib.request.urlopen(f'{url}/metrics', timeout=5) as response:
+            text = response.read().decode()
+    except OSError:
+        return {}  # METRICS_ENABLED=false
+
+    gauges = {}
+    for line in text.splitlines():
+        if line.startswith('quiz_api_startup') and '"' in line:
+            label = line.split('"')[1]
+            gauges[label] = float(line.rsplit(' ', 1)[1])
+    return gauges
+
+def first_request(database: str):
+    """Seconds from spawning a worker to its first 200, and its startup gauges"""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'run:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=ROOT, env=environment(database)
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(f'{url}/api/categories', timeout=5) as response:
+                    if response.status == 200:
+                        break
+            except (OSError, http.client.HTTPException):
+                time.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        return elapsed, startup_gauges(url)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def measure(database: str, args):
+    """Print the startup times of ``args.runs`` workers and check them against the budget"""
+    # Untimed: applies any pending migrations
+    first_request(database)
+
+    columns = ('import', 'first_request', 'ready', 'init_db', 'pool')
+    print(f"{'run':<6}" + ''.join(f"{name + ' ms':>18}" for name in columns))
+    runs = []
+    for run in range(args.runs):
+        imported = import_seconds(database)
+        elapsed, gauges = first_request(database)
+        row = {
+            'import': imported,
+            'first_request': elapsed,
+            'ready': gauges.get('ready'),
+            'init_db': gauges.get('init_db'),
+            'pool': gauges.get('pool')
+        }
+        runs.append(row)
+        print(f"{run + 1:<6}" + ''.join(
+            f"{row[name] * 1000:18.1f}" if row[name] is not None else f"{'-':>18}" for name in columns
+        ))
+
+    medians = {
+        name: statistics.median(row[name] for row in runs)
+        for name in columns if all(row[name] is not None for row in runs)
+    }
+    print(f"{'median':<6}" + ''.join(
+        f"{medians[name] * 1000:18.1f}" if name in medians else f"{'-':>18}" for name in columns
+    ))
+
+    if medians['first_request'] > args.budget:
+        print(f"\nFAIL: median time to first request {medians['first_request']:.3f}s is over the {args.budget:.3f}s budget")
+        sys.exit(1)
+    print(f"\nOK: median time to first request is within the {args.budget:.3f}s budget")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database', default=os.path.join(ROOT, 'trivia.db'))
+    # Most of it is importing FastAPI, pydantic and SQLAlchemy, which the
+    # startup hook needs before the first request in any case
+    parser.add_argument('--budget', type=float, default=1.5, help='seconds allowed to the first request (median)')
+    parser.add_argument('--in-place', action='store_true', help='use the database itself instead of a temporary copy')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.abspath(args.database)
+        if not args.in_place:
+            database = shutil.copy(database, os.path.join(tmp, 'trivia.db'))
+        measure(database, args)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,16 @@
+# First, so the import time it reports covers the whole app
+from app.core.startup import startup_times
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import database
-from app.routes import questions, quizzes, categories, users
-import uvicorn
+from app.core.compression import CompressionMiddleware
+from app.core.cache import version_watcher
+from app.core.config import get_settings
+from app.core.metrics import MetricsMiddleware, metrics as request_metrics
+from app.database import init_db, pool
+from app.routes import questions, quizzes, categories, users, monitoring, export, scoring, leaderboards, search, metrics
 
 app = FastAPI(title="Quiz API")
+settings = get_settings()
 
 # Configure CORS
 app.add_middleware(
@@ -13,24 +19,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the cache validator and the pagination cursor
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# Startup and shutdown events
+# Negotiate gzip/br on Accept-Encoding; cached catalog bodies arrive
+# already compressed and are passed through
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Outermost, so request latency includes compression
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
+# Startup and shutdown events. Each step is a no-op when already done, so
+# the app can be started again in the same process (see tests/test_lifecycle.py)
 @app.on_event("startup")
 async def startup():
-    await database.connect()
+    with startup_times.phase('init_db'):
+        init_db()
+    with startup_times.phase('pool'):
+        await pool.open()
+    # Drops whatever other processes changed while this one wasn't watching
+    await version_watcher.start(pool)
+    users.result_queue.start()
+    # Read quiz_results in the background; only leaderboard requests wait for it
+    leaderboards.start_warming()
+    startup_times.mark_ready()
 
 @app.on_event("shutdown")
 async def shutdown():
-    await database.disconnect()
+    # Abandon a leaderboard load in progress instead of waiting for its scan
+    await leaderboards.stop_warming()
+    # Write queued quiz results before the connections go away
+    await users.result_queue.stop()
+    await version_watcher.stop()
+    await pool.close()
 
 # Include routers with the /api prefix
 app.include_router(quizzes.router, prefix="/api")
 app.include_router(questions.router, prefix="/api")
 app.include_router(categories.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(monitoring.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
+app.include_router(scoring.router, prefix="/api")
+app.include_router(leaderboards.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+
+# Served at the root, where Prometheus scrapes by default
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+startup_times.mark_imported()
 
 if __name__ == '__main__':
+    import uvicorn
     uvicorn.run(
         "run:app",
         host="0.0.0.0",
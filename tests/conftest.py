@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Read before app.core.config caches the settings; migrations create the
+# schema on the first startup
+DATABASE_DIR = tempfile.mkdtemp(prefix='quiz-api-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DATABASE_DIR, 'test.db')}"
+
+from fastapi.testclient import TestClient
+from app.database import pool
+import run
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+@pytest.fixture
+def database_path():
+    return os.path.join(DATABASE_DIR, 'test.db')
+
+@pytest.fixture
+def client():
+    """A started app; leaving the block runs the shutdown hooks"""
+    with TestClient(run.app) as client:
+        yield client
+
+def question_payload(text, quiz_id=None, category='nutrition'):
+    question = {
+        'question_text': text,
+        'choices': ['Lentils', 'Rice', 'Butter', 'Sugar'],
+        'correct_answer_index': 0,
+        'explanation': 'Legumes are high in fibre.',
+        'category': category,
+        'difficulty': 'easy',
+        'image': 'https://example.com/question.jpg'
+    }
+    if quiz_id is not None:
+        question['quiz_id'] = quiz_id
+    return question
+
+@pytest.fixture
+def create_quiz():
+    """Create a quiz with the given question texts through the API"""
+    def create(client, name='Test quiz', questions=('Which food is richest in fibre?',), category='nutrition'):
+        response = client.post('/api/quizzes/with-questions', json={
+            'quiz': {
+                'name': name,
+                'description': f'{name} description',
+                'image': 'https://example.com/quiz.jpg',
+                'category': category,
+                'difficulty': 'easy'
+            },
+            'questions': [question_payload(text, category=category) for text in questions]
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
+
+@pytest.fixture
+def readers_busy(monkeypatch):
+    """Call to make requests that check out a pooled reader fail from then on"""
+    def reader():
+        raise AssertionError("checked out a pooled reader")
+
+    def hold():
+        monkeypatch.setattr(pool, 'reader', reader)
+    return hold
@@ -0,0 +1,34 @@
+from conftest import question_payload
+
+def test_bulk_add_reports_errors_by_index(client, create_quiz):
+    quiz_id = create_quiz(client, questions=[])['quiz']['id']
+    payload = [
+        question_payload('Which pulse cooks fastest?', quiz_id),
+        question_payload('Orphan question', 999999),
+        question_payload('Which pulse has the most protein?', quiz_id),
+        question_payload('Another orphan', 999998),
+    ]
+    body = client.post('/api/questions', json=payload).json()
+
+    assert body['total_added'] == 2
+    assert [result['question_text'] for result in body['results']] == [
+        'Which pulse cooks fastest?', 'Which pulse has the most protein?'
+    ]
+    assert body['total_errors'] == 2
+    assert body['errors'] == [
+        {'index': 1, 'error': 'Quiz with ID 999999 not found'},
+        {'index': 3, 'error': 'Quiz with ID 999998 not found'}
+    ]
+
+    questions = client.get(f'/api/quizzes/{quiz_id}/questions').json()['questions']
+    assert [question['id'] for question in questions] == [result['id'] for result in body['results']]
+    assert questions[0]['choices'] == payload[0]['choices']
+
+def test_bulk_add_without_errors_has_no_error_keys(client, create_quiz):
+    quiz_id = create_quiz(client, questions=[])['quiz']['id']
+    body = client.post('/api/questions', json=[question_payload('Which grain is a seed?', quiz_id)]).json()
+    assert body['total_added'] == 1
+    assert 'errors' not in body
+
+def test_invalid_question_is_a_422(client):
+    assert client.post('/api/questions', json=[{'question_text': 'No choices', 'quiz_id': 1}]).status_code == 422
@@ -0,0 +1,15 @@
+def test_cache_hits_do_not_check_out_a_reader(client, create_quiz, readers_busy):
+    create_quiz(client, category='legumes')
+    paths = ['/api/categories', '/api/quizzes', '/api/quizzes?category=legumes', '/api/quizzes/category-samples?seed=4']
+    first = {path: client.get(path) for path in paths}
+
+    readers_busy()
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+        assert response.content == first[path].content
+
+def test_cache_misses_still_read_the_database(client, create_quiz):
+    client.get('/api/categories')
+    create_quiz(client, category='seeds')
+    assert 'seeds' in client.get('/api/categories').json()
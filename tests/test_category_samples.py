@@ -0,0 +1,32 @@
+def test_samples_draw_up_to_limit_quizzes_from_each_category(client, create_quiz):
+    for i in range(4):
+        create_quiz(client, name=f'Sampled berry quiz {i}', category='berries')
+    create_quiz(client, name='Sampled herb quiz', category='herbs')
+
+    body = client.get('/api/quizzes/category-samples', params={'limit': 2}).json()
+    samples = body['samples']
+    assert body['quizzes_per_category'] == 2
+    assert body['total_categories'] == len(samples)
+    assert len(samples['berries']) == 2
+    assert len(samples['herbs']) >= 1
+    for category, quizzes in samples.items():
+        assert len(quizzes) <= 2
+        assert len({quiz['id'] for quiz in quizzes}) == len(quizzes)
+        assert all(quiz['category'] == category for quiz in quizzes)
+
+def test_seeded_samples_repeat_until_the_catalog_changes(client, create_quiz):
+    for i in range(6):
+        create_quiz(client, name=f'Seeded citrus quiz {i}', category='citrus')
+
+    first = client.get('/api/quizzes/category-samples', params={'seed': 11}).json()
+    assert client.get('/api/quizzes/category-samples', params={'seed': 11}).json() == first
+
+    created = create_quiz(client, name='Seeded citrus quiz 6', category='citrus')['quiz']
+    samples = client.get('/api/quizzes/category-samples', params={'seed': 11, 'limit': 20}).json()['samples']
+    assert created['id'] in [quiz['id'] for quiz in samples['citrus']]
+
+def test_limit_is_bounded(client):
+    for limit in (-1, 0, 21):
+        assert client.get('/api/quizzes/category-samples', params={'limit': limit}).status_code == 422
+    for limit in (1, 20):
+        assert client.get('/api/quizzes/category-samples', params={'limit': limit}).status_code == 200
@@ -0,0 +1,18 @@
+def test_compressed_etags_differ_per_coding_and_all_match(client, create_quiz):
+    quiz_id = create_quiz(client, questions=['Which nut is highest in magnesium?'] * 20)['quiz']['id']
+    path = f'/api/quizzes/{quiz_id}/questions'
+
+    tags = {}
+    for coding in ('br', 'gzip', 'identity'):
+        response = client.get(path, headers={'Accept-Encoding': coding})
+        assert response.status_code == 200
+        tags[coding] = response.headers['ETag']
+    assert tags['br'] == tags['identity'][:-1] + '-br"'
+    assert tags['gzip'] == tags['identity'][:-1] + '-gzip"'
+
+    # A 304 carries the tag of the representation that matched
+    for tag in tags.values():
+        for if_none_match in (tag, f'W/{tag}', f'"stale", {tag}'):
+            response = client.get(path, headers={'If-None-Match': if_none_match})
+            assert response.status_code == 304
+            assert response.headers['ETag'] == tag
@@ -0,0 +1,67 @@
+import sqlite3
+import time
+from contextlib import closing
+from fastapi.testclient import TestClient
+from app.core.cache import catalog_cache, quiz_payload_cache
+import run
+
+def _shared_tags(database_path, quiz_id):
+    """The catalog and quiz tags every worker should give, read off the database"""
+    with closing(sqlite3.connect(database_path)) as conn:
+        versions = dict(conn.execute("SELECT name, version FROM cache_versions"))
+        quiz_version = conn.execute("SELECT version FROM quiz_versions WHERE quiz_id = ?", (quiz_id,)).fetchone()[0]
+    token = f"{versions['token']:x}"
+    return f'"{token}-catalog-{versions["catalog"]}"', f'"{token}-quiz-{quiz_id}-{quiz_version}"'
+
+def test_etag_gives_304_until_the_catalog_changes(client, create_quiz):
+    create_quiz(client)
+    response = client.get('/api/quizzes')
+    etag = response.headers['ETag']
+
+    response = client.get('/api/quizzes', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+
+    create_quiz(client, name='Invalidating quiz')
+    response = client.get('/api/quizzes', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'Invalidating quiz' in [quiz['name'] for quiz in response.json()]
+
+def test_304_does_not_check_out_a_reader(client, create_quiz, readers_busy, monkeypatch):
+    quiz_id = create_quiz(client)['quiz']['id']
+    paths = ['/api/categories', '/api/quizzes', f'/api/quizzes/{quiz_id}/questions', '/api/quizzes/category-samples?seed=2']
+    etags = {path: client.get(path).headers['ETag'] for path in paths}
+
+    # Not even a cached body to fall back on
+    monkeypatch.setattr(catalog_cache, 'get', lambda key: None)
+    monkeypatch.setattr(quiz_payload_cache, 'get', lambda quiz_id: None)
+    readers_busy()
+    for path, etag in etags.items():
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == 304, response.text
+
+def test_etags_come_from_the_database_and_survive_a_restart(create_quiz, database_path):
+    identity = {'Accept-Encoding': 'identity'}
+    with TestClient(run.app) as client:
+        quiz_id = create_quiz(client, questions=['Which seed is richest in omega-3?'])['quiz']['id']
+        path = f'/api/quizzes/{quiz_id}/questions'
+        catalog_tag, quiz_tag = _shared_tags(database_path, quiz_id)
+        assert client.get('/api/quizzes', headers=identity).headers['ETag'] == catalog_tag
+        assert client.get(path, headers=identity).headers['ETag'] == quiz_tag
+
+    # Another worker, or this one restarted, answers the same tags with 304
+    with TestClient(run.app) as client:
+        assert client.get('/api/quizzes', headers={'If-None-Match': catalog_tag}).status_code == 304
+        assert client.get(path, headers={'If-None-Match': quiz_tag}).status_code == 304
+
+        # A write committed elsewhere moves the tag once it has been noticed
+        with closing(sqlite3.connect(database_path)) as conn, conn:
+            conn.execute("UPDATE questions SET explanation = 'Flax.' WHERE quiz_id = ?", (quiz_id,))
+        deadline = time.monotonic() + 2.0
+        while client.get(path, headers={'If-None-Match': quiz_tag}).status_code == 304:
+            assert time.monotonic() < deadline, "the tag never moved"
+            time.sleep(0.02)
+        response = client.get(path, headers=identity)
+        assert response.headers['ETag'] == _shared_tags(database_path, quiz_id)[1]
+        assert response.json()['questions'][0]['explanation'] == 'Flax.'
@@ -0,0 +1,58 @@
+import gzip
+import io
+import json
+import sqlite3
+from contextlib import closing
+from app.export import export_database
+
+QUESTION_FIELDS = ('question_text', 'choices', 'correct_answer_index', 'explanation', 'category', 'difficulty', 'image')
+
+def _export(client, **params):
+    response = client.get('/api/export', params=params)
+    assert response.status_code == 200
+    return response.content
+
+def _records(body, quiz_id):
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    return [record for record in records if record.get('quiz_id', record['id']) == quiz_id]
+
+def test_exported_questions_import_back_unchanged(client, create_quiz):
+    source = create_quiz(client, questions=['Which seed is richest in omega-3?', 'Which bean is used for tofu?'])
+    quiz_id = source['quiz']['id']
+    target = create_quiz(client, name='Restored quiz', questions=[])['quiz']['id']
+
+    records = _records(gzip.decompress(_export(client, gzip='true')), quiz_id)
+    assert [record['type'] for record in records] == ['quiz', 'question', 'question']
+    assert records[0]['name'] == 'Test quiz'
+
+    lines = [json.dumps(dict(record, quiz_id=target)) for record in records[1:]]
+    response = client.post(
+        '/api/questions/import',
+        content='\n'.join(lines).encode(),
+        headers={'Content-Type': 'application/x-ndjson'}
+    )
+    assert json.loads(response.text.splitlines()[-1]) == {'done': True, 'total_added': 2, 'total_errors': 0}
+
+    restored = client.get(f'/api/quizzes/{target}/questions').json()['questions']
+    assert [{field: question[field] for field in QUESTION_FIELDS} for question in restored] == [
+        {field: record[field] for field in QUESTION_FIELDS} for record in records[1:]
+    ]
+
+def test_malformed_choices_do_not_abort_the_export(client, create_quiz, database_path, tmp_path, caplog):
+    quiz = create_quiz(client, questions=['Which fruit is highest in vitamin C?', 'Which root is a nitrate source?'])
+    quiz_id = quiz['quiz']['id']
+    bad_id = quiz['questions'][0]['id']
+    # Migrated databases reject malformed choices, so the bad row goes into
+    # a copy without the triggers, like a database from before migration 8
+    copy = str(tmp_path / 'unmigrated.db')
+    with closing(sqlite3.connect(database_path)) as source, closing(sqlite3.connect(copy)) as conn:
+        source.backup(conn)
+        with conn:
+            conn.execute("DROP TRIGGER questions_choices_update")
+            conn.execute("UPDATE questions SET choices = ? WHERE id = ?", ('["Guava", "Kiwi"', bad_id))
+
+    output = io.BytesIO()
+    export_database(copy, output)
+    questions = _records(output.getvalue(), quiz_id)[1:]
+    assert [question['choices'] for question in questions] == ['["Guava", "Kiwi"', ['Lentils', 'Rice', 'Butter', 'Sugar']]
+    assert f"Question {bad_id} has malformed choices" in caplog.text
@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import sqlite3
+from contextlib import closing
+import pytest
+from app.core.sampling import category_sampler
+from app.migrations import migrate
+from conftest import ROOT, question_payload
+
+_module = None
+
+@pytest.fixture
+def flask_client(tmp_path, monkeypatch):
+    """Test client for the legacy app.py, on a fresh trivia.db of its own"""
+    global _module
+    # app.py opens trivia.db in the working directory, and migrates it on import
+    monkeypatch.chdir(tmp_path)
+    with closing(sqlite3.connect('trivia.db')) as conn:
+        migrate(conn)
+    if _module is None:
+        # Loaded from its path: the name app belongs to the package
+        spec = importlib.util.spec_from_file_location('flask_app', os.path.join(ROOT, 'app.py'))
+        _module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_module)
+
+    # The sampler is process-wide, so it mustn't keep another database's ids
+    category_sampler.invalidate()
+    yield _module.app.test_client()
+    category_sampler.invalidate()
+
+def _create_quiz(client, name, category, questions):
+    response = client.post('/quizzes/with-questions', json={
+        'quiz': {'name': name, 'description': '', 'image': '', 'category': category, 'difficulty': 'easy'},
+        'questions': [question_payload(text, category=category) for text in questions]
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+def test_quiz_with_questions_round_trip(flask_client):
+    created = _create_quiz(flask_client, 'Seeds', 'nutrition', ['Which seed is flax?', 'Which seed is chia?'])
+    quiz_id = created['quiz']['id']
+    assert created['total_questions'] == 2
+
+    body = flask_client.get(f'/quizzes/{quiz_id}/questions').get_json()
+    assert body['quiz']['name'] == 'Seeds'
+    assert [question['question_text'] for question in body['questions']] == ['Which seed is flax?', 'Which seed is chia?']
+    assert body['questions'][0]['choices'] == ['Lentils', 'Rice', 'Butter', 'Sugar']
+
+    assert 'nutrition' in flask_client.get('/categories').get_json()
+    assert [quiz['id'] for quiz in flask_client.get('/quizzes', query_string={'category': 'nutrition'}).get_json()] == [quiz_id]
+
+    question_id = body['questions'][0]['id']
+    assert flask_client.delete(f'/questions/{question_id}').status_code == 200
+    assert flask_client.delete(f'/questions/{question_id}').status_code == 404
+    assert flask_client.get(f'/quizzes/{quiz_id}/questions').get_json()['count'] == 1
+
+    assert flask_client.delete(f'/quizzes/{quiz_id}').get_json()['questions_deleted'] == 1
+    assert flask_client.get(f'/quizzes/{quiz_id}/questions').status_code == 404
+
+def test_bulk_questions_report_errors_by_index(flask_client):
+    quiz_id = _create_quiz(flask_client, 'Grains', 'nutrition', [])['quiz']['id']
+    response = flask_client.post('/questions', json=[
+        question_payload('Which grain is spelt?', quiz_id),
+        {'question_text': 'Missing fields'},
+        question_payload('Orphan', 999999)
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [result['question_text'] for result in body['results']] == ['Which grain is spelt?']
+    assert [error['index'] for error in body['errors']] == [1, 2]
+    assert body['errors'][1]['error'] == 'Quiz with ID 999999 not found'
+
+def test_category_samples_follow_created_and_deleted_quizzes(flask_client):
+    ids = [_create_quiz(flask_client, f'Fibre {i}', 'fibre', [])['quiz']['id'] for i in range(3)]
+    samples = flask_client.get('/quizzes/category-samples', query_string={'limit': 5}).get_json()
+    assert sorted(quiz['id'] for quiz in samples['samples']['fibre']) == ids
+
+    flask_client.delete(f'/quizzes/{ids[0]}')
+    samples = flask_client.get('/quizzes/category-samples', query_string={'limit': 5}).get_json()
+    assert sorted(quiz['id'] for quiz in samples['samples']['fibre']) == ids[1:]
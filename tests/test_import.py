@@ -0,0 +1,59 @@
+import json
+from app.routes import questions
+from conftest import question_payload
+
+def _import(client, lines):
+    response = client.post(
+        '/api/questions/import',
+        content=''.join(line + '\n' for line in lines).encode(),
+        headers={'Content-Type': 'application/x-ndjson'}
+    )
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_import_reports_a_result_per_line(client, create_quiz, monkeypatch):
+    monkeypatch.setattr(questions.settings, 'IMPORT_BATCH_SIZE', 2)
+    monkeypatch.setattr(questions.settings, 'IMPORT_MAX_LINE_BYTES', 1000)
+    quiz_id = create_quiz(client, questions=[])['quiz']['id']
+
+    results = _import(client, [
+        json.dumps(question_payload('Which oil is richest in vitamin E?', quiz_id)),
+        '',
+        '{not json',
+        json.dumps(question_payload('Orphan import', 999999)),
+        json.dumps(question_payload('x' * 2000, quiz_id)),
+        json.dumps(question_payload('Which oil has the highest smoke point?', quiz_id)),
+    ])
+
+    summary = results.pop()
+    assert summary == {'done': True, 'total_added': 2, 'total_errors': 3}
+    by_line = {result['line']: result for result in results}
+    assert sorted(by_line) == [1, 3, 4, 5, 6]
+    assert by_line[1]['success'] and by_line[6]['success']
+    assert not by_line[3]['success']
+    assert by_line[4] == {'line': 4, 'success': False, 'error': 'Quiz with ID 999999 not found'}
+    assert by_line[5] == {'line': 5, 'success': False, 'error': 'Line exceeds 1000 bytes'}
+
+    # Lines after a rejected one in the same batch are still added
+    added = client.get(f'/api/quizzes/{quiz_id}/questions').json()['questions']
+    assert [(question['id'], question['question_text']) for question in added] == [
+        (by_line[1]['id'], 'Which oil is richest in vitamin E?'),
+        (by_line[6]['id'], 'Which oil has the highest smoke point?')
+    ]
+
+def test_oversized_last_line_without_newline_is_rejected(client, create_quiz, monkeypatch):
+    monkeypatch.setattr(questions.settings, 'IMPORT_MAX_LINE_BYTES', 100)
+    response = client.post(
+        '/api/questions/import',
+        content=b'y' * 500,
+        headers={'Content-Type': 'application/x-ndjson'}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {'line': 1, 'success': False, 'error': 'Line exceeds 100 bytes'},
+        {'done': True, 'total_added': 0, 'total_errors': 1}
+    ]
+
+def test_import_needs_an_ndjson_content_type(client):
+    response = client.post('/api/questions/import', content=b'{}\n', headers={'Content-Type': 'application/json'})
+    assert response.status_code == 415
@@ -0,0 +1,11 @@
+from fastapi.testclient import TestClient
+from app.database import pool
+import run
+
+def test_app_starts_again_in_the_same_process():
+    for _ in range(2):
+        with TestClient(run.app) as client:
+            assert pool.is_open
+            assert client.get('/api/categories').status_code == 200
+            assert client.get('/api/leaderboards/global').status_code == 200
+        assert not pool.is_open
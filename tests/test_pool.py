@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+from contextlib import closing
+import pytest
+from databases import Database
+from app.database import ConnectionPool
+
+def _run(tmp_path, test):
+    async def main():
+        pool = ConnectionPool(Database(f"sqlite:///{tmp_path / 'pool.db'}"), readers=2)
+        await pool.open()
+        try:
+            await pool.write(lambda db: db.execute("CREATE TABLE seeds (name TEXT)"))
+            await test(pool)
+        finally:
+            await pool.close()
+    asyncio.run(main())
+
+async def _names(pool):
+    async with pool.reader() as db:
+        return [row[0] for row in await db.fetch_all("SELECT name FROM seeds ORDER BY rowid")]
+
+def test_writes_run_one_at_a_time_in_submission_order(tmp_path):
+    async def test(pool):
+        running = []
+
+        def insert(name, pause):
+            async def unit(db):
+                running.append(name)
+                assert len(running) == 1
+                # A later unit would overtake this one if units overlapped
+                await asyncio.sleep(pause)
+                await db.execute("INSERT INTO seeds VALUES (:name)", {'name': name})
+                running.remove(name)
+                return name
+            return pool.write(unit)
+
+        assert await asyncio.gather(insert('flax', 0.02), insert('chia', 0.0), insert('hemp', 0.01)) == ['flax', 'chia', 'hemp']
+        assert await _names(pool) == ['flax', 'chia', 'hemp']
+        assert pool.stats()['writes'] == 4
+    _run(tmp_path, test)
+
+def test_failed_write_rolls_back_and_later_writes_continue(tmp_path):
+    async def test(pool):
+        async def fails(db):
+            await db.execute("INSERT INTO seeds VALUES ('sesame')")
+            raise ValueError("no sesame")
+
+        with pytest.raises(ValueError, match="no sesame"):
+            await pool.write(fails)
+        await pool.write(lambda db: db.execute("INSERT INTO seeds VALUES ('poppy')"))
+        assert await _names(pool) == ['poppy']
+    _run(tmp_path, test)
+
+def test_readers_are_query_only(tmp_path):
+    async def test(pool):
+        async with pool.reader() as db:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                await db.execute("INSERT INTO seeds VALUES ('pumpkin')")
+        async with pool.dedicated_reader() as db:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                await db.execute("INSERT INTO seeds VALUES ('pumpkin')")
+        assert pool.stats()['idle_readers'] == 2
+    _run(tmp_path, test)
+
+def test_close_finishes_queued_writes(tmp_path):
+    async def main():
+        pool = ConnectionPool(Database(f"sqlite:///{tmp_path / 'pool.db'}"), readers=1)
+        await pool.open()
+        await pool.write(lambda db: db.execute("CREATE TABLE seeds (name TEXT)"))
+        queued = [asyncio.ensure_future(pool.write(lambda db, i=i: db.execute(f"INSERT INTO seeds VALUES ('seed {i}')"))) for i in range(5)]
+        # Let every write reach the queue before closing
+        await asyncio.sleep(0)
+        await pool.close()
+        assert all(write.done() for write in queued)
+        assert not pool.is_open
+
+    asyncio.run(main())
+    with closing(sqlite3.connect(tmp_path / 'pool.db')) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM seeds").fetchone()[0] == 5
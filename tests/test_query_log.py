@@ -0,0 +1,50 @@
+import logging
+import sqlite3
+from app.core.query_log import QueryLog
+from app.database import InstrumentedSqliteConnection, query_log
+
+INSERT = "INSERT INTO grains (name) VALUES (?)"
+SELECT = "SELECT name FROM grains WHERE name IN (?, ?)"
+
+def test_statements_are_grouped_and_slow_ones_logged(caplog):
+    log = QueryLog(threshold=0.1)
+    with caplog.at_level(logging.WARNING):
+        assert not log.record(SELECT, ('oats', 'rye'), 0.01)
+        assert log.record("SELECT  name FROM grains WHERE name IN (?)", ('spelt',), 0.2)
+        # The plan is only asked for once
+        assert not log.record(SELECT, ('oats', 'rye'), 0.3)
+
+    [stats] = log.top()
+    assert (stats['statement'], stats['calls'], stats['slow_calls']) == (
+        "SELECT name FROM grains WHERE name IN (...)", 3, 2
+    )
+    assert stats['params'] == '(str, str)'
+    assert 'oats' not in caplog.text
+
+def test_batches_are_slow_per_row_and_inserts_have_no_plan(caplog):
+    log = QueryLog(threshold=0.1)
+    rows = [('oats',)] * 1000
+    assert not log.record(INSERT, rows[0], 5.0, rows=len(rows))
+    assert caplog.text == ''
+
+    assert not log.record(INSERT, rows[0], 150.0, rows=len(rows))
+    assert "Slow query (150000.0 ms for 1000 rows)" in caplog.text
+    assert log.top()[0]['plan'] is None
+    assert log.record("INSERT INTO grains (name) SELECT name FROM seeds", (), 0.2)
+
+def test_executemany_through_the_sqlite_connection(monkeypatch):
+    monkeypatch.setattr(query_log, 'threshold', 0.0)
+    monkeypatch.setattr(query_log, 'statements', {})
+    conn = sqlite3.connect(':memory:', factory=InstrumentedSqliteConnection)
+    try:
+        conn.execute("CREATE TABLE grains (name TEXT PRIMARY KEY)")
+        conn.executemany(INSERT, [('oats',), ('rye',)])
+        conn.execute(SELECT, ('oats', 'rye')).fetchall()
+    finally:
+        conn.close()
+
+    stats = {entry['statement']: entry for entry in query_log.top()}
+    assert stats[INSERT]['plan'] is None
+    assert stats["SELECT name FROM grains WHERE name IN (...)"]['plan'] == [
+        'SEARCH grains USING COVERING INDEX sqlite_autoindex_grains_1 (name=?)'
+    ]
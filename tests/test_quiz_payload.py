@@ -0,0 +1,40 @@
+from app.core.cache import QuizPayloadCache, quiz_payload_cache
+from app.core.compression import EncodedBody
+from conftest import question_payload
+
+def test_payload_is_served_from_cache_until_the_quiz_changes(client, create_quiz):
+    quiz = create_quiz(client, questions=['Which seed is richest in omega-3?'])
+    path = f"/api/quizzes/{quiz['quiz']['id']}/questions"
+    first = client.get(path)
+    assert [question['question_text'] for question in first.json()['questions']] == ['Which seed is richest in omega-3?']
+
+    hits = quiz_payload_cache.hits
+    assert client.get(path).content == first.content
+    assert quiz_payload_cache.hits == hits + 1
+
+    response = client.post('/api/questions', json=[question_payload('Which seed has the most zinc?', quiz['quiz']['id'])])
+    assert response.status_code == 200
+    texts = [question['question_text'] for question in client.get(path).json()['questions']]
+    assert texts == ['Which seed is richest in omega-3?', 'Which seed has the most zinc?']
+
+    assert client.delete(f"/api/questions/{quiz['questions'][0]['id']}").status_code == 200
+    texts = [question['question_text'] for question in client.get(path).json()['questions']]
+    assert texts == ['Which seed has the most zinc?']
+
+def test_missing_quiz_is_a_404(client):
+    response = client.get('/api/quizzes/999999/questions')
+    assert response.status_code == 404
+    assert response.json()['detail'] == 'Quiz with ID 999999 not found'
+
+def test_cache_stays_within_its_byte_bound():
+    cache = QuizPayloadCache(max_bytes=1000)
+    for quiz_id in range(5):
+        cache.put(quiz_id, 0, EncodedBody(b'x' * 400))
+    assert cache.size <= 1000
+    assert cache.get(0) is None
+    assert cache.get(4) is not None
+
+    # A body read before a write is not stored under the new version
+    cache.invalidate(4)
+    cache.put(4, 0, EncodedBody(b'y' * 400))
+    assert cache.get(4) is None
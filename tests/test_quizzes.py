@@ -0,0 +1,33 @@
+import base64
+import json
+
+def test_cursor_pages_through_every_quiz_once(client, create_quiz):
+    created = {create_quiz(client, name=f'Paged quiz {i}')['quiz']['id'] for i in range(5)}
+
+    seen = []
+    params = {'limit': 2}
+    while True:
+        response = client.get('/api/quizzes', params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(quiz['id'] for quiz in page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        params = {'limit': 2, 'after': cursor}
+
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+    # Newest first: quizzes created together share created_at, so by id
+    ids = [quiz_id for quiz_id in seen if quiz_id in created]
+    assert ids == sorted(ids, reverse=True)
+
+def test_bad_cursor_is_a_400(client):
+    def token(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+    for cursor in ('not-a-cursor', token(['2025-01-01']), token(['2025-01-01', True]), token([1, 2])):
+        response = client.get('/api/quizzes', params={'after': cursor})
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'Invalid cursor'
@@ -0,0 +1,50 @@
+import sqlite3
+from contextlib import closing
+from conftest import question_payload
+
+def _random(client, **params):
+    response = client.get('/api/questions/random', params=params)
+    assert response.status_code == 200, response.text
+    return [question['id'] for question in response.json()]
+
+def test_random_questions_skip_what_the_user_answered(client, create_quiz):
+    quiz = create_quiz(client, category='sprouts', questions=[f'Which sprout is number {i}?' for i in range(4)])
+    quiz_id = quiz['quiz']['id']
+    ids = [question['id'] for question in quiz['questions']]
+    client.post('/api/users', json={'email': 'sprouts@example.com'})
+
+    drawn = _random(client, category='sprouts', count=10)
+    assert sorted(drawn) == ids
+    assert _random(client, category='sprouts', count=3, seed=7) == _random(client, category='sprouts', count=3, seed=7)
+
+    # Scored answers are keyed by question id, so only those are skipped
+    client.post(f'/api/quizzes/{quiz_id}/score', json={'answers': {ids[0]: 0, ids[2]: 1}, 'email': 'sprouts@example.com'})
+    assert sorted(_random(client, category='sprouts', count=10, email='sprouts@example.com')) == [ids[1], ids[3]]
+
+    # A question added later is drawn without a restart
+    added = client.post('/api/questions', json=[question_payload('Which sprout is alfalfa?', quiz_id, 'sprouts')]).json()
+    assert sorted(_random(client, category='sprouts', count=10, email='sprouts@example.com')) == [
+        ids[1], ids[3], added['results'][0]['id']
+    ]
+
+def test_results_with_positional_answers_skip_the_whole_quiz(client, create_quiz, database_path):
+    answered = create_quiz(client, category='pulses', questions=['Which pulse is a lentil?', 'Which pulse is a pea?'])
+    other = create_quiz(client, category='pulses', questions=['Which pulse is a bean?'])
+    user_id = client.post('/api/users', json={'email': 'pulses@example.com'}).json()['user_id']
+    # Older results stored the answers as a plain list by position. The row
+    # bypasses the stats tables, so it is removed again afterwards
+    with closing(sqlite3.connect(database_path)) as conn:
+        with conn:
+            conn.execute(
+                "INSERT INTO quiz_results (user_id, quiz_id, score, answers, completed_at) VALUES (?, ?, 50.0, '[0, 1]', '2024-01-01')",
+                (user_id, answered['quiz']['id'])
+            )
+        try:
+            assert _random(client, category='pulses', email='pulses@example.com') == [other['questions'][0]['id']]
+        finally:
+            with conn:
+                conn.execute("DELETE FROM quiz_results WHERE user_id = ?", (user_id,))
+
+def test_random_questions_reject_unknown_users_and_large_counts(client):
+    assert client.get('/api/questions/random', params={'email': 'nobody@example.com'}).status_code == 404
+    assert client.get('/api/questions/random', params={'count': 51}).status_code == 422
@@ -0,0 +1,55 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.routes import users
+import run
+
+def _submit(client, email, quiz_id, score):
+    return client.post(f'/api/users/{email}/results', json={'quiz_id': quiz_id, 'score': score, 'answers': {}})
+
+def test_queued_results_are_written_on_shutdown(create_quiz, monkeypatch):
+    with TestClient(run.app) as client:
+        quiz_id = create_quiz(client)['quiz']['id']
+        client.post('/api/users', json={'email': 'queued@example.com'})
+
+        monkeypatch.setattr(users.settings, 'RESULTS_WRITE_MODE', 'queued')
+        # Holds the flush back, so it is still pending when the app shuts down
+        write_batch = users.result_queue.write_batch
+
+        async def slow_write_batch(items):
+            await asyncio.sleep(0.5)
+            return await write_batch(items)
+        monkeypatch.setattr(users.result_queue, 'write_batch', slow_write_batch)
+        response = _submit(client, 'queued@example.com', quiz_id, 7.0)
+        assert response.status_code == 202
+        assert client.get('/api/users/queued@example.com/results').json()['results'] == []
+
+    monkeypatch.undo()
+    with TestClient(run.app) as client:
+        results = client.get('/api/users/queued@example.com/results').json()['results']
+    assert [(result['quiz_id'], result['score']) for result in results] == [(quiz_id, 7.0)]
+
+def test_saved_result_moves_the_leaderboards(client, create_quiz):
+    quiz_id = create_quiz(client, category='fibre')['quiz']['id']
+    for email in ('first@example.com', 'second@example.com'):
+        client.post('/api/users', json={'email': email})
+    # Loads the boards before the results arrive, so record() applies them
+    assert client.get('/api/leaderboards/global').status_code == 200
+
+    assert _submit(client, 'second@example.com', quiz_id, 40.0).status_code == 200
+    assert _submit(client, 'first@example.com', quiz_id, 90.0).status_code == 200
+
+    board = client.get(f'/api/leaderboards/quizzes/{quiz_id}', params={'email': 'second@example.com'}).json()
+    assert [(entry['rank'], entry['score']) for entry in board['top']] == [(1, 90.0), (2, 40.0)]
+    assert board['me']['rank'] == 2
+
+    # A better score moves the quiz and category boards; a worse one doesn't
+    assert _submit(client, 'second@example.com', quiz_id, 95.0).status_code == 200
+    assert _submit(client, 'second@example.com', quiz_id, 10.0).status_code == 200
+    board = client.get(f'/api/leaderboards/quizzes/{quiz_id}', params={'email': 'second@example.com'}).json()
+    assert board['me'] == {'user_id': board['me']['user_id'], 'rank': 1, 'score': 95.0}
+    board = client.get('/api/leaderboards/categories/fibre', params={'email': 'first@example.com'}).json()
+    assert board['me']['rank'] == 2
+
+def test_unknown_user_is_a_404(client):
+    assert client.get('/api/users/nobody@example.com/results').status_code == 404
+    assert client.get('/api/users/nobody@example.com/stats').status_code == 404
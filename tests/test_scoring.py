@@ -0,0 +1,45 @@
+import json
+from conftest import question_payload
+
+def _score(client, quiz_id, answers, email=None):
+    return client.post(f'/api/quizzes/{quiz_id}/score', json={'answers': answers, 'email': email})
+
+def test_answers_are_scored_against_the_stored_key(client, create_quiz):
+    quiz = create_quiz(client, questions=['Which legume is a lentil?', 'Which legume is a pea?', 'Which legume is a bean?'])
+    quiz_id = quiz['quiz']['id']
+    first, second, third = (question['id'] for question in quiz['questions'])
+
+    response = _score(client, quiz_id, {first: 0, second: 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['correct'], body['total'], body['score'], body['result_id']) == (1, 3, 33.33, None)
+    assert body['results'] == [
+        {'question_id': first, 'selected_answer': 0, 'correct_answer_index': 0, 'is_correct': True},
+        {'question_id': second, 'selected_answer': 2, 'correct_answer_index': 0, 'is_correct': False},
+        {'question_id': third, 'selected_answer': None, 'correct_answer_index': 0, 'is_correct': False}
+    ]
+
+    # Adding a question drops the cached key
+    client.post('/api/questions', json=[question_payload('Which legume is a chickpea?', quiz_id)])
+    assert _score(client, quiz_id, {first: 0}).json()['total'] == 4
+
+def test_scored_result_is_saved_for_the_user(client, create_quiz):
+    quiz = create_quiz(client, questions=['Which nut is a drupe seed?', 'Which nut grows underground?'])
+    quiz_id = quiz['quiz']['id']
+    answers = {question['id']: 0 for question in quiz['questions']}
+    client.post('/api/users', json={'email': 'scored@example.com'})
+
+    body = _score(client, quiz_id, answers, email='scored@example.com').json()
+    assert body['score'] == 100.0
+    assert body['result_id'] is not None
+
+    results = client.get('/api/users/scored@example.com/results').json()['results']
+    assert [(result['quiz_id'], result['score']) for result in results] == [(quiz_id, 100.0)]
+    assert results[0]['answers'] == json.loads(json.dumps(answers))
+
+def test_unknown_questions_and_quizzes_are_rejected(client, create_quiz):
+    quiz_id = create_quiz(client)['quiz']['id']
+    response = _score(client, quiz_id, {999999: 1})
+    assert response.status_code == 400
+    assert response.json()['detail'] == f'Questions not in quiz {quiz_id}: 999999'
+    assert _score(client, 999999, {}).status_code == 404
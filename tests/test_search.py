@@ -0,0 +1,43 @@
+from app.routes import search
+from conftest import question_payload
+
+def _search(client, q):
+    response = client.get('/api/search', params={'q': q})
+    assert response.status_code == 200
+    return [result['id'] for result in response.json()['results']]
+
+def test_search_follows_inserted_and_deleted_questions(client, create_quiz):
+    assert _search(client, 'zanthoxylum') == []
+
+    quiz = create_quiz(client, questions=['Which spice is zanthoxylum better known as?', 'Which grain is gluten free?'])
+    question_id = quiz['questions'][0]['id']
+    assert _search(client, 'zanthoxylum') == [question_id]
+    # The last word is a prefix by default
+    assert _search(client, 'zanthox') == [question_id]
+
+    assert client.delete(f'/api/questions/{question_id}').status_code == 200
+    assert _search(client, 'zanthoxylum') == []
+
+def test_search_without_words_is_a_400(client):
+    assert client.get('/api/search', params={'q': '"*'}).status_code == 400
+
+def test_snippets_escape_the_stored_text(client, create_quiz):
+    quiz_id = create_quiz(client, questions=['Which berry is the quandong?'])['quiz']['id']
+    question = question_payload('Which fruit is a <b>quandong</b>?', quiz_id=quiz_id)
+    question['explanation'] = '<img src=x onerror=alert(1)> Quandong & desert lime'
+    assert client.post('/api/questions', json=[question]).status_code == 200
+
+    response = client.get('/api/search', params={'q': 'quandong desert'})
+    snippets = [result['snippet'] for result in response.json()['results']]
+    assert '&lt;img src=x onerror=alert(1)&gt; <mark>Quandong</mark> &amp; <mark>desert</mark> lime' in snippets
+    assert all('<img' not in snippet and '<b>' not in snippet for snippet in snippets)
+
+def test_only_the_newest_candidates_are_ranked(client, create_quiz, monkeypatch):
+    ids = [question['id'] for question in create_quiz(client, questions=[
+        'Is wakame wakame wakame a seaweed?', 'Which seaweed is wakame?', 'Is wakame salty?'
+    ])['questions']]
+    assert set(_search(client, 'wakame')) == set(ids)
+
+    # The oldest match scores best, but falls outside the candidates
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 2)
+    assert set(_search(client, 'wakame')) == set(ids[1:])
@@ -0,0 +1,46 @@
+import json
+import sqlite3
+from contextlib import closing
+import pytest
+from app.core.serialization import encode_records
+from app.migrations import migrate
+
+def test_raw_columns_are_spliced_in_as_stored():
+    records = [
+        {'id': 1, 'choices': '["Oats", "Rye"]', 'note': None},
+        {'id': 2, 'choices': None, 'note': 'x'},
+        # A plain value that looks like the placeholder takes the slow path
+        {'id': 3, 'choices': '[]', 'note': '\x00'}
+    ]
+    assert json.loads(encode_records(records, ('choices',))) == [
+        {'id': 1, 'choices': ['Oats', 'Rye'], 'note': None},
+        {'id': 2, 'choices': None, 'note': 'x'},
+        {'id': 3, 'choices': [], 'note': '\x00'}
+    ]
+    assert encode_records([]) == b'[]'
+
+def test_database_only_stores_valid_json_choices(tmp_path):
+    with closing(sqlite3.connect(tmp_path / 'choices.db')) as conn:
+        conn.executescript('''
+            CREATE TABLE quiz (id INTEGER PRIMARY KEY, name TEXT, description TEXT, image TEXT, category TEXT, difficulty TEXT, created_at TEXT);
+            CREATE TABLE questions (
+                id INTEGER PRIMARY KEY, quiz_id INTEGER, question_text TEXT, choices TEXT,
+                correct_answer_index INTEGER, explanation TEXT, category TEXT, difficulty TEXT, image TEXT
+            );
+            INSERT INTO quiz VALUES (1, 'Grains', '', '', 'nutrition', 'easy', '2025-01-01');
+            INSERT INTO questions VALUES (1, 1, 'Which grain?', '["Oats", "Rye"]', 0, '', 'nutrition', 'easy', '');
+            INSERT INTO questions VALUES (2, 1, 'Which seed?', '["Flax", ', 0, '', 'nutrition', 'easy', '');
+        ''')
+        migrate(conn)
+
+        # Rows that were already malformed are kept as a string of their text
+        stored = [json.loads(choices) for choices, in conn.execute("SELECT choices FROM questions ORDER BY id")]
+        assert stored == [['Oats', 'Rye'], '["Flax", ']
+
+        with pytest.raises(sqlite3.IntegrityError, match='choices must be valid JSON'):
+            conn.execute(
+                "INSERT INTO questions (quiz_id, question_text, choices, correct_answer_index, explanation, category, difficulty, image) "
+                "VALUES (1, 'Which nut?', '[\"Pecan\"', 0, '', 'nutrition', 'easy', '')"
+            )
+        with pytest.raises(sqlite3.IntegrityError, match='choices must be valid JSON'):
+            conn.execute("UPDATE questions SET choices = 'Oats, Rye' WHERE id = 1")
@@ -0,0 +1,70 @@
+import sqlite3
+from contextlib import closing
+from app.stats import rebuild_user_stats
+
+STATS_QUERIES = (
+    "SELECT * FROM user_stats ORDER BY user_id",
+    "SELECT * FROM user_category_stats ORDER BY user_id, category",
+)
+
+def _stats_tables(conn):
+    return [conn.execute(query).fetchall() for query in STATS_QUERIES]
+
+def _incremental_and_rebuilt(database_path):
+    """Both stats tables as the app keeps them, and as a rebuild on a copy computes them"""
+    with closing(sqlite3.connect(database_path)) as conn, closing(sqlite3.connect(':memory:', isolation_level=None)) as copy:
+        conn.backup(copy)
+        rebuild_user_stats(copy)
+        return _stats_tables(conn), _stats_tables(copy)
+
+def _submit(client, email, quiz_id, score):
+    response = client.post(f'/api/users/{email}/results', json={'quiz_id': quiz_id, 'score': score, 'answers': {}})
+    assert response.status_code == 200, response.text
+
+def test_stats_endpoint_sums_results_per_category(client, create_quiz):
+    beans = create_quiz(client, name='Beans', category='pulses')['quiz']['id']
+    lentils = create_quiz(client, name='Lentils', category='pulses')['quiz']['id']
+    oats = create_quiz(client, name='Oats', category='grains')['quiz']['id']
+    client.post('/api/users', json={'email': 'stats@example.com'})
+    for quiz_id, score in ((beans, 60.0), (beans, 80.0), (lentils, 40.0), (oats, 100.0)):
+        _submit(client, 'stats@example.com', quiz_id, score)
+
+    stats = client.get('/api/users/stats@example.com/stats').json()
+    assert stats['overall_stats'] == {
+        'total_quizzes': 4,
+        'average_score': 70.0,
+        'highest_score': 100.0,
+        'lowest_score': 40.0,
+        'unique_quizzes': 3
+    }
+    assert stats['category_stats'] == [
+        {'category': 'grains', 'quizzes_taken': 1, 'average_score': 100.0},
+        {'category': 'pulses', 'quizzes_taken': 3, 'average_score': 60.0}
+    ]
+
+def test_incremental_stats_match_a_rebuild_after_create_result_and_delete(client, create_quiz, database_path):
+    seeds = create_quiz(client, name='Seeds', category='seeds')['quiz']['id']
+    nuts = create_quiz(client, name='Nuts', category='seeds')['quiz']['id']
+    roots = create_quiz(client, name='Roots', category='roots')['quiz']['id']
+    for email in ('a@stats.example.com', 'b@stats.example.com'):
+        client.post('/api/users', json={'email': email})
+    _submit(client, 'a@stats.example.com', seeds, 50.0)
+    _submit(client, 'a@stats.example.com', nuts, 70.0)
+    _submit(client, 'a@stats.example.com', roots, 20.0)
+    _submit(client, 'b@stats.example.com', seeds, 30.0)
+    _submit(client, 'b@stats.example.com', seeds, 90.0)
+
+    incremental, rebuilt = _incremental_and_rebuilt(database_path)
+    assert incremental == rebuilt
+
+    # b only played the deleted quiz, so their seeds row goes altogether
+    assert client.delete(f'/api/quizzes/{seeds}').status_code == 200
+    incremental, rebuilt = _incremental_and_rebuilt(database_path)
+    assert incremental == rebuilt
+
+    stats = client.get('/api/users/a@stats.example.com/stats').json()
+    assert stats['category_stats'] == [
+        {'category': 'roots', 'quizzes_taken': 1, 'average_score': 20.0},
+        {'category': 'seeds', 'quizzes_taken': 1, 'average_score': 70.0}
+    ]
+    assert client.get('/api/users/b@stats.example.com/stats').json()['category_stats'] == []
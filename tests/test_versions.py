@@ -0,0 +1,50 @@
+import sqlite3
+import time
+from contextlib import closing
+from fastapi.testclient import TestClient
+import run
+
+INSERT_QUIZ = (
+    "INSERT INTO quiz (name, description, image, category, difficulty, created_at) "
+    "VALUES ('Written elsewhere', '', '', ?, 'easy', '2025-01-01')"
+)
+INSERT_QUESTION = (
+    "INSERT INTO questions (quiz_id, question_text, choices, correct_answer_index, explanation, category, difficulty, image) "
+    "VALUES (?, 'Which herb is written elsewhere?', '[\"Basil\", \"Dill\"]', 1, '', 'herbs', 'easy', '')"
+)
+
+def _write(database_path, query, values):
+    """Commit a write the way another process would, outside the app's pool"""
+    with closing(sqlite3.connect(database_path)) as conn, conn:
+        return conn.execute(query, values).lastrowid
+
+def _eventually(check, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "caches never caught up with the other process"
+        time.sleep(0.02)
+
+def test_writes_from_another_process_reach_the_caches(client, create_quiz, database_path):
+    quiz = create_quiz(client, category='herbs', questions=['Which herb is basil?'])
+    quiz_id = quiz['quiz']['id']
+    path = f'/api/quizzes/{quiz_id}/questions'
+    assert 'herbs-elsewhere' not in client.get('/api/categories').json()
+    assert len(client.get(path).json()['questions']) == 1
+    assert client.post(f'/api/quizzes/{quiz_id}/score', json={'answers': {}}).json()['total'] == 1
+
+    other_id = _write(database_path, INSERT_QUIZ, ('herbs-elsewhere',))
+    _write(database_path, INSERT_QUESTION, (quiz_id,))
+
+    _eventually(lambda: 'herbs-elsewhere' in client.get('/api/categories').json())
+    _eventually(lambda: len(client.get(path).json()['questions']) == 2)
+    assert client.post(f'/api/quizzes/{quiz_id}/score', json={'answers': {}}).json()['total'] == 2
+    client.delete(f'/api/quizzes/{other_id}')
+
+def test_writes_made_while_stopped_are_caught_up_on_startup(database_path):
+    with TestClient(run.app) as client:
+        assert 'herbs-offline' not in client.get('/api/categories').json()
+
+    other_id = _write(database_path, INSERT_QUIZ, ('herbs-offline',))
+    with TestClient(run.app) as client:
+        assert 'herbs-offline' in client.get('/api/categories').json()
+        client.delete(f'/api/quizzes/{other_id}')
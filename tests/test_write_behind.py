@@ -0,0 +1,40 @@
+import asyncio
+from app.core.write_behind import WriteBehindQueue
+
+def _queue(batches, interval):
+    async def write_batch(items):
+        batches.append(list(items))
+        return items
+    return WriteBehindQueue(write_batch, batch_size=10, interval=interval)
+
+def test_a_lone_item_is_written_without_waiting_for_the_interval():
+    async def main():
+        batches = []
+        queue = _queue(batches, interval=60.0)
+        queue.start()
+        try:
+            assert await asyncio.wait_for(queue.submit('oats'), 1.0) == 'oats'
+            assert await asyncio.wait_for(queue.submit('rye'), 1.0) == 'rye'
+        finally:
+            await queue.stop()
+        assert batches == [['oats'], ['rye']]
+    asyncio.run(main())
+
+def test_items_that_keep_arriving_share_a_batch():
+    async def main():
+        batches = []
+        queue = _queue(batches, interval=0.05)
+        queue.start()
+        try:
+            async def trickle(item, delay):
+                await asyncio.sleep(delay)
+                return await queue.submit(item)
+
+            # Queued together, then one more while the batch is still open
+            items = ['flax', 'chia', 'hemp']
+            results = await asyncio.gather(*(queue.submit(item) for item in items), trickle('sesame', 0.01))
+        finally:
+            await queue.stop()
+        assert results == items + ['sesame']
+        assert batches == [items + ['sesame']]
+    asyncio.run(main())